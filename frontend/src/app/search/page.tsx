@@ -15,15 +15,22 @@ export default function SearchPage() {
     const observerTarget = useRef<HTMLDivElement>(null);
     const currentQuery = useRef('');
     const LIMIT = 10;
+    // Cosine distance cut-off applied server-side, so every page holds only relevant hits
+    // (hybrid mode keeps exact keyword matches regardless of distance)
+    // One card per document (best chunk + match count), diversified with MMR
+    const SEARCH_OPTIONS = { groupByDocument: true, mmrLambda: 0.7 };
+    const MAX_DISTANCE = 0.6;
 
     const loadMoreResults = useCallback(async () => {
         if (loading || !hasMore || !currentQuery.current) return;
 
         setLoading(true);
         try {
-            const newResults = await searchDocuments(currentQuery.current, LIMIT, offset);
+            const newResults = await searchDocuments(currentQuery.current, LIMIT, offset, MAX_DISTANCE, 'hybrid', SEARCH_OPTIONS);
 
-            if (newResults.length < LIMIT) {
+            // Grouped pages can come back short while later pages still have results,
+            // so only an empty page marks the end
+            if (newResults.length === 0) {
                 setHasMore(false);
             }
 
@@ -66,11 +73,11 @@ export default function SearchPage() {
 
         setLoading(true);
         try {
-            const data = await searchDocuments(query, LIMIT, 0);
+            const data = await searchDocuments(query, LIMIT, 0, MAX_DISTANCE, 'hybrid', SEARCH_OPTIONS);
             setResults(data);
             setOffset(LIMIT);
 
-            if (data.length < LIMIT) {
+            if (data.length === 0) {
                 setHasMore(false);
             }
         } catch (error) {
@@ -122,11 +129,12 @@ export default function SearchPage() {
                                 <p className="text-gray-300 leading-relaxed text-sm">
                                     ...{item.content}...
                                 </p>
-                                {item.score !== "N/A" && (
-                                    <div className="text-xs text-gray-500">
-                                        Score: {item.score}
-                                    </div>
-                                )}
+                                <div className="text-xs text-gray-500">
+                                    Score: {item.score.toFixed(3)}
+                                    {item.match_count && item.match_count > 1 && (
+                                        <span className="ml-2">· {item.match_count} matching sections</span>
+                                    )}
+                                </div>
                             </div>
                         ))}
 
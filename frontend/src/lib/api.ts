@@ -70,12 +70,35 @@ export async function searchDocuments(
     query: string,
     limit = 10,
     offset = 0,
-    threshold?: number
+    threshold?: number,
+    mode: "vector" | "hybrid" = "vector",
+    options?: {
+        groupByDocument?: boolean;
+        mmrLambda?: number;
+        category?: string;
+        tag?: string;
+        docType?: string;
+    }
 ): Promise<SearchResultItem[]> {
-    let url = `${API_Base}/api/search?q=${encodeURIComponent(query)}&limit=${limit}&offset=${offset}`;
+    let url = `${API_Base}/api/search?q=${encodeURIComponent(query)}&limit=${limit}&offset=${offset}&mode=${mode}`;
     if (threshold !== undefined) {
         url += `&threshold=${threshold}`;
     }
+    if (options?.groupByDocument) {
+        url += `&group_by_document=true`;
+    }
+    if (options?.mmrLambda !== undefined) {
+        url += `&mmr_lambda=${options.mmrLambda}`;
+    }
+    if (options?.category && options.category !== "All") {
+        url += `&category=${encodeURIComponent(options.category)}`;
+    }
+    if (options?.tag) {
+        url += `&tag=${encodeURIComponent(options.tag)}`;
+    }
+    if (options?.docType && options.docType !== "All") {
+        url += `&doc_type=${encodeURIComponent(options.docType)}`;
+    }
     const res = await fetch(url);
     if (!res.ok) throw new Error("Failed to search documents");
     return res.json();
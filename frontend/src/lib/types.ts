@@ -36,6 +36,9 @@ export interface SearchResultItem {
     chunk_id: number;
     document_id: number;
     document_title: string;
+    source_url?: string | null;
     content: string;
-    score: string;
+    score: number;            // vector: cosine similarity (1 - distance), hybrid: RRF score
+    distance: number | null;  // cosine distance (null for lexical-only hybrid hits)
+    match_count?: number | null;  // grouped search: matching chunks in this document
 }
@@ -0,0 +1,42 @@
+"""Add HNSW index on document_chunks.embedding
+
+Revision ID: e4b7c1d9a2f6
+Revises: c5e8d2a7f391
+Create Date: 2026-10-17 15:02:48.118304
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c1d9a2f6'
+down_revision = 'c5e8d2a7f391'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # cosine distance(<=>) 검색용 HNSW 인덱스 (pgvector >= 0.5.0)
+    # 큰 테이블에서도 쓰기를 막지 않도록 CONCURRENTLY 로 생성 (트랜잭션 밖에서 실행해야 함)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_document_chunks_embedding_hnsw',
+            'document_chunks',
+            ['embedding'],
+            unique=False,
+            postgresql_using='hnsw',
+            postgresql_with={'m': 16, 'ef_construction': 64},
+            postgresql_ops={'embedding': 'vector_cosine_ops'},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_document_chunks_embedding_hnsw',
+            table_name='document_chunks',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
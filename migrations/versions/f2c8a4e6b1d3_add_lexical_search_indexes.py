@@ -0,0 +1,48 @@
+"""Add full-text and trigram indexes for hybrid search
+
+Revision ID: f2c8a4e6b1d3
+Revises: e4b7c1d9a2f6
+Create Date: 2026-10-17 16:21:33.540127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a4e6b1d3'
+down_revision = 'e4b7c1d9a2f6'
+branch_labels = None
+depends_on = None
+
+# SearchService 의 쿼리와 같은 식이어야 인덱스가 사용됨 ('simple': 한국어 형태소 분석기가 없으므로 공백 단위)
+LEXICAL_INDEXES = [
+    ('ix_document_chunks_content_tsv', 'document_chunks', "to_tsvector('simple'::regconfig, content)", None),
+    ('ix_documents_title_tsv', 'documents', "to_tsvector('simple'::regconfig, title)", None),
+    ('ix_document_chunks_content_trgm', 'document_chunks', 'content', 'gin_trgm_ops'),
+    ('ix_documents_title_trgm', 'documents', 'title', 'gin_trgm_ops'),
+]
+
+
+def upgrade() -> None:
+    # 조사가 붙은 한국어 고유명사, 부분 식별자 매칭용 trigram
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        for name, table, column, ops in LEXICAL_INDEXES:
+            op.create_index(
+                name,
+                table,
+                [sa.text(column)] if ops is None else [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: ops} if ops else {},
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(LEXICAL_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -24,16 +24,14 @@ async def main():
         
         logger.info(f"Found {len(documents)} total documents.")
         
+        # Check which documents already have chunks (single query instead of one per document)
+        processed_res = await db.execute(select(DocumentChunk.document_id).distinct())
+        processed_ids = set(processed_res.scalars().all())
+        
         vector_service = VectorService(db)
         
         for i, doc in enumerate(documents):
-            # Check if chunks already exist
-            existing_chunks_res = await db.execute(
-                select(DocumentChunk).where(DocumentChunk.document_id == doc.id)
-            )
-            existing_chunks = existing_chunks_res.scalars().all()
-            
-            if existing_chunks:
+            if doc.id in processed_ids:
                 logger.info(f"[{i+1}/{len(documents)}] Doc {doc.id} already processed. Skipping.")
                 continue
 
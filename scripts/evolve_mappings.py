@@ -117,7 +117,7 @@ Task:
     
     print("🧠 Consulting with LLM...")
     try:
-        response = agent.chat(messages, temperature=0.1)
+        response = agent.chat(messages, temperature=0.1, use_cache=True)
         
         if response:
             print("\n🤖 LLM Suggestion:\n")
@@ -121,7 +121,7 @@ async def process_documents(dry_run, limit):
                 Output JSON ONLY: {{"category": "Str", "tags": ["Str", "Str"], "is_new_category": true/false}}
                 """
                 
-                response = ai_agent.chat([{ "role": "user", "content": prompt_text }], temperature=0.0)
+                response = ai_agent.chat([{ "role": "user", "content": prompt_text }], temperature=0.0, use_cache=True)
                 
                 try:
                     import json
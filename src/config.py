@@ -13,3 +13,101 @@ GEMINI_API_KEYS = os.getenv("GEMINI_API_KEYS", "").split(",")
 GEMINI_API_KEYS = [k.strip() for k in GEMINI_API_KEYS if k.strip()]
 GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemma-3-27b-it")
 LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "3"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-004")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # Gemini batchEmbedContents 최대 100
+# HNSW 검색 후보 수 (pgvector 기본 40). 클수록 recall ↑ / 지연시간 ↑, 요청별로 덮어쓸 수 있음 (최대 1000)
+SEARCH_HNSW_EF_SEARCH = int(os.getenv("SEARCH_HNSW_EF_SEARCH", "40"))
+# 필터 검색 시 HNSW iterative index scan (strict_order) 사용. pgvector 0.8 미만이면 false
+SEARCH_HNSW_ITERATIVE_SCAN = os.getenv("SEARCH_HNSW_ITERATIVE_SCAN", "true").lower() == "true"
+# Hybrid 검색 (vector + full-text/trigram, Reciprocal Rank Fusion)
+SEARCH_RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+SEARCH_HYBRID_CANDIDATES = int(os.getenv("SEARCH_HYBRID_CANDIDATES", "50"))  # 검색 방식별 후보 수
+SEARCH_TRGM_THRESHOLD = float(os.getenv("SEARCH_TRGM_THRESHOLD", "0.3"))  # pg_trgm word similarity 임계값
+SEARCH_RERANK_CANDIDATES = int(os.getenv("SEARCH_RERANK_CANDIDATES", "100"))  # 문서 그룹핑/MMR 에 쓰는 후보 청크 수
+# 검색 쿼리 임베딩 메모리 캐시 (LRU + TTL, 프로세스 내 공유)
+SEARCH_EMBEDDING_CACHE_MB = float(os.getenv("SEARCH_EMBEDDING_CACHE_MB", "32"))
+SEARCH_EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
+# !ask: hybrid 검색으로 가져올 청크 수와 LLM 컨텍스트 토큰 예산
+ASK_RETRIEVAL_CHUNKS = int(os.getenv("ASK_RETRIEVAL_CHUNKS", "12"))
+ASK_CONTEXT_TOKENS = int(os.getenv("ASK_CONTEXT_TOKENS", "6000"))
+
+# Gemini 키별 한도 (무료 티어 기준) 및 장애 시 cooldown
+GEMINI_KEY_RPM = int(os.getenv("GEMINI_KEY_RPM", "30"))
+GEMINI_KEY_TPM = int(os.getenv("GEMINI_KEY_TPM", "15000"))
+EMBEDDING_KEY_RPM = int(os.getenv("EMBEDDING_KEY_RPM", "1500"))
+GEMINI_KEY_COOLDOWN_SECONDS = float(os.getenv("GEMINI_KEY_COOLDOWN_SECONDS", "60"))
+# Local LLM (LM Studio) 서킷 브레이커: 연속 N회 실패 시 M초간 호출 차단
+LOCAL_LLM_BREAKER_THRESHOLD = int(os.getenv("LOCAL_LLM_BREAKER_THRESHOLD", "3"))
+LOCAL_LLM_BREAKER_RESET_SECONDS = float(os.getenv("LOCAL_LLM_BREAKER_RESET_SECONDS", "60"))
+# Hedged request: Gemini 응답이 최근 지연시간의 P(n) 안에 오지 않으면 Local LLM 에도 동시 요청
+LLM_HEDGE_JOB_TYPES = {t.strip() for t in os.getenv("LLM_HEDGE_JOB_TYPES", "ask").split(",") if t.strip()}
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2"))
+LLM_HEDGE_MAX_DELAY = float(os.getenv("LLM_HEDGE_MAX_DELAY", "20"))
+# 스트리밍 응답을 Discord 메시지에 반영하는 최소 편집 간격 (초, 채널당 편집 rate limit 고려)
+DISCORD_STREAM_EDIT_INTERVAL = float(os.getenv("DISCORD_STREAM_EDIT_INTERVAL", "1.5"))
+# 모델별 컨텍스트 창 (토큰). "model=tokens,..." 형식, local-model 은 LM Studio 에 로드한 모델 기준
+LLM_CONTEXT_WINDOWS = {
+    name.strip(): int(size)
+    for name, size in (
+        item.split("=", 1) for item in os.getenv(
+            "LLM_CONTEXT_WINDOWS",
+            "gemma-3-27b-it=131072,gemini-2.0-flash=1048576,gemini-2.5-flash=1048576,local-model=8192"
+        ).split(",") if "=" in item
+    )
+}
+LLM_DEFAULT_CONTEXT_WINDOW = int(os.getenv("LLM_DEFAULT_CONTEXT_WINDOW", "32768"))
+# 구조화 출력(response_format json_schema) 사용: auto(gemini-* 모델만) / true / false
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "auto").lower()
+# 긴 콘텐츠 map-reduce 요약: 입력 한도를 넘으면 청크별 요약(map)을 병렬 생성 후 최종 분석(reduce)
+LLM_MAP_CHUNK_TOKENS = int(os.getenv("LLM_MAP_CHUNK_TOKENS", "3500"))
+LLM_MAP_CHUNK_OVERLAP_TOKENS = int(os.getenv("LLM_MAP_CHUNK_OVERLAP_TOKENS", "150"))
+LLM_MAP_CONCURRENCY = int(os.getenv("LLM_MAP_CONCURRENCY", "4"))
+# 문서 하나당 map 호출 상한 (재요약 단계 포함) - 링크 하나가 Gemini TPM 예산을 소진하지 않도록
+LLM_MAP_MAX_CALLS = int(os.getenv("LLM_MAP_MAX_CALLS", "16"))
+
+# LLM 작업 큐 (Postgres 영속 큐) 설정
+LLM_JOB_LEASE_SECONDS = int(os.getenv("LLM_JOB_LEASE_SECONDS", "600"))
+LLM_JOB_POLL_INTERVAL = float(os.getenv("LLM_JOB_POLL_INTERVAL", "5"))
+LLM_JOB_MAX_ATTEMPTS = int(os.getenv("LLM_JOB_MAX_ATTEMPTS", "3"))
+
+# 작업 lane 별 동시성 (interactive: !ask, batch: summary/deep_dive/weekly)
+LLM_INTERACTIVE_CONCURRENCY = int(os.getenv("LLM_INTERACTIVE_CONCURRENCY", "1"))
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", str(LLM_CONCURRENCY)))
+# 대기 시간 N초마다 우선순위 +1 (저우선순위 작업 기아 방지)
+LLM_JOB_AGING_SECONDS = float(os.getenv("LLM_JOB_AGING_SECONDS", "120"))
+
+# Playwright 브라우저 풀: 동시 컨텍스트 수, 컨텍스트/브라우저 재생성 주기(페이지 수)
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "4"))
+BROWSER_CONTEXT_RECYCLE_PAGES = int(os.getenv("BROWSER_CONTEXT_RECYCLE_PAGES", "50"))
+BROWSER_RESTART_PAGES = int(os.getenv("BROWSER_RESTART_PAGES", "500"))
+# 텍스트 추출에 불필요한 리소스(이미지/미디어/폰트/CSS, 광고·트래커) 요청 차단
+BROWSER_BLOCK_RESOURCES = os.getenv("BROWSER_BLOCK_RESOURCES", "true").lower() == "true"
+BROWSER_BLOCKED_RESOURCE_TYPES = [t.strip() for t in os.getenv("BROWSER_BLOCKED_RESOURCE_TYPES", "image,media,font,stylesheet").split(",") if t.strip()]
+# 차단 시 깨지는 사이트 예외: "domain=type|type;domain2=*" (예: "example.com=stylesheet;foo.com=*")
+BROWSER_RESOURCE_ALLOWLIST = os.getenv("BROWSER_RESOURCE_ALLOWLIST", "")
+
+# 추출 본문 최대 길이 (긴 콘텐츠는 AIAgent 가 map-reduce 로 요약)
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "60000"))
+# 콘텐츠 추출: 정적 HTTP 우선 시도 후 본문이 짧거나 동적 사이트면 브라우저로 전환
+EXTRACT_DYNAMIC_DOMAINS = [d.strip() for d in os.getenv("EXTRACT_DYNAMIC_DOMAINS", "x.com,twitter.com,threads.net").split(",") if d.strip()]
+EXTRACT_STATIC_MIN_CHARS = int(os.getenv("EXTRACT_STATIC_MIN_CHARS", "300"))
+EXTRACT_STATIC_TIMEOUT = float(os.getenv("EXTRACT_STATIC_TIMEOUT", "15"))
+# 호스트별 동시 추출 수 및 429/503 backoff (Retry-After 우선, 없으면 지수 증가)
+EXTRACT_PER_HOST_CONCURRENCY = int(os.getenv("EXTRACT_PER_HOST_CONCURRENCY", "2"))
+EXTRACT_HOST_BACKOFF_SECONDS = float(os.getenv("EXTRACT_HOST_BACKOFF_SECONDS", "5"))
+EXTRACT_HOST_BACKOFF_MAX_SECONDS = float(os.getenv("EXTRACT_HOST_BACKOFF_MAX_SECONDS", "300"))
+EXTRACT_THROTTLE_RETRIES = int(os.getenv("EXTRACT_THROTTLE_RETRIES", "2"))
+
+# 캐시 디렉토리 (Obsidian 볼트인 SAVE_DIR 와 분리)
+CACHE_DIR = os.getenv("CACHE_DIR", "/app/cache")
+
+# LLM 응답 캐시 설정
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+
+# 추출 원문 캐시: max_age 이내는 네트워크 생략, 이후에는 ETag/Last-Modified 로 재검증
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_MAX_AGE_SECONDS = int(os.getenv("EXTRACTION_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+EXTRACTION_CACHE_RETENTION_SECONDS = int(os.getenv("EXTRACTION_CACHE_RETENTION_SECONDS", str(90 * 24 * 3600)))
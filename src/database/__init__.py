@@ -1,2 +1,2 @@
 from .engine import engine, get_db, AsyncSessionLocal
-from .models import Base, Document, DocType, UploadStatus
+from .models import Base, Document, DocType, UploadStatus, JobStatus, LLMJobRecord
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum as SAEnum
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Index, Enum as SAEnum, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
@@ -17,6 +17,12 @@ class UploadStatus(str, enum.Enum):
     SUCCESS = "SUCCESS"
     FAILED = "FAILED"
 
+class JobStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
 class Document(Base):
     __tablename__ = "documents"
 
@@ -40,6 +46,12 @@ class Document(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     last_synced_at = Column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (
+        # Hybrid search 의 lexical 검색용 (full-text + trigram)
+        Index("ix_documents_title_tsv", text("to_tsvector('simple'::regconfig, title)"), postgresql_using="gin"),
+        Index("ix_documents_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
     def __repr__(self):
         return f"<Document id={self.id} title='{self.title}' status='{self.gdrive_upload_status}'>"
 
@@ -54,10 +66,24 @@ class DocumentChunk(Base):
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256(content) - 동일 청크 재임베딩 방지
     embedding = Column(Vector(768))  # Gemini Text Embedding 004 dimension
 
     document = relationship("Document", backref="chunks")
 
+    __table_args__ = (
+        # cosine distance 검색용 ANN 인덱스 (검색 시 hnsw.ef_search 로 recall/지연시간 조절)
+        Index(
+            "ix_document_chunks_embedding_hnsw", "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        # Hybrid search 의 lexical 검색용 (full-text + trigram)
+        Index("ix_document_chunks_content_tsv", text("to_tsvector('simple'::regconfig, content)"), postgresql_using="gin"),
+        Index("ix_document_chunks_content_trgm", "content", postgresql_using="gin", postgresql_ops={"content": "gin_trgm_ops"}),
+    )
+
     def __repr__(self):
         return f"<DocumentChunk id={self.id} doc_id={self.document_id} index={self.chunk_index}>"
 
@@ -83,3 +109,36 @@ class BatchJobState(Base):
 
     def __repr__(self):
         return f"<BatchJobState job='{self.job_name}' last_id={self.last_processed_id}>"
+
+class LLMJobRecord(Base):
+    """LLM 작업 큐를 영속화하는 테이블 (재시작/다중 워커 대응)"""
+    __tablename__ = "llm_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(32), nullable=False)  # 'summary', 'deep_dive', 'ask', 'weekly'
+    payload = Column(JSONB, default=dict, server_default='{}', nullable=False)
+    status = Column(SAEnum(JobStatus), default=JobStatus.PENDING, nullable=False)
+
+    # 스케줄링: lane 별 워커 풀 + 우선순위 (높을수록 먼저, 대기 시간에 따라 aging)
+    lane = Column(String(16), default="batch", server_default="batch", nullable=False)
+    priority = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # 작업을 요청한 디스코드 메시지 (재시작 후 다시 fetch 하기 위해 ID만 저장)
+    context_channel_id = Column(BigInteger, nullable=True)
+    context_message_id = Column(BigInteger, nullable=True)
+
+    # 중복 요청 병합: "<job_type>:<normalized_url>" 키와, 같은 작업에 합류한 다른 요청 메시지들
+    dedup_key = Column(Text, nullable=True, index=True)
+    subscribers = Column(JSONB, default=list, server_default='[]', nullable=False)  # [{"channel_id":..., "message_id":...}]
+
+    # Claim/Lease 정보
+    attempts = Column(Integer, default=0, nullable=False)
+    locked_by = Column(String(128), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<LLMJobRecord id={self.id} type='{self.job_type}' status='{self.status}'>"
@@ -15,7 +15,7 @@ from src.config import (
 )
 from src.services.drive_handler import DriveUploader
 from src.services.content_extractor import ContentExtractor
-from src.services.ai_handler import AIAgent
+from src.services.ai_handler import AsyncAIAgent
 from src.services.llm_queue import LLMQueue, LLMJob
 
 class KnowledgeBot(discord.Client):
@@ -25,7 +25,7 @@ class KnowledgeBot(discord.Client):
         intents.reactions = True
         super().__init__(intents=intents)
         self.extractor = ContentExtractor()
-        self.ai = AIAgent()
+        self.ai = AsyncAIAgent()
         self.uploader = DriveUploader()
         self.queue = LLMQueue(self)
         if not os.path.exists(SAVE_DIR): os.makedirs(SAVE_DIR)
@@ -36,6 +36,11 @@ class KnowledgeBot(discord.Client):
         self.queue.start()
         await self.send_ngrok_url(MANAGEMENT_CHANNEL_ID, initial=True)
 
+    async def close(self):
+        # 공유 HTTP 세션 / Chromium 프로세스 정리, 추출 경로 통계 저장
+        await ContentExtractor.close()
+        await super().close()
+
     async def get_ngrok_url(self):
         candidate_urls = ["http://ngrok_tunnel:4040/api/tunnels", "http://host.docker.internal:4040/api/tunnels"]
         logger.info("[Ngrok] URL 탐색 시작...")
@@ -77,22 +82,35 @@ class KnowledgeBot(discord.Client):
             target_url = url_match.group(0) if url_match else (message.embeds[0].url if message.embeds else None)
             if not target_url: return
 
-            await channel.send(f"🕵️‍♂️ **Deep Dive 시작...** (드라이브 업로드 포함 / 큐 대기 가능)")
+            # 같은 링크의 Deep Dive 가 이미 진행 중이면 합류
+            dedup_key = LLMQueue.dedup_key('deep_dive', target_url)
+            joined = False
             try:
+                # attach 가 False 를 반환하면 키가 선점된 상태 → 아래에서 add_job 또는 release 로 마무리
+                if await self.queue.attach(dedup_key, message):
+                    joined = True
+                    await channel.send("🕵️‍♂️ 같은 링크의 Deep Dive 가 이미 진행 중입니다. 완료되면 알려드릴게요.")
+                    return
+
+                await channel.send(f"🕵️‍♂️ **Deep Dive 시작...** (드라이브 업로드 포함 / 큐 대기 가능)")
                 data = await self.extractor.extract(target_url)
                 if "error" in data:
                     logger.warning(f"콘텐츠 추출 실패: {data['error']}")
                     await channel.send(f"⚠️ 추출 실패: {data['error']}")
+                    await self.queue.release(dedup_key, f"추출 실패: {data['error']}")
                     return
 
                 await self.queue.add_job(LLMJob(
                     type='deep_dive',
                     payload={'content': data['content'], 'url': target_url},
-                    context=message
+                    context=message,
+                    dedup_key=dedup_key
                 ))
             except Exception as e:
                 logger.error(f"Deep Dive 요청 처리 중 오류: {e}", exc_info=True)
                 await channel.send(f"❌ 오류: {e}")
+                if not joined:
+                    await self.queue.release(dedup_key, f"오류: {e}")
 
     async def on_message(self, message):
         if message.author == self.user: return
@@ -106,6 +124,8 @@ class KnowledgeBot(discord.Client):
                 await self._handle_ask_question(message)
             elif message.content.startswith("!log"):
                 await self._handle_log_request(message)
+            elif message.content.startswith("!keys"):
+                await self._handle_keys_request(message)
             return
 
         if message.channel.id == INPUT_CHANNEL_ID:
@@ -150,15 +170,17 @@ class KnowledgeBot(discord.Client):
         
         logger.info(f"질문 요청 수신: {query}")
         await message.add_reaction("🤔")
-        files = glob.glob(os.path.join(SAVE_DIR, "**/*.md"), recursive=True)
-        docs = []
-        for f in files:
-            try:
-                with open(f, 'r', encoding='utf-8') as rf:
-                    content = rf.read()
-                    if query in content or any(t in content for t in query.split()):
-                        docs.append(f"Source: {os.path.basename(f)}\nContent: {content[:1000]}...")
-            except: continue
+        # vault 전체를 읽는 대신 인덱스(vector + full-text) 검색으로 관련 청크만 가져옴
+        from src.config import ASK_RETRIEVAL_CHUNKS, ASK_CONTEXT_TOKENS
+        from src.database.engine import get_db_context
+        from src.services.search_service import SearchService, build_cited_context
+        try:
+            async with get_db_context() as db:
+                results = await SearchService(db).search_hybrid(query, limit=ASK_RETRIEVAL_CHUNKS)
+        except Exception as e:
+            logger.error(f"[_handle_ask_question] 검색 실패: {e}", exc_info=True)
+            results = []
+        docs, sources = build_cited_context(results, ASK_CONTEXT_TOKENS)
         
         if not docs:
             await message.channel.send("⚠️ 관련 자료가 없습니다.")
@@ -167,11 +189,28 @@ class KnowledgeBot(discord.Client):
 
         await self.queue.add_job(LLMJob(
             type='ask',
-            payload={'query': query, 'docs': docs},
+            payload={'query': query, 'docs': docs, 'sources': sources},
             context=message
         ))
         await message.remove_reaction("🤔", self.user)
 
+    async def _handle_keys_request(self, message):
+        """!keys: Gemini 키별 예산/cooldown 상태와 Local LLM 서킷 상태를 보여줍니다."""
+        from src.services.key_scheduler import get_llm_metrics
+        metrics = get_llm_metrics()
+        lines = []
+        for name, states in metrics["schedulers"].items():
+            lines.append(f"**[{name}]**")
+            for s in states:
+                status = f"⏸️ cooldown {s['cooldown_remaining']}s" if s['cooldown_remaining'] else "✅"
+                lines.append(
+                    f"- {s['key']} ({s['masked']}) {status} | RPM 잔여 {s['rpm_remaining']} | TPM 잔여 {s['tpm_remaining']} "
+                    f"| 오류율(5m) {s['error_rate_5m']:.0%} | 요청 {s['total_requests']} / 오류 {s['total_errors']}"
+                )
+        for name, b in metrics["circuit_breakers"].items():
+            lines.append(f"**[{name}]** 서킷: {b['state']} (연속 실패 {b['consecutive_failures']})")
+        await message.channel.send("\n".join(lines) if lines else "⚠️ 아직 LLM 호출 기록이 없습니다.")
+
     async def _handle_log_request(self, message):
         """!log [--lines] 명령을 처리합니다."""
         lines_to_read = 100
@@ -225,25 +264,34 @@ class KnowledgeBot(discord.Client):
         
         logger.info(f"링크 수신: {target_url}")
 
-        await message.add_reaction("👀")
+        # 같은 링크의 요약이 이미 진행 중이면 추출/LLM 호출 없이 합류
+        clean_url = self.extractor.normalize_url(target_url)
+        dedup_key = LLMQueue.dedup_key('summary', clean_url)
         try:
+            # attach 가 False 를 반환하면 키가 선점된 상태 → 아래에서 add_job 또는 release 로 마무리
+            if await self.queue.attach(dedup_key, message):
+                return
+
+            await message.add_reaction("👀")
             data = await self.extractor.extract(target_url)
             if "error" in data:
                 logger.warning(f"링크 추출 실패: {data['error']}")
                 await message.channel.send(f"⚠️ {data['error']}")
                 await message.remove_reaction("👀", self.user)
+                await self.queue.release(dedup_key, data['error'])
                 return
 
-            clean_url = self.extractor.normalize_url(target_url)
             await self.queue.add_job(LLMJob(
                 type='summary',
                 payload={'content': data['content'], 'url': clean_url, 'source_type': data['type']},
-                context=message
+                context=message,
+                dedup_key=dedup_key
             ))
         except Exception as e:
             logger.error(f"링크 처리 중 오류: {e}", exc_info=True)
             await message.channel.send(f"Error: {e}")
             await message.remove_reaction("👀", self.user)
+            await self.queue.release(dedup_key, str(e))
 
     async def _save_and_upload(self, data, url, source_type, message):
         date_str = datetime.datetime.now().strftime("%Y-%m-%d")
@@ -299,8 +347,10 @@ class KnowledgeBot(discord.Client):
             logger.error(f"DB Status Update failed: {e}")
         # ------------------------
 
-        await message.remove_reaction("👀", self.user)
-        await message.add_reaction("✅")
+        # 재시작 후 요청 메시지를 복원하지 못한 작업은 message 가 None
+        if message:
+            await message.remove_reaction("👀", self.user)
+            await message.add_reaction("✅")
         
         out_ch = self.get_channel(OUTPUT_CHANNEL_ID)
         if out_ch:
@@ -310,4 +360,5 @@ class KnowledgeBot(discord.Client):
             await out_ch.send(embed=embed)
 
         # 요청 채널에 남은 작업 수 알림
-        await message.channel.send(f"📉 남은 작업: {self.queue.qsize()}개")
+        if message:
+            await message.channel.send(f"📉 남은 작업: {self.queue.qsize()}개")
@@ -1,79 +1,141 @@
-import json
-from openai import OpenAI
-from src.config import LLM_HOST, GEMINI_API_KEYS, GEMINI_MODEL
+import time
+import asyncio
+from openai import OpenAI, AsyncOpenAI
+from src.config import (
+    LLM_HOST, GEMINI_API_KEYS, GEMINI_MODEL, EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE,
+    LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_DELAY, LLM_HEDGE_MAX_DELAY,
+    LLM_MAP_CHUNK_TOKENS, LLM_MAP_CHUNK_OVERLAP_TOKENS, LLM_MAP_CONCURRENCY, LLM_MAP_MAX_CALLS,
+    LLM_STRUCTURED_OUTPUT
+)
+from src.services.llm_cache import LLMCache, get_llm_cache
+from src.services.json_utils import extract_json, parse_partial_json
+from src.services.token_budget import get_token_budget, count_tokens, count_message_tokens, trim_to_tokens
+from src.services.key_scheduler import get_key_scheduler, get_circuit_breaker, get_latency_tracker
 from src.logger import get_logger
 
 logger = get_logger(__name__)
 
-class AIAgent:
+LOCAL_MODEL = "local-model"  # LM Studio 는 로드된 모델을 사용하므로 이름은 자리표시자
+
+# 프롬프트 템플릿을 바꾸면 해당 버전을 올려 기존 캐시를 무효화합니다.
+PROMPT_VERSIONS = {
+    "analyze": 1,
+    "deep_dive": 1,
+    "tags": 1,
+    "chat": 1,
+    "map": 1,
+    "deep_dive_structured": 1,
+}
+
+# 구조화된 Deep Dive 응답 (response_format json_schema 용)
+DEEP_DIVE_SCHEMA = {
+    "name": "deep_dive",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string"},
+            "report": {"type": "string"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["title", "report", "tags"],
+        "additionalProperties": False,
+    },
+}
+
+class _AIAgentBase:
+    """
+    AIAgent / AsyncAIAgent 공통 부분: 프롬프트 구성, 응답 파싱, 캐시 키 생성.
+    실제 LLM 호출(동기/비동기)은 하위 클래스가 담당합니다.
+    """
+    # 프롬프트별 (입력 토큰 상한, 예상 출력 토큰). 실제 입력 한도는 모델 창/TPM 에 맞춰 더 줄어들 수 있으며,
+    # 한도를 넘는 입력은 AsyncAIAgent 가 map-reduce 로 압축합니다.
+    PROMPT_BUDGETS = {
+        "analyze": (6000, 1024),
+        "deep_dive": (12000, 4096),  # Gemini Long Context 대폭 활용
+        "tags": (2500, 256),
+        "map": (4000, 1024),
+    }
+    # 일반 chat 호출의 예상 출력 토큰 / 시스템 프롬프트 크기 추정치
+    DEFAULT_OUTPUT_TOKENS = 2048
+    PROMPT_OVERHEAD_TOKENS = 600
+
     def __init__(self):
         self.gemini_keys = GEMINI_API_KEYS
         self.local_url = LLM_HOST
         # Gemini OpenAI 호환 엔드포인트
         self.gemini_base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
-        
+        self.cache = get_llm_cache()
+        # 키 상태/예산은 프로세스 전역으로 공유 (동기/비동기 에이전트 공통)
+        self.scheduler = get_key_scheduler("chat")
+        self.embedding_scheduler = get_key_scheduler("embedding")
+        self.local_breaker = get_circuit_breaker("local_llm")
+        # Gemini 응답 지연시간 (hedged request 지연 기준, 스트리밍은 첫 토큰까지의 시간 기준)
+        self.latency = get_latency_tracker("gemini")
+        self.first_token_latency = get_latency_tracker("gemini_first_token")
+        self.token_budget = get_token_budget()
+
         logger.info(f"[AI] 초기화: Gemini 키 {len(self.gemini_keys)}개 감지, Local Fallback: {self.local_url}")
 
-    def _get_client(self, is_local=False, api_key=None):
-        """상황에 맞는 OpenAI 클라이언트를 생성하여 반환"""
-        if is_local:
-            return OpenAI(base_url=self.local_url, api_key="lm-studio")
-        else:
-            return OpenAI(base_url=self.gemini_base_url, api_key=api_key)
+    def _cache_key(self, cache_namespace, messages, temperature):
+        if not (self.cache and cache_namespace):
+            return None
+        return LLMCache.make_key(
+            cache_namespace, PROMPT_VERSIONS.get(cache_namespace, 1), GEMINI_MODEL, temperature, messages
+        )
 
-    def _call_llm_with_failover(self, messages, temperature=0.1):
+    @staticmethod
+    def _should_cache(cache_key, content, model, validate=None):
         """
-        [Failover 전략]
-        1. Gemini Key 리스트를 순회하며 시도
-        2. 모든 Gemini Key 실패 시 -> Local LLM 시도
-        3. Local LLM 실패 시 -> None 반환
+        캐시 키는 Gemini 모델 기준이므로 Gemini 가 생성한 응답만 저장합니다.
+        (Local LLM fallback 응답을 저장하면 이후 같은 요청이 Gemini 답변 대신 fallback 결과를 받게 됨)
         """
-        
-        # 1. Gemini API 시도 (Key Rotation)
-        for idx, key in enumerate(self.gemini_keys):
-            try:
-                client = self._get_client(is_local=False, api_key=key)
-                logger.info(f"[AI] Gemini API 시도 (Key #{idx+1})")
-                
-                response = client.chat.completions.create(
-                    model=GEMINI_MODEL,
-                    messages=messages,
-                    temperature=temperature
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                logger.warning(f"[AI] Gemini (Key #{idx+1}) 실패: {e}")
-                continue # 다음 키 시도
+        if not (cache_key and content) or model != GEMINI_MODEL:
+            return False
+        return validate is None or validate(content)
 
-        # 2. Local LLM Fallback
-        logger.warning("[AI] ⚠️ 모든 Gemini API 실패. Local LLM으로 전환합니다.")
-        try:
-            client = self._get_client(is_local=True)
-            response = client.chat.completions.create(
-                model="local-model",
-                messages=messages,
-                temperature=temperature
-            )
-            logger.info("[AI] Local LLM 응답 성공")
-            return response.choices[0].message.content
-        except Exception as e:
-            logger.error(f"[AI] ❌ Local LLM마저 실패했습니다: {e}")
-            return None
+    def _input_budget(self, prompt, overhead_tokens=None):
+        """프롬프트 종류별 입력 텍스트 토큰 한도"""
+        cap, output_tokens = self.PROMPT_BUDGETS[prompt]
+        if overhead_tokens is None:
+            overhead_tokens = self.PROMPT_OVERHEAD_TOKENS
+        return self.token_budget.input_budget(GEMINI_MODEL, overhead_tokens, output_tokens, cap)
 
-    def analyze(self, text):
-        if not text or len(text) < 50: return None
-        
-        # Load valid topics from YAML source of truth
+    def _fit_input(self, text, prompt, system_prompt=""):
+        """system_prompt 와 예상 출력을 제외한 토큰 한도에 맞춰 입력을 경계 단위로 자릅니다."""
+        return trim_to_tokens(text, self._input_budget(prompt, count_tokens(system_prompt) + 16))
+
+    def _fit_messages(self, messages, is_local=False):
+        """호출 대상 모델의 컨텍스트 창(+ 예상 출력)을 넘는 메시지를 줄입니다."""
+        model = LOCAL_MODEL if is_local else GEMINI_MODEL
+        window = self.token_budget.window(model, apply_tpm=not is_local)
+        return self.token_budget.fit_messages(messages, max(0, window - self.DEFAULT_OUTPUT_TOKENS))
+
+    @staticmethod
+    def _usage_tokens(response):
+        usage = getattr(response, "usage", None)
+        return getattr(usage, "total_tokens", None) if usage else None
+
+    @staticmethod
+    def _load_topics(fallback):
+        """Load valid topics from YAML source of truth"""
         import yaml
-        topics_str = ""
         try:
             with open("src/data/tag_mapping.yaml", "r", encoding="utf-8") as f:
                 data = yaml.safe_load(f)
                 valid_topics = [item['topic'] for item in data.get('mappings', [])]
-                topics_str = ", ".join(valid_topics)
+                return ", ".join(valid_topics)
         except:
-             # Fallback if file read fails
-            topics_str = "Development, AI & ML, Design, Trends & News, Uncategorized"
+            # Fallback if file read fails
+            return fallback
+
+    @staticmethod
+    def _parse_json(content, open_char):
+        """코드 펜스/앞뒤 설명을 허용하여 첫 번째 완결된 JSON 값을 파싱 (실패 시 None)"""
+        return extract_json(content, open_char)
+
+    def _analyze_messages(self, text):
+        topics_str = self._load_topics("Development, AI & ML, Design, Trends & News, Uncategorized")
 
         system_prompt = f"""
 You are a technical content summarizer.
@@ -81,22 +143,18 @@ Analyze the provided text and output ONLY valid JSON.
 Choose 'category' STRICTLY from this list: [{topics_str}]
 Format: {{"title":"Korean Title","summary":"3 bullet points in Korean","category":"One of the topics above","tags":["tag1", "tag2"],"difficulty":"Easy/Med/Hard"}}
 """
-        messages = [            
-            {"role": "user", "content": f"{system_prompt}\n\n--- Input Text ---\n{text[:15000]}"}
+        return [
+            {"role": "user", "content": f"{system_prompt}\n\n--- Input Text ---\n{self._fit_input(text, 'analyze', system_prompt)}"}
         ]
 
-        content = self._call_llm_with_failover(messages, temperature=0.1)
-        
+    def _finish_analysis(self, content):
         if not content: return None
 
         try:
-            # JSON 파싱 보정
-            clean_json = content.replace("```json", "").replace("```", "").strip()
-            start, end = clean_json.find('{'), clean_json.rfind('}') + 1
-            if start != -1 and end != -1: clean_json = clean_json[start:end]
-            
-            result = json.loads(clean_json)
-            
+            result = self._parse_json(content, '{')
+            if result is None:
+                raise ValueError("JSON 객체를 찾을 수 없습니다.")
+
             # Tag Normalization
             from src.services.tag_manager import TagManager
             tag_manager = TagManager()
@@ -104,18 +162,16 @@ Format: {{"title":"Korean Title","summary":"3 bullet points in Korean","category
             if original_tags:
                 result['topics'] = tag_manager.normalize_tags(original_tags)
                 # Option: Overwrite tags or keep both. Keeping both for now as per plan flexibility.
-                # result['tags'] = result['topics'] 
-            
+                # result['tags'] = result['topics']
+
             return result
         except Exception as e:
             logger.error(f"[AI] JSON 파싱 실패: {e}")
             return None
 
-    def deep_dive(self, text):
-        if not text or len(text) < 50: return None
-        
+    def _deep_dive_messages(self, text):
         system_prompt = """
-You are a Senior Technical Researcher. 
+You are a Senior Technical Researcher.
 Conduct a comprehensive Deep Dive analysis of the provided text.
 Output MUST be in Korean Markdown format.
 Structure:
@@ -125,36 +181,80 @@ Structure:
 ## 3. ⚖️ 비판적 시각
 ## 4. 🚀 실무 적용 포인트
 """
-        messages = [
+        return [
             {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"Analyze:\n{text[:30000]}"} # Gemini Long Context 대폭 활용
+            {"role": "user", "content": f"Analyze:\n{self._fit_input(text, 'deep_dive', system_prompt)}"}
         ]
 
-        return self._call_llm_with_failover(messages, temperature=0.3)
+    @staticmethod
+    def _structured_output_supported():
+        """response_format(json_schema) 사용 여부. auto: Gemini 모델만 (Gemma 등은 JSON 모드 미지원)"""
+        if LLM_STRUCTURED_OUTPUT == "auto":
+            return GEMINI_MODEL.startswith("gemini")
+        return LLM_STRUCTURED_OUTPUT == "true"
 
-    def chat(self, messages, temperature=0.1):
-        """Standard chat interface with failover support"""
-        return self._call_llm_with_failover(messages, temperature)
+    def _deep_dive_structured_messages(self, text):
+        """Deep Dive 리포트 + 제목 + 태그를 한 번의 호출로 받기 위한 프롬프트"""
+        topics_hint = self._load_topics("Development, AI & ML, Design, Trends & News")
+        system_prompt = f"""
+You are a Senior Technical Researcher.
+Conduct a comprehensive Deep Dive analysis of the provided text.
+Respond with ONLY a JSON object (no code fences) with these keys, in this order:
+- "title": a concise Korean title
+- "report": the full analysis in Korean Markdown, structured as:
+  # [Title]
+  ## 1. 🔍 핵심 논거 및 인사이트
+  ## 2. ⚙️ 기술적 심층 분석
+  ## 3. ⚖️ 비판적 시각
+  ## 4. 🚀 실무 적용 포인트
+- "tags": 5-10 relevant tags/keywords (prefer these topics: [{topics_hint}])
+"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Analyze:\n{self._fit_input(text, 'deep_dive', system_prompt)}"}
+        ]
 
-    def generate_tags(self, text):
-        """
-        Generates relevant tags from the provided text.
-        Returns a list of normalized tag strings.
-        """
-        if not text or len(text) < 50: 
-            return []
-        
+    def _parse_deep_dive(self, content):
+        """구조화 응답 파싱. JSON 이 아니면 응답 전체를 리포트로 간주합니다 (태그 없음)."""
+        if not content:
+            return None
+        parsed = self._parse_json(content, '{')
+        if isinstance(parsed, dict) and parsed.get("report"):
+            raw_tags = parsed.get("tags") if isinstance(parsed.get("tags"), list) else []
+            return {
+                "title": str(parsed.get("title") or "").strip() or None,
+                "report": parsed["report"],
+                "tags": self._normalize_tags(raw_tags) if raw_tags else [],
+            }
+        logger.warning("[AI] 구조화된 Deep Dive 응답 파싱 실패 - 응답 전체를 리포트로 사용합니다.")
+        return {"title": None, "report": content, "tags": []}
+
+    def _is_deep_dive_json(self, content):
+        parsed = self._parse_json(content, '{')
+        return isinstance(parsed, dict) and bool(parsed.get("report"))
+
+    def _map_messages(self, chunk, index, total, detailed):
+        """map 단계: 긴 문서의 한 부분을 요약 (reduce 단계의 입력이 됨)"""
+        detail = (
+            "Keep every technical detail, argument, number, name and code identifier. Use up to 15 bullet points."
+            if detailed else
+            "Keep the key facts, numbers and names. Use up to 6 bullet points."
+        )
+        system_prompt = f"""
+You are summarizing part {index + 1} of {total} of a long document (article or video transcript).
+Write concise bullet-point notes in Korean covering ONLY this part.
+{detail}
+Do not add an introduction or conclusion.
+"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": self._fit_input(chunk, "map", system_prompt)}
+        ]
+
+    def _tags_messages(self, text):
         # Load valid topics for guidance
-        import yaml
-        topics_hint = ""
-        try:
-            with open("src/data/tag_mapping.yaml", "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                valid_topics = [item['topic'] for item in data.get('mappings', [])]
-                topics_hint = ", ".join(valid_topics)
-        except:
-            topics_hint = "Development, AI & ML, Design, Trends & News"
-        
+        topics_hint = self._load_topics("Development, AI & ML, Design, Trends & News")
+
         system_prompt = f"""
 You are a technical content analyzer.
 Extract 5-10 relevant tags/keywords from the provided text.
@@ -162,66 +262,602 @@ Prefer tags related to these topics: [{topics_hint}]
 Output MUST be ONLY a valid JSON array of strings.
 Example: ["python", "asyncio", "discord", "bot"]
 """
-        messages = [
-            {"role": "user", "content": f"{system_prompt}\n\n--- Text ---\n{text[:8000]}"}
+        return [
+            {"role": "user", "content": f"{system_prompt}\n\n--- Text ---\n{self._fit_input(text, 'tags', system_prompt)}"}
         ]
-        
-        content = self._call_llm_with_failover(messages, temperature=0.1)
-        
+
+    def _is_tag_list(self, content):
+        return isinstance(self._parse_json(content, '['), list)
+
+    def _finish_tags(self, content):
         if not content:
             logger.warning("[AI] Tag generation failed - LLM returned empty")
             return []
-        
+
         try:
-            # Parse JSON
-            clean_json = content.replace("```json", "").replace("```", "").strip()
-            start = clean_json.find('[')
-            end = clean_json.rfind(']') + 1
-            if start != -1 and end != 0:
-                clean_json = clean_json[start:end]
-            
-            raw_tags = json.loads(clean_json)
-            
+            raw_tags = self._parse_json(content, '[')
+            if raw_tags is None:
+                logger.error(f"[AI] Tag JSON parsing failed, content: {content[:200]}")
+                return []
+
             if not isinstance(raw_tags, list):
                 logger.warning(f"[AI] Tag generation returned non-list: {type(raw_tags)}")
                 return []
-            
-            # Normalize tags using TagManager
-            from src.services.tag_manager import TagManager
-            tag_manager = TagManager()
-            normalized_tags = tag_manager.normalize_tags([str(t) for t in raw_tags])
-            
-            # Force all tags to lowercase to prevent case sensitivity issues
-            lowercase_tags = [tag.lower() for tag in normalized_tags]
-            
+
+            lowercase_tags = self._normalize_tags(raw_tags)
             logger.info(f"[AI] Generated {len(lowercase_tags)} tags: {lowercase_tags}")
             return lowercase_tags
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"[AI] Tag JSON parsing failed: {e}, content: {content[:200]}")
-            return []
+
         except Exception as e:
             logger.error(f"[AI] Tag generation error: {e}")
             return []
 
+    @staticmethod
+    def _normalize_tags(raw_tags):
+        # Normalize tags using TagManager
+        from src.services.tag_manager import TagManager
+        tag_manager = TagManager()
+        normalized_tags = tag_manager.normalize_tags([str(t) for t in raw_tags])
+
+        # Force all tags to lowercase to prevent case sensitivity issues
+        return [tag.lower() for tag in normalized_tags]
+
+    @staticmethod
+    def _embedding_batches(texts):
+        """빈 텍스트를 제외한 (원래 인덱스 목록, 텍스트 목록) 배치를 EMBEDDING_BATCH_SIZE 단위로 생성"""
+        targets = [i for i, t in enumerate(texts) if t]
+        for start in range(0, len(targets), EMBEDDING_BATCH_SIZE):
+            batch_idx = targets[start:start + EMBEDDING_BATCH_SIZE]
+            yield batch_idx, [texts[i] for i in batch_idx]
+
+
+class AIAgent(_AIAgentBase):
+    """
+    동기 LLM 클라이언트 (스크립트/배치 작업용).
+    이벤트 루프 안에서는 AsyncAIAgent 를 사용하세요.
+    """
+    # (base_url, api_key) -> OpenAI. 연결 풀을 재사용하기 위해 프로세스 전역으로 공유
+    _clients = {}
+
+    def _get_client(self, is_local=False, api_key=None):
+        """상황에 맞는 OpenAI 클라이언트를 반환 (엔드포인트/키별로 재사용)"""
+        base_url, key = (self.local_url, "lm-studio") if is_local else (self.gemini_base_url, api_key)
+        client = AIAgent._clients.get((base_url, key))
+        if client is None:
+            # 재시도는 KeyScheduler 가 다른 키로 수행하므로 SDK 자체 재시도는 끔
+            client = OpenAI(base_url=base_url, api_key=key, max_retries=2 if is_local else 0)
+            AIAgent._clients[(base_url, key)] = client
+        return client
+
+    def _call_llm_with_failover(self, messages, temperature=0.1, cache_namespace=None, validate=None):
+        """
+        [Failover 전략]
+        1. Gemini Key 리스트를 순회하며 시도
+        2. 모든 Gemini Key 실패 시 -> Local LLM 시도
+        3. Local LLM 실패 시 -> None 반환
+
+        cache_namespace 가 주어지면 응답 캐시를 먼저 확인하고, 성공한 응답을 저장합니다.
+        validate(content) 가 False 를 반환하는 응답(파싱 실패 등)과 Local LLM fallback 응답은 캐시하지 않습니다.
+        """
+        messages = self._fit_messages(messages)
+        cache_key = self._cache_key(cache_namespace, messages, temperature)
+        if cache_key:
+            cached = self.cache.get(cache_key, cache_namespace)
+            if cached is not None:
+                logger.info(f"[AI] 캐시 적중 ({cache_namespace})")
+                return cached
+
+        content, model = self._request_llm(messages, temperature)
+        if self._should_cache(cache_key, content, model, validate):
+            self.cache.set(cache_key, content, cache_namespace, model)
+        return content
+
+    def _request_llm(self, messages, temperature):
+        """Returns: (content, 응답한 모델) — 모두 실패하면 (None, None)"""
+        estimated = count_message_tokens(messages)
+
+        # 1. Gemini API 시도 (건강한 키 우선, round-robin)
+        for state in self.scheduler.candidates(estimated):
+            try:
+                client = self._get_client(is_local=False, api_key=state.key)
+                logger.info(f"[AI] Gemini API 시도 ({state.label})")
+                self.scheduler.reserve(state, estimated)
+
+                started = time.monotonic()
+                response = client.chat.completions.create(
+                    model=GEMINI_MODEL,
+                    messages=messages,
+                    temperature=temperature
+                )
+                self.latency.record(time.monotonic() - started)
+                self.scheduler.record_success(state, estimated, self._usage_tokens(response))
+                return response.choices[0].message.content, GEMINI_MODEL
+            except Exception as e:
+                self.scheduler.record_failure(state, e)
+                logger.warning(f"[AI] Gemini ({state.label}) 실패: {e}")
+                continue # 다음 키 시도
+
+        # 2. Local LLM Fallback
+        logger.warning("[AI] ⚠️ 사용 가능한 Gemini 키 없음/모두 실패. Local LLM으로 전환합니다.")
+        if not self.local_breaker.allow():
+            logger.error("[AI] ❌ Local LLM 서킷 브레이커 OPEN - 호출을 생략합니다.")
+            return None, None
+        try:
+            client = self._get_client(is_local=True)
+            response = client.chat.completions.create(
+                model=LOCAL_MODEL,
+                messages=self._fit_messages(messages, is_local=True),
+                temperature=temperature
+            )
+            self.local_breaker.record_success()
+            logger.info("[AI] Local LLM 응답 성공")
+            return response.choices[0].message.content, LOCAL_MODEL
+        except Exception as e:
+            self.local_breaker.record_failure()
+            logger.error(f"[AI] ❌ Local LLM마저 실패했습니다: {e}")
+            return None, None
+
+    def analyze(self, text):
+        if not text or len(text) < 50: return None
+        content = self._call_llm_with_failover(
+            self._analyze_messages(text), temperature=0.1,
+            cache_namespace="analyze",
+            validate=lambda c: self._parse_json(c, '{') is not None
+        )
+        return self._finish_analysis(content)
+
+    def deep_dive(self, text):
+        if not text or len(text) < 50: return None
+        return self._call_llm_with_failover(self._deep_dive_messages(text), temperature=0.3, cache_namespace="deep_dive")
+
+    def chat(self, messages, temperature=0.1, use_cache=False):
+        """Standard chat interface with failover support (use_cache: 같은 입력이 반복되는 분류 작업 등에서만 사용)"""
+        return self._call_llm_with_failover(messages, temperature, cache_namespace="chat" if use_cache else None)
+
+    def generate_tags(self, text):
+        """
+        Generates relevant tags from the provided text.
+        Returns a list of normalized tag strings.
+        """
+        if not text or len(text) < 50:
+            return []
+        content = self._call_llm_with_failover(
+            self._tags_messages(text), temperature=0.1,
+            cache_namespace="tags",
+            validate=self._is_tag_list
+        )
+        return self._finish_tags(content)
+
     def generate_embedding(self, text):
         """Generates embedding for given text using Gemini Text Embedding 004"""
         if not text: return None
-        
-        # Key Rotation for Embeddings
-        for idx, key in enumerate(self.gemini_keys):
+        return self.generate_embeddings([text])[0]
+
+    def generate_embeddings(self, texts):
+        """
+        여러 텍스트의 임베딩을 배치 요청으로 생성합니다 (요청당 최대 EMBEDDING_BATCH_SIZE 개).
+        입력 순서대로 임베딩 리스트를 반환하며, 실패한 항목은 None 입니다.
+        """
+        results = [None] * len(texts)
+        for batch_idx, batch in self._embedding_batches(texts):
+            embeddings = self._embed_batch(batch)
+            if embeddings is None:
+                continue
+            for i, embedding in zip(batch_idx, embeddings):
+                results[i] = embedding
+        return results
+
+    def _embed_batch(self, batch):
+        # Key Rotation for Embeddings (건강한 키 우선)
+        for state in self.embedding_scheduler.candidates():
             try:
-                client = self._get_client(is_local=False, api_key=key)
-                # Note: openai-python wrapper for Gemini supports embeddings.create
-                # Model name: text-embedding-004
+                client = self._get_client(is_local=False, api_key=state.key)
+                self.embedding_scheduler.reserve(state)
+                # Note: openai-python wrapper for Gemini supports embeddings.create (list input = batch)
                 response = client.embeddings.create(
-                    input=text,
-                    model="text-embedding-004"
+                    input=batch,
+                    model=EMBEDDING_MODEL
                 )
-                return response.data[0].embedding
+                self.embedding_scheduler.record_success(state)
+                # 응답 순서가 보장되지 않을 수 있으므로 index 기준 정렬
+                data = sorted(response.data, key=lambda d: d.index)
+                return [d.embedding for d in data]
             except Exception as e:
-                logger.warning(f"[AI] Embedding (Key #{idx+1}) 실패: {e}")
-                continue 
-        
-        logger.error("[AI] ❌ 모든 Embedding 생성 실패")
+                self.embedding_scheduler.record_failure(state, e)
+                logger.warning(f"[AI] Embedding ({state.label}, batch={len(batch)}) 실패: {e}")
+                continue
+
+        logger.error(f"[AI] ❌ 모든 Embedding 생성 실패 (batch={len(batch)})")
+        return None
+
+
+class AsyncAIAgent(_AIAgentBase):
+    """
+    비동기 LLM 클라이언트 (봇 / API 서버용).
+    엔드포인트/키별 AsyncOpenAI 클라이언트를 프로세스 전역으로 재사용하여
+    keep-alive 연결 풀을 공유하고, 스레드 풀 없이 이벤트 루프에서 직접 await 합니다.
+    """
+    # (base_url, api_key) -> AsyncOpenAI
+    _clients = {}
+
+    def _get_client(self, is_local=False, api_key=None):
+        base_url, key = (self.local_url, "lm-studio") if is_local else (self.gemini_base_url, api_key)
+        client = AsyncAIAgent._clients.get((base_url, key))
+        if client is None:
+            client = AsyncOpenAI(base_url=base_url, api_key=key, max_retries=2 if is_local else 0)
+            AsyncAIAgent._clients[(base_url, key)] = client
+        return client
+
+    async def _call_llm_with_failover(self, messages, temperature=0.1, cache_namespace=None, validate=None, hedge=False, response_format=None, on_update=None):
+        """
+        AIAgent._call_llm_with_failover 의 비동기 버전 (동일한 캐시/Failover 전략).
+        hedge=True 이면 Gemini 가 지연될 때 Local LLM 에도 요청하여 먼저 도착한 응답을 사용합니다.
+        response_format 은 Gemini 요청에만 적용됩니다 (Local LLM 응답은 관대한 파서로 처리).
+        on_update(partial_text) 를 넘기면 스트리밍으로 받아 누적 응답을 전달합니다
+        (이때 hedge 는 완료가 아닌 첫 토큰까지의 시간을 기준으로 경쟁).
+        """
+        messages = self._fit_messages(messages)
+        cache_key = self._cache_key(cache_namespace, messages, temperature)
+        if cache_key:
+            cached = await asyncio.to_thread(self.cache.get, cache_key, cache_namespace)
+            if cached is not None:
+                logger.info(f"[AI] 캐시 적중 ({cache_namespace})")
+                if on_update:
+                    await on_update(cached)
+                return cached
+
+        if hedge:
+            content, model = await self._request_llm_hedged(messages, temperature, response_format, on_update)
+        else:
+            content, model = await self._request_llm(messages, temperature, response_format, on_update)
+        if self._should_cache(cache_key, content, model, validate):
+            await asyncio.to_thread(self.cache.set, cache_key, content, cache_namespace, model)
+        return content
+
+    async def _request_llm(self, messages, temperature, response_format=None, on_update=None):
+        """Returns: (content, 응답한 모델) — 모두 실패하면 (None, None)"""
+        content = await self._request_gemini(messages, temperature, response_format, on_update)
+        if content is not None:
+            return content, GEMINI_MODEL
+        logger.warning("[AI] ⚠️ 사용 가능한 Gemini 키 없음/모두 실패. Local LLM으로 전환합니다.")
+        return await self._local_answer(messages, temperature, on_update=on_update)
+
+    async def _local_answer(self, messages, temperature, on_update=None):
+        content = await self._request_local(messages, temperature, on_update=on_update)
+        return content, (LOCAL_MODEL if content is not None else None)
+
+    async def _request_llm_hedged(self, messages, temperature, response_format=None, on_update=None):
+        """
+        Hedged request: Gemini 요청 후 최근 지연시간 P(LLM_HEDGE_PERCENTILE) 안에 응답이 없으면
+        Local LLM 에 두 번째 요청을 보내고, 먼저 성공한 응답을 사용합니다 (나머지는 취소).
+        on_update 가 있으면 (스트리밍) 완료 대신 첫 토큰까지의 시간으로 경쟁합니다:
+        먼저 토큰을 보낸 쪽만 on_update 로 전달되고, 다른 쪽은 그 시점에 취소됩니다.
+        Returns: (content, 응답한 모델) — 모두 실패하면 (None, None)
+        """
+        tracker = self.first_token_latency if on_update else self.latency
+        delay = tracker.hedge_delay(LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_DELAY, LLM_HEDGE_MAX_DELAY)
+        started = time.monotonic()
+        tasks = {}
+        first_token = asyncio.Event()
+        owner = None
+
+        def relay(name):
+            if not on_update:
+                return None
+
+            async def callback(text):
+                nonlocal owner
+                if owner is None:
+                    owner = name
+                    first_token.set()
+                    for other, task in tasks.items():
+                        if other != name:
+                            task.cancel()
+                if owner == name:
+                    await on_update(text)
+            return callback
+
+        primary = tasks["Gemini"] = asyncio.create_task(
+            self._request_gemini(messages, temperature, response_format, relay("Gemini"))
+        )
+        streaming = asyncio.create_task(first_token.wait())
+        try:
+            done, _ = await asyncio.wait({primary, streaming}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            streaming.cancel()
+        if done:
+            # 지연 안에 완료되었거나 (스트리밍이면) 첫 토큰이 도착함
+            content = await primary
+            if content is not None:
+                return content, GEMINI_MODEL
+            logger.warning("[AI] ⚠️ 사용 가능한 Gemini 키 없음/모두 실패. Local LLM으로 전환합니다.")
+            return await self._local_answer(messages, temperature, on_update=on_update)
+
+        if not self.local_breaker.allow():
+            logger.info("[AI] Hedge 생략 (Local LLM 서킷 브레이커 OPEN) - Gemini 응답 대기")
+            content = await primary
+            return content, (GEMINI_MODEL if content is not None else None)
+
+        logger.info(f"[AI] Gemini 응답 지연 ({delay:.1f}s 초과) - Local LLM hedge 요청")
+        # allow() 는 위에서 이미 확인했으므로 중복 확인 없이 호출
+        secondary = tasks["Local LLM"] = asyncio.create_task(
+            self._request_local(messages, temperature, check_breaker=False, on_update=relay("Local LLM"))
+        )
+        pending = {primary, secondary}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue  # 다른 쪽이 먼저 첫 토큰을 보냄
+                    content = task.result()
+                    if content is not None:
+                        winner = "Gemini" if task is primary else "Local LLM"
+                        logger.info(f"[AI] Hedge 결과: {winner} 응답 채택")
+                        return content, (GEMINI_MODEL if task is primary else LOCAL_MODEL)
+            if secondary.cancelled():
+                # Gemini 가 먼저 스트리밍을 시작했지만 끝내 실패 → 취소했던 Local LLM 으로 다시 요청
+                logger.warning("[AI] ⚠️ 스트리밍 중 Gemini 실패. Local LLM으로 전환합니다.")
+                return await self._local_answer(messages, temperature, on_update=on_update)
+            if primary.cancelled():
+                # Local LLM 이 먼저 스트리밍을 시작했지만 끝내 실패 → 취소했던 Gemini 로 다시 요청
+                logger.warning("[AI] ⚠️ 스트리밍 중 Local LLM 실패. Gemini로 다시 요청합니다.")
+                content = await self._request_gemini(messages, temperature, response_format, on_update)
+                return content, (GEMINI_MODEL if content is not None else None)
+            return None, None
+        finally:
+            if primary in pending or primary.cancelled():
+                # 취소되는 느린 Gemini 요청도 지연시간 분포에 포함 (빠진 채로 두면 hedge 기준이 점점 낮아짐)
+                tracker.record(max(time.monotonic() - started, delay))
+            for task in pending:
+                task.cancel()
+
+    def _first_token_timer(self, on_update, started):
+        """스트리밍 첫 토큰까지의 시간을 기록하고 on_update 로 그대로 전달 (스트리밍 hedge 지연 기준)"""
+        recorded = False
+
+        async def callback(text):
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                self.first_token_latency.record(time.monotonic() - started)
+            await on_update(text)
+        return callback
+
+    @staticmethod
+    async def _complete(client, on_update=None, **params):
+        """
+        chat completion 을 요청합니다. on_update 가 있으면 stream=True 로 받아
+        delta 가 도착할 때마다 누적 텍스트를 전달하고, 완성된 텍스트를 반환합니다.
+        Returns: (content, response) — 스트리밍일 때 response 는 None
+        """
+        if not on_update:
+            response = await client.chat.completions.create(**params)
+            return response.choices[0].message.content, response
+
+        stream = await client.chat.completions.create(stream=True, **params)
+        content = ""
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                content += delta
+                await on_update(content)
+        return content, None
+
+    async def _request_gemini(self, messages, temperature, response_format=None, on_update=None):
+        """건강한 키 우선(round-robin)으로 Gemini 를 시도합니다. 모두 실패하면 None."""
+        estimated = count_message_tokens(messages)
+        extra = {"response_format": response_format} if response_format else {}
+        for state in self.scheduler.candidates(estimated):
+            try:
+                client = self._get_client(is_local=False, api_key=state.key)
+                logger.info(f"[AI] Gemini API 시도 ({state.label})")
+                self.scheduler.reserve(state, estimated)
+
+                started = time.monotonic()
+                content, response = await self._complete(
+                    client, self._first_token_timer(on_update, started) if on_update else None,
+                    model=GEMINI_MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    **extra
+                )
+                self.latency.record(time.monotonic() - started)
+                self.scheduler.record_success(state, estimated, self._usage_tokens(response))
+                return content
+            except Exception as e:
+                self.scheduler.record_failure(state, e)
+                logger.warning(f"[AI] Gemini ({state.label}) 실패: {e}")
+                continue # 다음 키 시도
+        return None
+
+    async def _request_local(self, messages, temperature, check_breaker=True, on_update=None):
+        """
+        Local LLM Fallback (서킷 브레이커 보호).
+        취소(CancelledError)는 실패로 집계하지 않지만, HALF_OPEN probe 였다면 OPEN 으로 되돌립니다.
+        """
+        if check_breaker and not self.local_breaker.allow():
+            logger.error("[AI] ❌ Local LLM 서킷 브레이커 OPEN - 호출을 생략합니다.")
+            return None
+        try:
+            client = self._get_client(is_local=True)
+            content, _ = await self._complete(
+                client, on_update,
+                model=LOCAL_MODEL,
+                messages=self._fit_messages(messages, is_local=True),
+                temperature=temperature
+            )
+            self.local_breaker.record_success()
+            logger.info("[AI] Local LLM 응답 성공")
+            return content
+        except asyncio.CancelledError:
+            self.local_breaker.record_cancelled()
+            raise
+        except Exception as e:
+            self.local_breaker.record_failure()
+            logger.error(f"[AI] ❌ Local LLM마저 실패했습니다: {e}")
+            return None
+
+    async def _map_reduce_input(self, text, prompt, detailed=False, hedge=False):
+        """
+        프롬프트의 입력 토큰 한도를 넘는 긴 텍스트는 청크로 나눠 부분 요약(map)을 병렬 생성하고,
+        이를 이어 붙인 노트를 최종 분석(reduce) 프롬프트의 입력으로 반환합니다.
+        노트도 한도를 넘으면 한도 안에 들어올 때까지 노트를 다시 요약합니다.
+        map 호출은 문서당 LLM_MAP_MAX_CALLS 회로 제한되며, 동시 호출 수는
+        LLM_MAP_CONCURRENCY 와 현재 사용 가능한 키 수로 제한됩니다.
+        """
+        budget = self._input_budget(prompt)
+        calls_left = LLM_MAP_MAX_CALLS
+        level = 0
+        while count_tokens(text) > budget and calls_left > 0:
+            level += 1
+            notes, calls = await self._map_notes(text, detailed, hedge, calls_left, level)
+            if notes is None or count_tokens(notes) >= count_tokens(text):
+                break  # 전체 실패 또는 더 줄어들지 않음 → 마지막 입력을 reduce 프롬프트 한도에 맞춰 사용
+            text = notes
+            calls_left -= calls
+        return text
+
+    async def _map_notes(self, text, detailed, hedge, max_calls, level):
+        """
+        map 한 단계. Returns: (이어 붙인 노트, map 호출 수) — 모든 청크가 실패하면 (None, 호출 수)
+        실패한 청크는 원문 대신 짧은 자리표시로 남깁니다 (노트가 다시 한도를 넘지 않도록).
+        """
+        from src.services.vector_service import VectorService
+        chunk_tokens = min(LLM_MAP_CHUNK_TOKENS, self._input_budget("map"))
+        chunks = VectorService.split_text(text, chunk_tokens, LLM_MAP_CHUNK_OVERLAP_TOKENS, length_function=count_tokens)
+        if len(chunks) > max_calls:
+            logger.warning(f"[AI] Map 호출 상한 도달 - {len(chunks)}개 중 앞 {max_calls}개 청크만 요약합니다.")
+            chunks = chunks[:max_calls]
+        available_keys = len(self.scheduler.candidates(chunk_tokens))
+        concurrency = max(1, min(LLM_MAP_CONCURRENCY, available_keys))
+        semaphore = asyncio.Semaphore(concurrency)
+        logger.info(f"[AI] Map-reduce (단계 {level}): {len(text)}자 → {len(chunks)}개 청크 요약 (동시 {concurrency})")
+
+        async def summarize(index, chunk):
+            async with semaphore:
+                return await self._call_llm_with_failover(
+                    self._map_messages(chunk, index, len(chunks), detailed), temperature=0.1,
+                    cache_namespace="map", hedge=hedge
+                )
+
+        notes = await asyncio.gather(*(summarize(i, c) for i, c in enumerate(chunks)))
+        if not any(notes):
+            logger.warning(f"[AI] Map 단계 {level} 전체 실패 - 이전 입력을 사용합니다.")
+            return None, len(chunks)
+        failed = sum(1 for note in notes if not note)
+        if failed:
+            logger.warning(f"[AI] Map 단계 {level}: {failed}/{len(chunks)}개 청크 요약 실패 (생략 표시)")
+        return "\n\n".join(
+            f"[Part {i + 1}/{len(chunks)}]\n{note or '(이 부분은 요약하지 못했습니다)'}"
+            for i, note in enumerate(notes)
+        ), len(chunks)
+
+    async def analyze(self, text, hedge=False):
+        if not text or len(text) < 50: return None
+        text = await self._map_reduce_input(text, "analyze", hedge=hedge)
+        content = await self._call_llm_with_failover(
+            self._analyze_messages(text), temperature=0.1,
+            cache_namespace="analyze",
+            validate=lambda c: self._parse_json(c, '{') is not None,
+            hedge=hedge
+        )
+        return self._finish_analysis(content)
+
+    async def deep_dive(self, text, hedge=False, on_update=None):
+        if not text or len(text) < 50: return None
+        text = await self._map_reduce_input(text, "deep_dive", detailed=True, hedge=hedge)
+        return await self._call_llm_with_failover(
+            self._deep_dive_messages(text), temperature=0.3, cache_namespace="deep_dive", hedge=hedge,
+            on_update=on_update
+        )
+
+    async def deep_dive_structured(self, text, hedge=False, on_update=None):
+        """
+        Deep Dive 리포트, 제목, 태그를 한 번의 LLM 호출로 생성합니다.
+        on_update(partial_report) 를 넘기면 스트리밍 중인 JSON 에서 리포트 부분만 꺼내 전달합니다.
+        Returns: {"title": str|None, "report": str, "tags": [str]} (실패 시 None)
+        """
+        if not text or len(text) < 50: return None
+        text = await self._map_reduce_input(text, "deep_dive", detailed=True, hedge=hedge)
+        response_format = {"type": "json_schema", "json_schema": DEEP_DIVE_SCHEMA} if self._structured_output_supported() else None
+        content = await self._call_llm_with_failover(
+            self._deep_dive_structured_messages(text), temperature=0.3,
+            cache_namespace="deep_dive_structured",
+            validate=self._is_deep_dive_json,
+            hedge=hedge,
+            response_format=response_format,
+            on_update=self._partial_report_callback(on_update) if on_update else None
+        )
+        return self._parse_deep_dive(content)
+
+    @staticmethod
+    def _partial_report_callback(on_update):
+        """스트리밍 중인 구조화 응답(JSON 조각)에서 report 필드만 꺼내 on_update 로 전달"""
+        async def callback(partial):
+            if "{" not in partial:
+                # 모델이 JSON 대신 마크다운을 바로 쓰는 경우 (코드 펜스만 온 상태는 건너뜀)
+                if not partial.lstrip().startswith("`"):
+                    await on_update(partial)
+                return
+            parsed = parse_partial_json(partial)
+            if isinstance(parsed, dict) and parsed.get("report"):
+                await on_update(parsed["report"])
+        return callback
+
+    async def chat(self, messages, temperature=0.1, use_cache=False, hedge=False, on_update=None):
+        """
+        Standard chat interface with failover support
+        (hedge=True: 지연 시 Local LLM 과 경쟁, on_update: 스트리밍 중 누적 응답 콜백)
+        """
+        return await self._call_llm_with_failover(
+            messages, temperature, cache_namespace="chat" if use_cache else None, hedge=hedge,
+            on_update=on_update
+        )
+
+    async def generate_tags(self, text):
+        if not text or len(text) < 50:
+            return []
+        content = await self._call_llm_with_failover(
+            self._tags_messages(text), temperature=0.1,
+            cache_namespace="tags",
+            validate=self._is_tag_list
+        )
+        return self._finish_tags(content)
+
+    async def generate_embedding(self, text):
+        if not text: return None
+        return (await self.generate_embeddings([text]))[0]
+
+    async def generate_embeddings(self, texts):
+        """배치들을 동시에 요청하여 입력 순서대로 임베딩 리스트를 반환 (실패 항목은 None)"""
+        results = [None] * len(texts)
+        batches = list(self._embedding_batches(texts))
+        responses = await asyncio.gather(*(self._embed_batch(batch) for _, batch in batches))
+        for (batch_idx, _), embeddings in zip(batches, responses):
+            if embeddings is None:
+                continue
+            for i, embedding in zip(batch_idx, embeddings):
+                results[i] = embedding
+        return results
+
+    async def _embed_batch(self, batch):
+        # Key Rotation for Embeddings (건강한 키 우선)
+        for state in self.embedding_scheduler.candidates():
+            try:
+                client = self._get_client(is_local=False, api_key=state.key)
+                self.embedding_scheduler.reserve(state)
+                response = await client.embeddings.create(
+                    input=batch,
+                    model=EMBEDDING_MODEL
+                )
+                self.embedding_scheduler.record_success(state)
+                data = sorted(response.data, key=lambda d: d.index)
+                return [d.embedding for d in data]
+            except Exception as e:
+                self.embedding_scheduler.record_failure(state, e)
+                logger.warning(f"[AI] Embedding ({state.label}, batch={len(batch)}) 실패: {e}")
+                continue
+
+        logger.error(f"[AI] ❌ 모든 Embedding 생성 실패 (batch={len(batch)})")
         return None
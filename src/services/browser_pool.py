@@ -0,0 +1,279 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+STEALTH_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+# 광고/분석 스크립트 호스트 (본문 추출과 무관)
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "googleadservices.com",
+    "doubleclick.net", "adservice.google.com", "facebook.net", "connect.facebook.net",
+    "scorecardresearch.com", "hotjar.com", "segment.io", "amplitude.com", "mixpanel.com",
+    "criteo.com", "taboola.com", "outbrain.com", "adnxs.com", "clarity.ms", "newrelic.com",
+)
+
+def _host(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _matches(host: str, domain: str) -> bool:
+    return host == domain or host.endswith("." + domain)
+
+
+class ResourceBlocker:
+    """
+    page.route 로 텍스트 추출에 불필요한 요청을 abort 합니다.
+    - 리소스 유형 차단 (image / media / font / stylesheet)
+    - 트래커/광고 호스트 차단
+    - allowlist: 차단 때문에 깨지는 사이트는 도메인별로 특정 유형(또는 '*' 전체)을 허용
+    """
+
+    def __init__(self, blocked_types: Iterable[str], tracker_domains: Iterable[str] = TRACKER_DOMAINS, allowlist: Dict[str, Set[str]] = None):
+        self.blocked_types = set(blocked_types)
+        self.tracker_domains = tuple(tracker_domains)
+        self.allowlist = allowlist or {}
+        self.blocked = 0
+        self.allowed = 0
+
+    @staticmethod
+    def parse_allowlist(raw: str) -> Dict[str, Set[str]]:
+        """"example.com=stylesheet|font;foo.com=*" -> {"example.com": {"stylesheet", "font"}, "foo.com": {"*"}}"""
+        allowlist = {}
+        for item in (raw or "").split(";"):
+            if "=" not in item:
+                continue
+            domain, types = item.split("=", 1)
+            allowlist[domain.strip().lower()] = {t.strip() for t in types.split("|") if t.strip()}
+        return allowlist
+
+    def _allowed_types(self, page_url: str) -> Set[str]:
+        host = _host(page_url)
+        allowed = set()
+        for domain, types in self.allowlist.items():
+            if _matches(host, domain):
+                allowed |= types
+        return allowed
+
+    def should_block(self, page_url: str, request_url: str, resource_type: str) -> bool:
+        allowed = self._allowed_types(page_url)
+        if "*" in allowed:
+            return False
+        if resource_type in self.blocked_types and resource_type not in allowed:
+            return True
+        request_host = _host(request_url)
+        return "tracker" not in allowed and any(_matches(request_host, d) for d in self.tracker_domains)
+
+    async def install(self, page, page_url: str):
+        """페이지 이동 전에 호출하여 route 핸들러를 등록합니다."""
+        async def handle(route):
+            request = route.request
+            if self.should_block(page_url, request.url, request.resource_type):
+                self.blocked += 1
+                await route.abort()
+            else:
+                self.allowed += 1
+                await route.continue_()
+        await page.route("**/*", handle)
+
+
+class _PooledContext:
+    """브라우저 컨텍스트 + 이 컨텍스트에서 열었던 페이지 수"""
+
+    def __init__(self, context, generation: int):
+        self.context = context
+        self.generation = generation
+        self.pages_served = 0
+
+
+class BrowserPool:
+    """
+    프로세스 전역에서 재사용하는 Chromium 브라우저 풀.
+    - 브라우저 프로세스는 한 번만 띄우고, 최대 max_contexts 개의 컨텍스트를 재사용
+    - 컨텍스트는 recycle_after 페이지마다 새로 생성 (쿠키/메모리 누적 방지)
+    - 브라우저는 restart_after 페이지마다, 또는 연결이 끊기면(health check) 재시작
+      (재시작이 필요해지면 새 페이지를 내주지 않고, 사용 중인 페이지가 모두 반환된 뒤 재시작)
+    """
+
+    def __init__(self, max_contexts: int = 4, recycle_after: int = 50, restart_after: int = 500, blocker: ResourceBlocker = None):
+        self.max_contexts = max_contexts
+        self.blocker = blocker
+        self.recycle_after = recycle_after
+        self.restart_after = restart_after
+        self._playwright = None
+        self._browser = None
+        self._generation = 0  # 브라우저 재시작 시 증가 (이전 세대 컨텍스트는 폐기)
+        self._pages_since_launch = 0
+        self._idle: List[_PooledContext] = []
+        self._in_use = 0  # 현재 브라우저에서 빌려간 페이지 수 (0 이 되어야 재시작 가능)
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        # 브라우저 교체와 풀 상태(_idle, _in_use, 카운터)를 보호. 반환 시 notify 로 재시작 대기자를 깨움
+        self._cond = asyncio.Condition()
+
+    def _is_healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    def _restart_due(self) -> bool:
+        return self._browser is not None and self._pages_since_launch >= self.restart_after
+
+    async def _ensure_browser(self):
+        """self._cond 를 잡은 상태에서 호출합니다."""
+        # 재시작 주기에 도달했으면 사용 중인 페이지가 모두 반환될 때까지 대기 (drain)
+        await self._cond.wait_for(lambda: not self._restart_due() or self._in_use == 0 or not self._is_healthy())
+        needs_restart = self._restart_due()
+        if self._is_healthy() and not needs_restart:
+            return
+        if self._browser is not None:
+            reason = "재시작 주기 도달" if needs_restart and self._is_healthy() else "연결 끊김"
+            logger.warning(f"[BrowserPool] 브라우저 재시작 ({reason})")
+            await self._close_browser()
+
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=["--disable-blink-features=AutomationControlled", "--disable-dev-shm-usage"]
+        )
+        self._generation += 1
+        self._pages_since_launch = 0
+        logger.info(f"[BrowserPool] Chromium 시작 (generation={self._generation}, max_contexts={self.max_contexts})")
+
+    async def _close_browser(self):
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._close_context(pooled)
+        try:
+            await self._browser.close()
+        except Exception as e:
+            logger.warning(f"[BrowserPool] 브라우저 종료 실패: {e}")
+        self._browser = None
+
+    @staticmethod
+    async def _close_context(pooled: _PooledContext):
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    async def _acquire_context(self) -> _PooledContext:
+        stale = []
+        pooled = None
+        async with self._cond:
+            await self._ensure_browser()
+            # 브라우저 참조는 lock 안에서 잡고, 반환 전까지 _in_use 로 재시작을 막음
+            browser, generation = self._browser, self._generation
+            self._in_use += 1
+            self._pages_since_launch += 1
+            while self._idle:
+                candidate = self._idle.pop()
+                if candidate.generation == generation:
+                    pooled = candidate
+                    break
+                stale.append(candidate)
+
+        for candidate in stale:
+            await self._close_context(candidate)
+        if pooled is not None:
+            return pooled
+        try:
+            context = await browser.new_context(
+                user_agent=USER_AGENT,
+                viewport={"width": 1920, "height": 1080},
+                locale="ko-KR"
+            )
+            await context.add_init_script(STEALTH_SCRIPT)
+        except Exception:
+            async with self._cond:
+                self._in_use -= 1
+                self._cond.notify_all()
+            raise
+        return _PooledContext(context, generation)
+
+    async def _release_context(self, pooled: _PooledContext, broken: bool):
+        async with self._cond:
+            self._in_use -= 1
+            pooled.pages_served += 1
+            expired = pooled.pages_served >= self.recycle_after or pooled.generation != self._generation
+            reuse = not (broken or expired or not self._is_healthy())
+            if reuse:
+                self._idle.append(pooled)
+            self._cond.notify_all()
+        if not reuse:
+            await self._close_context(pooled)
+
+    @asynccontextmanager
+    async def page(self, url: str = None):
+        """
+        풀에서 컨텍스트를 빌려 새 페이지를 엽니다. 블록을 벗어나면 페이지는 닫히고 컨텍스트는 반환됩니다.
+        동시에 열 수 있는 페이지 수는 max_contexts 로 제한됩니다.
+        url 을 넘기면 해당 도메인의 allowlist 기준으로 리소스 차단을 적용합니다.
+        """
+        async with self._semaphore:
+            pooled = await self._acquire_context()
+            broken = False
+            page = None
+            try:
+                page = await pooled.context.new_page()
+                if self.blocker and url:
+                    await self.blocker.install(page, url)
+                yield page
+            except Exception:
+                # 브라우저/컨텍스트 자체가 죽은 경우 재사용하지 않음
+                broken = not self._is_healthy()
+                raise
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        broken = True
+                await self._release_context(pooled, broken)
+
+    async def close(self):
+        async with self._cond:
+            if self._browser is not None:
+                await self._close_browser()
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def stats(self) -> dict:
+        return {
+            "connected": self._is_healthy(),
+            "generation": self._generation,
+            "pages_since_launch": self._pages_since_launch,
+            "idle_contexts": len(self._idle),
+            "in_use": self._in_use,
+            "max_contexts": self.max_contexts,
+            "blocked_requests": self.blocker.blocked if self.blocker else 0,
+            "allowed_requests": self.blocker.allowed if self.blocker else 0,
+        }
+
+_default_pool: Optional[BrowserPool] = None
+
+def get_browser_pool() -> BrowserPool:
+    """설정 기반의 공유 브라우저 풀 (첫 사용 시 Chromium 실행)"""
+    global _default_pool
+    if _default_pool is None:
+        from src.config import (
+            BROWSER_POOL_SIZE, BROWSER_CONTEXT_RECYCLE_PAGES, BROWSER_RESTART_PAGES,
+            BROWSER_BLOCK_RESOURCES, BROWSER_BLOCKED_RESOURCE_TYPES, BROWSER_RESOURCE_ALLOWLIST
+        )
+        blocker = None
+        if BROWSER_BLOCK_RESOURCES:
+            blocker = ResourceBlocker(
+                BROWSER_BLOCKED_RESOURCE_TYPES,
+                allowlist=ResourceBlocker.parse_allowlist(BROWSER_RESOURCE_ALLOWLIST)
+            )
+        _default_pool = BrowserPool(
+            max_contexts=BROWSER_POOL_SIZE,
+            recycle_after=BROWSER_CONTEXT_RECYCLE_PAGES,
+            restart_after=BROWSER_RESTART_PAGES,
+            blocker=blocker
+        )
+    return _default_pool
@@ -1,11 +1,25 @@
 import os
 import re
 import asyncio
-import subprocess
-from playwright.async_api import async_playwright
+import aiohttp
 import trafilatura
+import yt_dlp
+from src.config import EXTRACT_MAX_CHARS, EXTRACT_STATIC_MIN_CHARS, EXTRACT_STATIC_TIMEOUT, EXTRACT_THROTTLE_RETRIES
+from src.services.browser_pool import get_browser_pool, USER_AGENT
+from src.services.extraction_router import get_extraction_router
+from src.services.extraction_cache import get_extraction_cache
+from src.services.host_limiter import get_host_limiter, HostLimiter, HostThrottled
+from src.services.subtitle_parser import iter_vtt_text, iter_lines
+
+# 호스트가 요청 한도 초과를 알리는 응답 코드
+THROTTLE_STATUSES = (429, 503)
+# 자막 언어 우선순위
+YOUTUBE_SUBTITLE_LANGS = ("ko", "en")
 
 class ContentExtractor:
+    # 정적 HTTP 추출용 공유 세션 (keep-alive 연결 재사용)
+    _session = None
+
     @staticmethod
     def normalize_url(url):
         url = re.sub(r"(https?://)(fxfxtwitter|fxtwitter|vxtwitter|fixupx|twittpr)(\.com/)", r"\1x\3", url)
@@ -13,90 +27,235 @@ class ContentExtractor:
             url = url.replace("threads.com", "threads.net").split("?")[0]
         return url
 
+    @staticmethod
+    def _get_session():
+        if ContentExtractor._session is None or ContentExtractor._session.closed:
+            ContentExtractor._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=EXTRACT_STATIC_TIMEOUT),
+                headers={"User-Agent": USER_AGENT, "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8"}
+            )
+        return ContentExtractor._session
+
+    @staticmethod
+    async def close():
+        if ContentExtractor._session is not None and not ContentExtractor._session.closed:
+            await ContentExtractor._session.close()
+        await get_browser_pool().close()
+        # debounce 중인 도메인별 추출 경로 통계 저장
+        await get_extraction_router().flush()
+
+    @staticmethod
+    async def _fetch_static(url, etag=None, last_modified=None):
+        """
+        JavaScript 없이 HTML 을 요청합니다 (ETag/Last-Modified 가 있으면 조건부 요청).
+        Returns: {"status", "html", "etag", "last_modified"} (네트워크 오류 시 None)
+        """
+        print(f"[Static] Fetching: {url}")
+        headers = {}
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+        try:
+            async with ContentExtractor._get_session().get(url, headers=headers, allow_redirects=True) as resp:
+                if resp.status in THROTTLE_STATUSES:
+                    retry_after = HostLimiter.parse_retry_after(resp.headers.get("Retry-After"))
+                    raise HostThrottled(HostLimiter.host_key(url), resp.status, retry_after)
+                response = {
+                    "status": resp.status,
+                    "html": None,
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                }
+                if resp.status == 200 and "html" in resp.headers.get("Content-Type", ""):
+                    response["html"] = await resp.text(errors="replace")
+                elif resp.status != 304:
+                    print(f"[Static] Skip (status={resp.status}, type={resp.headers.get('Content-Type')})")
+                return response
+        except HostThrottled:
+            raise
+        except Exception as e:
+            print(f"[Static Error] {e}")
+            return None
+
+    @staticmethod
+    async def _parse_html(html):
+        # trafilatura 파싱은 CPU 작업이므로 이벤트 루프 밖에서 실행
+        if not html: return None
+        return await asyncio.to_thread(trafilatura.extract, html, include_comments=False)
+
+    @staticmethod
+    async def extract_static_content(url):
+        """JavaScript 없이 HTML 만 받아 trafilatura 로 본문 추출 (실패 시 None)"""
+        response = await ContentExtractor._fetch_static(url)
+        return await ContentExtractor._parse_html(response["html"] if response else None)
+
     @staticmethod
     async def extract_dynamic_content(url):
         print(f"[Playwright] Scraping: {url}")
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=["--disable-blink-features=AutomationControlled"]
-                )
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    viewport={"width": 1920, "height": 1080},
-                    locale="ko-KR"
-                )
-                await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                page = await context.new_page()
-                try:
-                    await page.goto(url, wait_until="domcontentloaded", timeout=30000)
-                    try: await page.wait_for_load_state("networkidle", timeout=5000)
-                    except: pass
-                    
-                    content = await page.content()
-                    extracted_text = trafilatura.extract(content, include_comments=False)
-                    
-                    if not extracted_text:
-                        desc = await page.get_attribute('meta[property="og:description"]', 'content')
-                        title = await page.title()
-                        if desc: extracted_text = f"제목: {title}\n내용: {desc}"
-                    return extracted_text
-                finally:
-                    await browser.close()
+            # 공유 브라우저 풀의 컨텍스트를 재사용 (URL 마다 Chromium 을 새로 띄우지 않음)
+            async with get_browser_pool().page(url) as page:
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                if response is not None and response.status in THROTTLE_STATUSES:
+                    retry_after = HostLimiter.parse_retry_after(await response.header_value("retry-after"))
+                    raise HostThrottled(HostLimiter.host_key(url), response.status, retry_after)
+                try: await page.wait_for_load_state("networkidle", timeout=5000)
+                except: pass
+
+                content = await page.content()
+                extracted_text = await ContentExtractor._parse_html(content)
+
+                if not extracted_text:
+                    desc = await page.get_attribute('meta[property="og:description"]', 'content')
+                    title = await page.title()
+                    if desc: extracted_text = f"제목: {title}\n내용: {desc}"
+                return extracted_text
+        except HostThrottled:
+            raise
         except Exception as e:
             print(f"[Playwright Error] {e}")
             return None
 
+    @staticmethod
+    def _pick_subtitle_track(info):
+        """수동 자막 > 자동 자막, ko > en 순으로 VTT 트랙을 고릅니다."""
+        for source in ("subtitles", "automatic_captions"):
+            tracks = info.get(source) or {}
+            for lang in YOUTUBE_SUBTITLE_LANGS:
+                formats = tracks.get(lang) or []
+                for fmt in formats:
+                    if fmt.get("ext") == "vtt" and fmt.get("url"):
+                        return lang, source, fmt["url"]
+        return None
+
     @staticmethod
     def _extract_youtube_sync(url):
+        """
+        yt-dlp Python API 로 자막 트랙 URL 을 얻고, VTT 를 스트리밍으로 읽어 메모리에서 파싱합니다.
+        파일을 쓰지 않으므로 같은 영상을 동시에 처리해도 안전합니다.
+        """
         print(f"[YouTube] Processing: {url}")
-        try:
-            video_id = None
-            if "v=" in url: video_id = url.split("v=")[1].split("&")[0]
-            elif "youtu.be" in url: video_id = url.split("/")[-1].split("?")[0]
-            if not video_id: return {"error": "Invalid YouTube URL"}
-
-            cmd = ["yt-dlp", "--write-auto-sub", "--write-sub", "--sub-lang", "ko,en", "--skip-download", "--output", f"/app/data/%(id)s", url]
-            
-            # 쿠키 파일이 있으면 사용 (429 에러 방지)
-            if os.path.exists("/app/cookies.txt"):
-                cmd.extend(["--cookies", "/app/cookies.txt"])
-            
+        opts = {
+            "skip_download": True,
+            "quiet": True,
+            "no_warnings": True,
             # User-Agent 설정 (봇 탐지 우회)
-            cmd.extend(["--user-agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"])
-
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-            target_base = f"/app/data/{video_id}"
-            content = ""
-            for lang in ['.ko.vtt', '.en.vtt']:
-                path = target_base + lang
-                if os.path.exists(path):
-                    with open(path, 'r', encoding='utf-8') as f:
-                        lines = f.readlines()
-                        text_lines = [line.strip() for line in lines if '-->' not in line and line.strip() != 'WEBVTT' and line.strip()]
-                        content = " ".join(dict.fromkeys(text_lines))
-                    os.remove(path)
-                    break
-            if content: return {"type": "YouTube", "content": content[:7000]}
+            "http_headers": {"User-Agent": USER_AGENT},
+        }
+        # 쿠키 파일이 있으면 사용 (429 에러 방지)
+        if os.path.exists("/app/cookies.txt"):
+            opts["cookiefile"] = "/app/cookies.txt"
+
+        try:
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+                track = ContentExtractor._pick_subtitle_track(info or {})
+                if not track:
+                    return {"error": "자막을 찾을 수 없습니다."}
+                lang, source, track_url = track
+                print(f"[YouTube] 자막 트랙: {lang} ({source})")
+
+                response = ydl.urlopen(track_url)
+                try:
+                    content = " ".join(iter_vtt_text(iter_lines(response)))
+                finally:
+                    response.close()
+
+            if content: return {"type": "YouTube", "content": content[:EXTRACT_MAX_CHARS]}
             return {"error": "자막을 찾을 수 없습니다."}
 
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr.decode() if e.stderr else str(e)
+        except yt_dlp.utils.DownloadError as e:
+            error_msg = str(e)
             print(f"[YouTube Error] {error_msg}")
+            if "HTTP Error 429" in error_msg:
+                raise HostThrottled("youtube.com", 429)
             return {"error": f"YouTube download failed: {error_msg[:200]}..."}
+        except HostThrottled:
+            raise
         except Exception as e:
+            if getattr(getattr(e, "response", None), "status", None) == 429 or "HTTP Error 429" in str(e):
+                raise HostThrottled("youtube.com", 429)
             return {"error": f"YouTube Error: {str(e)}"}
 
     @staticmethod
-    async def extract(url):
+    async def _extract_web(url, cached=None):
+        """
+        정적 HTTP 경로를 먼저 시도하고, 본문이 짧거나 동적 사이트면 브라우저로 전환합니다.
+        경로별 성공 여부는 도메인 단위로 기록되어 다음 라우팅에 반영됩니다.
+        cached 항목에 ETag/Last-Modified 가 있으면 조건부 요청으로 재검증합니다.
+
+        Returns: (content, validators, not_modified)
+        """
+        router = get_extraction_router()
+        try_static = router.should_try_static(url)
+        validators = {}
+        static_content = None
+
+        revalidate = bool(cached and (cached.get("etag") or cached.get("last_modified")))
+        if try_static or revalidate:
+            response = await ContentExtractor._fetch_static(
+                url,
+                etag=cached.get("etag") if revalidate else None,
+                last_modified=cached.get("last_modified") if revalidate else None
+            )
+            if response and response["status"] == 304 and revalidate:
+                print("[Extractor] 304 Not Modified → 캐시된 본문 재사용")
+                return cached["content"], validators, True
+            if response and response["status"] == 200:
+                validators = {"etag": response["etag"], "last_modified": response["last_modified"]}
+
+            if try_static:
+                static_content = await ContentExtractor._parse_html(response["html"] if response else None)
+                ok = bool(static_content) and len(static_content.strip()) >= EXTRACT_STATIC_MIN_CHARS
+                router.record(url, "static", ok)
+                if ok:
+                    return static_content, validators, False
+                print(f"[Extractor] 정적 추출 부족 ({len(static_content or '')}자) → 브라우저로 전환")
+
+        content = await ContentExtractor.extract_dynamic_content(url)
+        router.record(url, "browser", bool(content) and len(content.strip()) >= 50)
+        # 브라우저 결과가 더 빈약하면 정적 추출 결과라도 사용
+        if len(static_content or "") > len(content or ""):
+            content = static_content
+        return content, validators, False
+
+    @staticmethod
+    async def extract(url, use_cache=True):
         url = ContentExtractor.normalize_url(url)
         print(f"[Extractor] Normalized URL: {url}")
+
+        cache = get_extraction_cache() if use_cache else None
+        cached = await asyncio.to_thread(cache.get, url) if cache else None
+        if cached and cache.is_fresh(cached):
+            # 최근에 추출한 링크 (예: 요약 후 Deep Dive) 는 네트워크 없이 재사용
+            print(f"[Extractor] 추출 캐시 사용: {url}")
+            return {"type": cached["type"], "content": cached["content"][:EXTRACT_MAX_CHARS]}
+
+        # 호스트별 동시성 제한 + 429/503 backoff 후 재시도 (다른 호스트는 병렬 진행)
+        limiter = get_host_limiter()
+        for attempt in range(EXTRACT_THROTTLE_RETRIES + 1):
+            try:
+                async with limiter.slot(url):
+                    return await ContentExtractor._extract_uncached(url, cache, cached)
+            except HostThrottled as e:
+                delay = limiter.backoff(url, e.retry_after)
+                print(f"[Extractor] {e.host} 요청 제한 (status={e.status}, backoff {delay:.0f}s, 시도 {attempt + 1}/{EXTRACT_THROTTLE_RETRIES + 1})")
+        return {"error": "요청 한도 초과 (429) - 잠시 후 다시 시도해주세요."}
+
+    @staticmethod
+    async def _extract_uncached(url, cache, cached):
         if "youtube.com" in url or "youtu.be" in url:
-            return await asyncio.to_thread(ContentExtractor._extract_youtube_sync, url)
-        content = await ContentExtractor.extract_dynamic_content(url)
+            result = await asyncio.to_thread(ContentExtractor._extract_youtube_sync, url)
+            if cache and result.get("content"):
+                await asyncio.to_thread(cache.put, url, result["type"], result["content"])
+            return result
+
+        content, validators, not_modified = await ContentExtractor._extract_web(url, cached)
+        if not_modified:
+            await asyncio.to_thread(cache.touch, cached)
+            return {"type": cached["type"], "content": cached["content"][:EXTRACT_MAX_CHARS]}
         if not content or len(content.strip()) < 50:
              return {"error": "본문 추출 실패"}
         source_type = "X/Threads" if "x.com" in url or "threads.net" in url else "Web"
-        return {"type": source_type, "content": content[:7000]}
+        if cache:
+            await asyncio.to_thread(cache.put, url, source_type, content, validators.get("etag"), validators.get("last_modified"))
+        return {"type": source_type, "content": content[:EXTRACT_MAX_CHARS]}
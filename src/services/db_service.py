@@ -158,22 +158,27 @@ class DBService:
                 await db.commit()
 
     @staticmethod
-    def _build_filter_query(
+    def document_filter_conditions(
         doc_type: str = None,
         upload_status: str = None,
         category: str = None,
-        tag: str = None
-    ):
-        """Builds the base usage query with filters applied."""
-        query = select(Document)
-        
+        tag: str = None,
+        created_after: datetime.datetime = None,
+        created_before: datetime.datetime = None
+    ) -> list:
+        """
+        Document 필터 조건 목록 (문서 목록 API 와 검색 API 가 공유).
+        검색에서는 이 조건으로 문서 id 서브쿼리를 만들어 ANN 쿼리에 pre-filter 로 결합합니다.
+        """
+        conditions = []
+
         # doc_type 필터
         if doc_type:
-            query = query.where(Document.doc_type == doc_type)
+            conditions.append(Document.doc_type == doc_type)
         
         # upload_status 필터
         if upload_status:
-            query = query.where(Document.gdrive_upload_status == upload_status)
+            conditions.append(Document.gdrive_upload_status == upload_status)
         
         # category 필터 (Tags 기반)
         if category:
@@ -182,7 +187,7 @@ class DBService:
             
             if category.lower() == "uncategorized":
                 # tags가 없거나 빈 배열인 문서 검색
-                query = query.where(
+                conditions.append(
                     sa.or_(
                         Document.tags == None,
                         func.jsonb_array_length(Document.tags) == 0
@@ -192,12 +197,12 @@ class DBService:
                 target_tags = tag_manager.get_tags_for_category(category)
                 if target_tags:
                     # PostgreSQL JSONB 배열이 target_tags 중 하나라도 포함하는지 확인
-                    query = query.where(
+                    conditions.append(
                         func.jsonb_exists_any(Document.tags, cast(target_tags, ARRAY(sa.String)))
                     )
                 else:
                     # 유효하지 않은 카테고리인 경우 결과 없음
-                    query = query.where(sa.false())
+                    conditions.append(sa.false())
         
         # tag 필터 (단일 태그 검색, 대소문자만 무시, 정확한 매칭)
         if tag:
@@ -205,7 +210,7 @@ class DBService:
             normalized_tag = tag.lower().strip()
             # JSONB 배열의 각 요소를 소문자로 변환하여 정확히 비교 (LIKE가 아닌 == 사용)
             # 예: "tech"는 "Tech", "TECH"와 매칭되지만 "technology"와는 매칭되지 않음
-            query = query.where(
+            conditions.append(
                 sa.exists(
                     select(1).select_from(
                         func.jsonb_array_elements_text(Document.tags).alias('tag_element')
@@ -214,8 +219,25 @@ class DBService:
                     )
                 )
             )
-        
-        return query
+
+        # 생성일 범위 필터
+        if created_after:
+            conditions.append(Document.created_at >= created_after)
+        if created_before:
+            conditions.append(Document.created_at < created_before)
+
+        return conditions
+
+    @staticmethod
+    def _build_filter_query(
+        doc_type: str = None,
+        upload_status: str = None,
+        category: str = None,
+        tag: str = None
+    ):
+        """Builds the base usage query with filters applied."""
+        conditions = DBService.document_filter_conditions(doc_type, upload_status, category, tag)
+        return select(Document).where(*conditions)
 
     @staticmethod
     async def count_documents(
@@ -0,0 +1,124 @@
+import re
+import time
+import asyncio
+from array import array
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SPACE_RE = re.compile(r"\s+")
+ENTRY_OVERHEAD_BYTES = 200  # OrderedDict 노드, 키 문자열, 타임스탬프 등 대략적인 항목당 오버헤드
+
+class QueryEmbeddingCache:
+    """
+    검색 쿼리 → 임베딩 메모리 캐시 (LRU + TTL, 전체 크기를 바이트 단위로 제한).
+    - 같은 쿼리로 페이지를 넘기거나 다시 검색하면 Gemini 임베딩 호출을 생략
+    - 동시에 들어온 같은 쿼리는 하나의 계산을 함께 기다림 (in-flight dedup)
+    임베딩은 float32 array 로 저장합니다 (768차원 기준 Python list 대비 약 1/8 크기).
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, array, size)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return _SPACE_RE.sub(" ", query or "").strip()
+
+    def get(self, query: str) -> Optional[List[float]]:
+        key = self.normalize(query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector, _ = entry
+        if expires_at < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return vector.tolist()
+
+    def put(self, query: str, embedding: List[float]):
+        key = self.normalize(query)
+        vector = array("f", embedding)
+        size = vector.itemsize * len(vector) + len(key) * 4 + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, vector, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    async def get_or_compute(self, query: str, compute: Callable[[str], Awaitable[Optional[List[float]]]]) -> Optional[List[float]]:
+        """캐시에 있으면 바로 반환, 같은 쿼리를 계산 중이면 그 결과를 기다리고, 아니면 compute(query) 실행"""
+        cached = self.get(query)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        key = self.normalize(query)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.hits += 1
+            # asyncio.wait 는 이 요청이 취소되어도 공유 future 를 취소하지 않음
+            await asyncio.wait([future])
+            if future.cancelled():
+                # 먼저 시작한 요청이 취소됨 → 직접 다시 계산
+                return await self.get_or_compute(query, compute)
+            return future.result()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            embedding = await compute(query)
+            if embedding:
+                # 실패(None)는 캐시하지 않음 → 다음 요청에서 다시 시도
+                self.put(query, embedding)
+            future.set_result(embedding)
+            return embedding
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 기다리는 요청이 없으면 "Future exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight": len(self._inflight),
+        }
+
+_default_cache = None
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """프로세스 안의 모든 검색 요청이 공유하는 쿼리 임베딩 캐시"""
+    global _default_cache
+    if _default_cache is None:
+        from src.config import SEARCH_EMBEDDING_CACHE_MB, SEARCH_EMBEDDING_CACHE_TTL_SECONDS
+        _default_cache = QueryEmbeddingCache(
+            max_bytes=int(SEARCH_EMBEDDING_CACHE_MB * 1024 * 1024),
+            ttl_seconds=SEARCH_EMBEDDING_CACHE_TTL_SECONDS
+        )
+    return _default_cache
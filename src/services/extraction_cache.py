@@ -0,0 +1,116 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+from typing import Optional
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ExtractionCache:
+    """
+    추출된 원문 텍스트를 정규화된 URL 기준으로 저장하는 압축(gzip) 디스크 캐시.
+    - max_age 이내 항목은 네트워크 없이 그대로 사용
+    - 오래된 항목은 ETag / Last-Modified 로 조건부 요청(304)하여 재검증
+    - retention 을 넘긴 파일은 주기적으로 삭제
+    항목: {"url", "type", "content", "etag", "last_modified", "fetched_at"}
+    """
+    PRUNE_EVERY = 100  # put N회마다 오래된 파일 정리
+
+    def __init__(self, directory: str, max_age_seconds: int, retention_seconds: int):
+        self.directory = directory
+        self.max_age_seconds = max_age_seconds
+        self.retention_seconds = retention_seconds
+        self._puts = 0
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.gz")
+
+    def get(self, url: str) -> Optional[dict]:
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry if entry.get("url") == url else None
+        except Exception as e:
+            logger.warning(f"[ExtractionCache] 읽기 실패 ({url}): {e}")
+            return None
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry.get("fetched_at", 0) <= self.max_age_seconds
+
+    def put(self, url: str, source_type: str, content: str, etag: str = None, last_modified: str = None):
+        if not content:
+            return
+        self._write({
+            "url": url,
+            "type": source_type,
+            "content": content,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        })
+        self._puts += 1
+        if self._puts % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def touch(self, entry: dict):
+        """304 Not Modified 로 재검증된 항목의 fetched_at 갱신"""
+        self._write(dict(entry, fetched_at=time.time()))
+
+    def _write(self, entry: dict):
+        path = self._path(entry["url"])
+        try:
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # 같은 URL 을 동시에 쓰는 경우(스레드/프로세스)에도 서로의 임시 파일을 덮어쓰지 않도록 고유 이름 사용
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logger.warning(f"[ExtractionCache] 저장 실패 ({entry['url']}): {e}")
+
+    def prune(self) -> int:
+        """retention 을 넘긴 캐시 파일 삭제. Returns: 삭제한 파일 수"""
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+        if removed:
+            logger.info(f"[ExtractionCache] 오래된 항목 {removed}개 삭제")
+        return removed
+
+_default_cache = None
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """설정 기반의 공유 추출 캐시 (비활성화 시 None)"""
+    global _default_cache
+    from src.config import (
+        CACHE_DIR, EXTRACTION_CACHE_ENABLED, EXTRACTION_CACHE_MAX_AGE_SECONDS, EXTRACTION_CACHE_RETENTION_SECONDS
+    )
+    if not EXTRACTION_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = ExtractionCache(
+            os.path.join(CACHE_DIR, "extraction"),
+            max_age_seconds=EXTRACTION_CACHE_MAX_AGE_SECONDS,
+            retention_seconds=EXTRACTION_CACHE_RETENTION_SECONDS
+        )
+    return _default_cache
@@ -0,0 +1,132 @@
+import os
+import json
+import asyncio
+import tempfile
+import threading
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ExtractionRouter:
+    """
+    도메인별로 정적 HTTP 추출 / 브라우저 추출 중 어느 경로가 성공했는지 기록하고,
+    다음 요청에서 정적 경로를 먼저 시도할지 결정합니다.
+    - dynamic_domains (x.com, threads.net 등)는 항상 브라우저 사용
+    - 정적 경로가 반복해서 실패한 도메인은 바로 브라우저로 보내되, 가끔(explore_every) 다시 시도
+    통계는 JSON 파일로 저장되어 재시작 후에도 유지됩니다.
+    저장은 record 마다 하지 않고 SAVE_INTERVAL_SECONDS 동안 모아서 스레드에서 한 번에 하며 (debounce),
+    종료 시 flush() 로 남은 변경을 기록합니다.
+    """
+    MIN_SAMPLES = 3
+    STATIC_SUCCESS_THRESHOLD = 0.3
+    SAVE_INTERVAL_SECONDS = 10
+
+    def __init__(self, path: Optional[str], dynamic_domains: List[str], explore_every: int = 20):
+        self.path = path
+        self.dynamic_domains = [d.lower() for d in dynamic_domains]
+        self.explore_every = explore_every
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._save_task: Optional[asyncio.Task] = None
+        self._load()
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        host = (urlparse(url).hostname or "").lower()
+        return host[4:] if host.startswith("www.") else host
+
+    def _is_dynamic(self, domain: str) -> bool:
+        return any(domain == d or domain.endswith("." + d) for d in self.dynamic_domains)
+
+    def _entry(self, domain: str) -> Dict[str, int]:
+        return self.stats.setdefault(domain, {"static_ok": 0, "static_fail": 0, "browser_ok": 0, "browser_fail": 0, "skipped": 0})
+
+    def should_try_static(self, url: str) -> bool:
+        domain = self.domain_of(url)
+        if self._is_dynamic(domain):
+            return False
+        with self._lock:
+            entry = self._entry(domain)
+            attempts = entry["static_ok"] + entry["static_fail"]
+            if attempts < self.MIN_SAMPLES or entry["static_ok"] / attempts >= self.STATIC_SUCCESS_THRESHOLD:
+                return True
+            # 정적 경로가 잘 안 되는 도메인: 대부분 건너뛰되 주기적으로 재시도 (사이트 변경 대응)
+            entry["skipped"] += 1
+            return entry["skipped"] % self.explore_every == 0
+
+    def record(self, url: str, path: str, ok: bool):
+        """path: 'static' | 'browser'"""
+        domain = self.domain_of(url)
+        with self._lock:
+            self._entry(domain)[f"{path}_{'ok' if ok else 'fail'}"] += 1
+            self._dirty = True
+        self._schedule_save()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.stats = json.load(f)
+        except Exception as e:
+            logger.warning(f"[ExtractionRouter] 통계 로드 실패: {e}")
+
+    def _schedule_save(self):
+        """이벤트 루프 안이면 SAVE_INTERVAL_SECONDS 뒤 한 번 저장하도록 예약 (이미 예약되어 있으면 합류)"""
+        if not self.path or (self._save_task and not self._save_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # 루프 밖(스크립트)에서는 flush() 로 저장
+        self._save_task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        await asyncio.sleep(self.SAVE_INTERVAL_SECONDS)
+        await asyncio.to_thread(self._save)
+
+    async def flush(self):
+        """예약된 저장을 기다리지 않고 남은 변경을 바로 기록합니다 (종료 시 호출)."""
+        if self._save_task and not self._save_task.done():
+            self._save_task.cancel()
+        await asyncio.to_thread(self._save)
+
+    def _save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self.stats, ensure_ascii=False)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            with self._lock:
+                self._dirty = True  # 다음 저장에서 다시 시도
+            logger.warning(f"[ExtractionRouter] 통계 저장 실패: {e}")
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {domain: dict(entry) for domain, entry in self.stats.items()}
+
+_default_router = None
+
+def get_extraction_router() -> ExtractionRouter:
+    global _default_router
+    if _default_router is None:
+        from src.config import CACHE_DIR, EXTRACT_DYNAMIC_DOMAINS
+        _default_router = ExtractionRouter(os.path.join(CACHE_DIR, "extraction_routes.json"), EXTRACT_DYNAMIC_DOMAINS)
+    return _default_router
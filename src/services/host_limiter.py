@@ -0,0 +1,133 @@
+import time
+import asyncio
+import datetime
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 같은 서비스의 다른 호스트명은 하나의 호스트로 취급
+HOST_ALIASES = {
+    "youtu.be": "youtube.com",
+    "m.youtube.com": "youtube.com",
+    "twitter.com": "x.com",
+    "mobile.x.com": "x.com",
+}
+
+class HostThrottled(Exception):
+    """호스트가 429 / 503 으로 요청을 거절함 (retry_after: 서버가 알려준 대기 시간, 초)"""
+
+    def __init__(self, host: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"{host} throttled (status={status}, retry_after={retry_after})")
+        self.host = host
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _HostState:
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.backoff_until = 0.0
+        self.failures = 0
+        self.throttled_total = 0
+
+
+class HostLimiter:
+    """
+    추출 요청용 호스트별 politeness 스케줄러.
+    - 호스트마다 동시 요청 수를 per_host 로 제한 (서로 다른 호스트는 병렬 처리)
+    - 429 / 503 을 받으면 Retry-After (없으면 지수 backoff) 동안 해당 호스트 요청을 보류
+    """
+
+    def __init__(self, per_host: int = 2, base_backoff: float = 5, max_backoff: float = 300):
+        self.per_host = per_host
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._hosts: Dict[str, _HostState] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        host = (urlparse(url).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return HOST_ALIASES.get(host, host)
+
+    def _state(self, host: str) -> _HostState:
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.per_host)
+        return self._hosts[host]
+
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After 헤더 (초 또는 HTTP-date) -> 대기 초"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """호스트의 backoff 가 끝나고 동시성 슬롯이 생길 때까지 대기한 뒤 진입합니다."""
+        host = self.host_key(url)
+        state = self._state(host)
+        while True:
+            delay = state.backoff_until - time.monotonic()
+            if delay > 0:
+                logger.info(f"[HostLimiter] {host} backoff 대기 {delay:.1f}s")
+                await asyncio.sleep(delay)
+            await state.semaphore.acquire()
+            if state.backoff_until <= time.monotonic():
+                break
+            # 대기 중 다른 요청이 새 backoff 를 건 경우 다시 대기
+            state.semaphore.release()
+        try:
+            yield
+            state.failures = 0
+        finally:
+            state.semaphore.release()
+
+    def backoff(self, url: str, retry_after: Optional[float] = None) -> float:
+        """호스트를 retry_after (없으면 지수 backoff) 동안 보류합니다. Returns: 적용한 대기 시간"""
+        host = self.host_key(url)
+        state = self._state(host)
+        state.failures += 1
+        state.throttled_total += 1
+        delay = retry_after if retry_after is not None else self.base_backoff * 2 ** (state.failures - 1)
+        delay = min(self.max_backoff, delay)
+        state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+        logger.warning(f"[HostLimiter] {host} throttled → {delay:.0f}s backoff (연속 {state.failures}회)")
+        return delay
+
+    def snapshot(self) -> Dict[str, dict]:
+        now = time.monotonic()
+        return {
+            host: {
+                "backoff_remaining": max(0, round(state.backoff_until - now, 1)),
+                "consecutive_throttles": state.failures,
+                "throttled_total": state.throttled_total,
+            }
+            for host, state in self._hosts.items()
+        }
+
+_default_limiter = None
+
+def get_host_limiter() -> HostLimiter:
+    global _default_limiter
+    if _default_limiter is None:
+        from src.config import EXTRACT_PER_HOST_CONCURRENCY, EXTRACT_HOST_BACKOFF_SECONDS, EXTRACT_HOST_BACKOFF_MAX_SECONDS
+        _default_limiter = HostLimiter(
+            per_host=EXTRACT_PER_HOST_CONCURRENCY,
+            base_backoff=EXTRACT_HOST_BACKOFF_SECONDS,
+            max_backoff=EXTRACT_HOST_BACKOFF_MAX_SECONDS
+        )
+    return _default_limiter
@@ -0,0 +1,194 @@
+import datetime
+from typing import List, Optional
+import sqlalchemy as sa
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+from src.database.engine import AsyncSessionLocal
+from src.database.models import LLMJobRecord, JobStatus
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+class JobStore:
+    """
+    Postgres 기반 LLM 작업 저장소.
+    SELECT ... FOR UPDATE SKIP LOCKED 로 작업을 claim 하고, lease 가 만료된 작업은 다시 claim 됩니다.
+    """
+
+    @staticmethod
+    async def enqueue(
+        job_type: str,
+        payload: dict,
+        context_channel_id: int = None,
+        context_message_id: int = None,
+        lane: str = "batch",
+        priority: int = 0,
+        dedup_key: str = None,
+        subscribers: List[dict] = None
+    ) -> LLMJobRecord:
+        async with AsyncSessionLocal() as db:
+            record = LLMJobRecord(
+                job_type=job_type,
+                payload=payload or {},
+                status=JobStatus.PENDING,
+                lane=lane,
+                priority=priority,
+                dedup_key=dedup_key,
+                subscribers=subscribers or [],
+                context_channel_id=context_channel_id,
+                context_message_id=context_message_id,
+                attempts=0
+            )
+            db.add(record)
+            await db.commit()
+            await db.refresh(record)
+            return record
+
+    @staticmethod
+    async def claim(
+        worker_name: str,
+        lease_seconds: int,
+        max_attempts: int,
+        lanes: List[str] = None,
+        aging_seconds: float = None
+    ) -> Optional[LLMJobRecord]:
+        """
+        대기 중인 작업(또는 lease 가 만료된 실행 중 작업) 하나를 claim 합니다.
+        재시도 한도를 넘긴 작업은 FAILED 로 정리하고 다음 작업을 찾습니다.
+
+        Args:
+            lanes: claim 대상 lane 목록 (None = 전체)
+            aging_seconds: 대기 시간 N초마다 유효 우선순위 +1 (None = aging 없음)
+        """
+        effective_priority = sa.cast(LLMJobRecord.priority, sa.Float)
+        if aging_seconds:
+            waited = func.extract('epoch', func.now() - LLMJobRecord.created_at)
+            effective_priority = effective_priority + waited / aging_seconds
+
+        async with AsyncSessionLocal() as db:
+            while True:
+                stmt = (
+                    select(LLMJobRecord)
+                    .where(
+                        sa.or_(
+                            LLMJobRecord.status == JobStatus.PENDING,
+                            sa.and_(
+                                LLMJobRecord.status == JobStatus.RUNNING,
+                                LLMJobRecord.lease_expires_at < func.now()
+                            )
+                        )
+                    )
+                    .order_by(effective_priority.desc(), LLMJobRecord.id)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if lanes:
+                    stmt = stmt.where(LLMJobRecord.lane.in_(lanes))
+                result = await db.execute(stmt)
+                record = result.scalar_one_or_none()
+                if not record:
+                    await db.commit()
+                    return None
+
+                if record.attempts >= max_attempts:
+                    logger.warning(f"[JobStore] Job {record.id} exceeded max attempts ({record.attempts}). Marking FAILED.")
+                    record.status = JobStatus.FAILED
+                    record.last_error = record.last_error or "Lease expired too many times"
+                    record.locked_by = None
+                    record.lease_expires_at = None
+                    await db.commit()
+                    continue
+
+                if record.status == JobStatus.RUNNING:
+                    logger.warning(f"[JobStore] Re-claiming job {record.id} (expired lease from {record.locked_by})")
+
+                record.status = JobStatus.RUNNING
+                record.attempts += 1
+                record.locked_by = worker_name
+                record.lease_expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=lease_seconds)
+                await db.commit()
+                await db.refresh(record)
+                return record
+
+    @staticmethod
+    async def renew_lease(job_id: int, worker_name: str, lease_seconds: int) -> bool:
+        """실행 중인 작업의 lease 를 연장합니다. 다른 워커가 가져간 경우 False."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(LLMJobRecord)
+                .where(LLMJobRecord.id == job_id, LLMJobRecord.locked_by == worker_name)
+                .values(lease_expires_at=func.now() + datetime.timedelta(seconds=lease_seconds))
+            )
+            await db.commit()
+            return result.rowcount > 0
+
+    @staticmethod
+    async def attach_subscriber(dedup_key: str, channel_id: int, message_id: int) -> Optional[int]:
+        """
+        같은 dedup_key 로 대기/실행 중인 작업이 있으면 요청 메시지를 subscriber 로 추가합니다.
+        Returns: 합류한 작업 ID (진행 중인 작업이 없으면 None)
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(LLMJobRecord)
+                .where(
+                    LLMJobRecord.dedup_key == dedup_key,
+                    LLMJobRecord.status.in_([JobStatus.PENDING, JobStatus.RUNNING])
+                )
+                .order_by(LLMJobRecord.id.desc())
+                .limit(1)
+                .with_for_update()
+            )
+            record = result.scalar_one_or_none()
+            if not record:
+                await db.commit()
+                return None
+
+            subscriber = {"channel_id": channel_id, "message_id": message_id}
+            already_attached = record.context_message_id == message_id or subscriber in (record.subscribers or [])
+            if not already_attached:
+                # JSONB 컬럼은 새 리스트를 할당해야 변경이 감지됨
+                record.subscribers = list(record.subscribers or []) + [subscriber]
+            await db.commit()
+            return record.id
+
+    @staticmethod
+    async def complete(job_id: int, worker_name: str) -> Optional[List[dict]]:
+        """
+        작업을 완료 처리하고, 알림을 보내야 할 subscriber 목록을 반환합니다.
+        lease 를 잃어 완료 처리하지 못했으면 None.
+        """
+        return await JobStore._finish(job_id, worker_name, JobStatus.DONE)
+
+    @staticmethod
+    async def fail(job_id: int, worker_name: str, error: str) -> Optional[List[dict]]:
+        return await JobStore._finish(job_id, worker_name, JobStatus.FAILED, error)
+
+    @staticmethod
+    async def _finish(job_id: int, worker_name: str, status: JobStatus, error: str = None) -> Optional[List[dict]]:
+        """
+        lease 를 가진 워커만 작업을 마무리할 수 있습니다.
+        lease 가 만료되어 다른 워커가 재claim 한 작업이면 아무것도 바꾸지 않고 None 을 반환합니다.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(LLMJobRecord)
+                .where(LLMJobRecord.id == job_id, LLMJobRecord.locked_by == worker_name)
+                .values(status=status, locked_by=None, lease_expires_at=None, last_error=error)
+                .returning(LLMJobRecord.subscribers)
+            )
+            row = result.first()
+            await db.commit()
+            if row is None:
+                logger.warning(f"[JobStore] Job {job_id} is no longer leased by {worker_name}. Skipping {status.value}.")
+                return None
+            return row[0] or []
+
+    @staticmethod
+    async def count_pending() -> int:
+        """아직 claim 되지 않은 대기 작업 수"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(func.count(LLMJobRecord.id)).where(LLMJobRecord.status == JobStatus.PENDING)
+            )
+            return result.scalar() or 0
@@ -0,0 +1,107 @@
+import re
+import json
+from typing import Any, List, Optional, Tuple
+
+_FENCE_RE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_CLOSERS = {"{": "}", "[": "]"}
+
+def _scan(text: str, start: int) -> Tuple[Optional[int], List[str], bool, Optional[Tuple[int, List[str]]]]:
+    """
+    start 위치의 '{' 또는 '[' 부터 문자열/이스케이프를 고려하여 괄호 짝을 맞춰 갑니다.
+    Returns: (완결된 값의 끝 인덱스 | None, 닫히지 않은 괄호 스택, 문자열 안에서 끝났는지, 마지막 안전 절단 지점)
+    안전 절단 지점은 컨테이너 안의 마지막 ',' 위치 (그 앞까지는 완결된 항목들)
+    """
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    last_safe = None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack or stack[-1] != ch:
+                return None, stack, False, last_safe  # 괄호 불일치
+            stack.pop()
+            if not stack:
+                return i + 1, stack, False, last_safe
+        elif ch == ",":
+            last_safe = (i, list(stack))
+    return None, stack, in_string, last_safe
+
+def _loads(candidate: str) -> Any:
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    # LLM 이 자주 남기는 trailing comma 보정
+    repaired = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    if repaired != candidate:
+        try:
+            return json.loads(repaired)
+        except json.JSONDecodeError:
+            pass
+    return None
+
+def _clean(text: str) -> str:
+    return _FENCE_RE.sub("", text or "")
+
+def extract_json(text: str, open_char: str = "{") -> Any:
+    """
+    LLM 응답에서 첫 번째 완결된 JSON 객체/배열을 찾아 파싱합니다.
+    코드 펜스, 앞뒤 설명 문장, 문자열 안의 괄호, trailing comma 를 허용합니다. 실패 시 None.
+    """
+    text = _clean(text)
+    start = text.find(open_char)
+    while start != -1:
+        end, _, _, _ = _scan(text, start)
+        if end is not None:
+            value = _loads(text[start:end])
+            if value is not None:
+                return value
+        start = text.find(open_char, start + 1)
+    return None
+
+def parse_partial_json(text: str, open_char: str = "{") -> Any:
+    """
+    스트리밍 중인(아직 끝나지 않은) JSON 을 최대한 파싱합니다.
+    열린 문자열/괄호를 닫아 보고, 안 되면 마지막으로 완결된 항목까지만 사용합니다.
+    예: '{"report": "# 제목\\n본문 일' -> {"report": "# 제목\\n본문 일"}
+    """
+    text = _clean(text)
+    start = text.find(open_char)
+    if start == -1:
+        return None
+    end, stack, in_string, last_safe = _scan(text, start)
+    if end is not None:
+        return _loads(text[start:end])
+
+    body = text[start:]
+    closers = "".join(reversed(stack))
+    candidates = []
+    if in_string:
+        # 끝에 걸린 이스케이프 문자(\)는 버리고 문자열을 닫음
+        partial = body[:-1] if body.endswith("\\") and not body.endswith("\\\\") else body
+        candidates.append(partial + '"' + closers)
+    candidates.append(body.rstrip().rstrip(",") + closers)
+    if last_safe:
+        cut, safe_stack = last_safe
+        candidates.append(text[start:cut] + "".join(reversed(safe_stack)))
+    candidates.append(open_char + _CLOSERS[open_char])
+
+    for candidate in candidates:
+        value = _loads(candidate)
+        if value is not None:
+            return value
+    return None
@@ -0,0 +1,310 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+class TokenBucket:
+    """분당 한도(capacity)를 초당 capacity/60 속도로 채우는 토큰 버킷"""
+
+    def __init__(self, per_minute: Optional[int]):
+        self.capacity = per_minute
+        self.tokens = float(per_minute or 0)
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.capacity / 60.0)
+        self.updated_at = now
+
+    def available(self, amount: float) -> bool:
+        if not self.capacity:
+            return True  # 한도 미설정
+        self._refill()
+        return self.tokens >= min(amount, self.capacity)
+
+    def consume(self, amount: float):
+        if not self.capacity:
+            return
+        self._refill()
+        self.tokens -= amount  # 실제 사용량 보정으로 음수가 될 수 있음 (다음 refill 까지 대기)
+
+    def level(self) -> Optional[float]:
+        if not self.capacity:
+            return None
+        self._refill()
+        return round(self.tokens, 1)
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 threshold 에 도달하면 OPEN (호출 차단), reset_seconds 후 HALF_OPEN 에서
+    한 번 시도를 허용하고 성공하면 CLOSED 로 복귀합니다.
+    probe 결과가 reset_seconds 안에 보고되지 않으면 (취소 등) 다음 probe 를 허용합니다.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self.probe_started_at = now
+                return True
+            if self.state == self.HALF_OPEN and now - self.probe_started_at >= self.reset_seconds:
+                # 이전 probe 가 결과를 보고하지 않음 → 서킷이 HALF_OPEN 에 고정되지 않도록 새 probe 허용
+                logger.warning("[CircuitBreaker] HALF_OPEN probe 응답 없음 - 새 probe 허용")
+                self.probe_started_at = now
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"[CircuitBreaker] OPEN (연속 실패 {self.failures}회, {self.reset_seconds}s 후 재시도)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_cancelled(self):
+        """
+        결과 없이 취소된 호출 (예: hedge 에서 Gemini 가 먼저 응답).
+        HALF_OPEN probe 였다면 성공/실패를 알 수 없으므로 OPEN 으로 되돌리고 cooldown 을 새로 시작합니다.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class LatencyTracker:
+    """최근 N개 응답 지연시간(초)을 보관하고 percentile 을 계산합니다 (hedged request 기준값)."""
+
+    def __init__(self, window: int = 100, min_samples: int = 5):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """샘플이 min_samples 미만이면 None"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[idx]
+
+    def hedge_delay(self, pct: float, min_delay: float, max_delay: float) -> float:
+        """P(pct) 지연시간을 [min_delay, max_delay] 로 제한 (샘플 부족 시 max_delay)"""
+        value = self.percentile(pct)
+        if value is None:
+            return max_delay
+        return min(max_delay, max(min_delay, value))
+
+    def snapshot(self) -> dict:
+        return {
+            "samples": len(self.samples),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class KeyState:
+    """API 키 하나의 예산(RPM/TPM), 최근 결과, cooldown 상태"""
+    WINDOW_SECONDS = 300  # 최근 오류율 계산 구간
+
+    def __init__(self, index: int, key: str, rpm: Optional[int], tpm: Optional[int]):
+        self.index = index
+        self.key = key
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.recent = deque()  # (timestamp, ok)
+        self.total_requests = 0
+        self.total_errors = 0
+        self.last_error = None
+
+    @property
+    def label(self) -> str:
+        return f"Key #{self.index + 1}"
+
+    def _trim(self, now):
+        while self.recent and now - self.recent[0][0] > self.WINDOW_SECONDS:
+            self.recent.popleft()
+
+    def error_rate(self) -> float:
+        now = time.monotonic()
+        self._trim(now)
+        if not self.recent:
+            return 0.0
+        return sum(1 for _, ok in self.recent if not ok) / len(self.recent)
+
+    def in_cooldown(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+
+class KeyScheduler:
+    """
+    여러 Gemini 키 중 건강한 키를 골라주는 스케줄러.
+    - 키별 RPM/TPM 토큰 버킷으로 한도 초과 전에 다른 키로 분산
+    - 429 / 5xx / 401·403 응답 시 cooldown (Retry-After 우선)
+    - 건강한 키들 사이에서는 오류율이 낮은 순, 같으면 round-robin
+    """
+
+    def __init__(self, name: str, keys: List[str], rpm: int = None, tpm: int = None, cooldown_seconds: float = 60):
+        self.name = name
+        self.cooldown_seconds = cooldown_seconds
+        self.states = [KeyState(i, k, rpm, tpm) for i, k in enumerate(keys)]
+        self._rr = 0
+        self._lock = threading.Lock()
+
+    def candidates(self, estimated_tokens: int = 0) -> List[KeyState]:
+        """
+        이번 요청에 시도할 키 목록 (우선순위 순).
+        cooldown 중이거나 예산이 부족한 키는 제외됩니다.
+        """
+        with self._lock:
+            n = len(self.states)
+            if n == 0:
+                return []
+            start = self._rr % n
+            self._rr += 1
+            rotated = self.states[start:] + self.states[:start]
+            healthy = [
+                s for s in rotated
+                if not s.in_cooldown() and s.rpm.available(1) and s.tpm.available(estimated_tokens)
+            ]
+            # sorted 는 stable 하므로 오류율이 같으면 round-robin 순서 유지
+            return sorted(healthy, key=lambda s: round(s.error_rate(), 1))
+
+    def reserve(self, state: KeyState, estimated_tokens: int = 0):
+        """요청 직전에 예산을 차감합니다."""
+        with self._lock:
+            state.rpm.consume(1)
+            state.tpm.consume(estimated_tokens)
+            state.total_requests += 1
+
+    def record_success(self, state: KeyState, estimated_tokens: int = 0, used_tokens: int = None):
+        with self._lock:
+            if used_tokens is not None:
+                state.tpm.consume(used_tokens - estimated_tokens)  # 추정치와 실제 사용량 차이 보정
+            state.consecutive_failures = 0
+            state.recent.append((time.monotonic(), True))
+
+    def record_failure(self, state: KeyState, error: Exception):
+        status = getattr(error, "status_code", None)
+        retry_after = self._retry_after(error)
+        with self._lock:
+            state.total_errors += 1
+            state.consecutive_failures += 1
+            state.last_error = f"{status or ''} {str(error)[:120]}".strip()
+            state.recent.append((time.monotonic(), False))
+
+            if status == 429:
+                cooldown = retry_after or self.cooldown_seconds
+            elif status in (401, 403):
+                cooldown = self.cooldown_seconds * 30  # 키 폐기/권한 문제: 길게 제외
+            elif status is None or status >= 500:
+                # 네트워크/서버 오류: 연속 실패할수록 길게 (exponential)
+                cooldown = min(self.cooldown_seconds, 2 ** state.consecutive_failures)
+            else:
+                cooldown = 0  # 400 등 요청 자체의 문제는 키 상태와 무관
+            if cooldown:
+                state.cooldown_until = time.monotonic() + cooldown
+                logger.warning(f"[KeyScheduler:{self.name}] {state.label} cooldown {cooldown:.0f}s (status={status})")
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def snapshot(self) -> List[dict]:
+        """키별 상태 (메트릭/모니터링용, 키 값은 마스킹)"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "key": s.label,
+                    "masked": f"...{s.key[-4:]}" if s.key else "",
+                    "rpm_remaining": s.rpm.level(),
+                    "tpm_remaining": s.tpm.level(),
+                    "cooldown_remaining": max(0, round(s.cooldown_until - now, 1)),
+                    "error_rate_5m": round(s.error_rate(), 3),
+                    "consecutive_failures": s.consecutive_failures,
+                    "total_requests": s.total_requests,
+                    "total_errors": s.total_errors,
+                    "last_error": s.last_error,
+                }
+                for s in self.states
+            ]
+
+
+_schedulers: Dict[str, KeyScheduler] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+
+def get_key_scheduler(name: str = "chat") -> KeyScheduler:
+    """프로세스 전역 스케줄러 ('chat' / 'embedding'). 동기/비동기 AIAgent 가 상태를 공유합니다."""
+    if name not in _schedulers:
+        from src.config import (
+            GEMINI_API_KEYS, GEMINI_KEY_RPM, GEMINI_KEY_TPM, GEMINI_KEY_COOLDOWN_SECONDS, EMBEDDING_KEY_RPM
+        )
+        if name == "embedding":
+            _schedulers[name] = KeyScheduler(name, GEMINI_API_KEYS, rpm=EMBEDDING_KEY_RPM, cooldown_seconds=GEMINI_KEY_COOLDOWN_SECONDS)
+        else:
+            _schedulers[name] = KeyScheduler(name, GEMINI_API_KEYS, rpm=GEMINI_KEY_RPM, tpm=GEMINI_KEY_TPM, cooldown_seconds=GEMINI_KEY_COOLDOWN_SECONDS)
+    return _schedulers[name]
+
+def get_circuit_breaker(name: str = "local_llm") -> CircuitBreaker:
+    if name not in _breakers:
+        from src.config import LOCAL_LLM_BREAKER_THRESHOLD, LOCAL_LLM_BREAKER_RESET_SECONDS
+        _breakers[name] = CircuitBreaker(LOCAL_LLM_BREAKER_THRESHOLD, LOCAL_LLM_BREAKER_RESET_SECONDS)
+    return _breakers[name]
+
+def get_latency_tracker(name: str = "gemini") -> LatencyTracker:
+    if name not in _latencies:
+        _latencies[name] = LatencyTracker()
+    return _latencies[name]
+
+def get_llm_metrics() -> dict:
+    """생성된 스케줄러/서킷 브레이커 상태 모음"""
+    return {
+        "schedulers": {name: s.snapshot() for name, s in _schedulers.items()},
+        "circuit_breakers": {name: b.snapshot() for name, b in _breakers.items()},
+        "latency": {name: t.snapshot() for name, t in _latencies.items()},
+    }
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+class LLMCache:
+    """
+    LLM 응답을 디스크(SQLite)에 저장하는 content-addressed 캐시.
+    키 = sha256(namespace, prompt version, model, temperature, messages)
+    TTL 과 최대 항목 수(LRU) 기준으로 정리하며, hit/miss 카운터를 함께 저장합니다.
+    봇과 API 컨테이너가 같은 파일을 공유할 수 있도록 WAL 모드를 사용합니다.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _get_conn(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, namespace TEXT, model TEXT, response TEXT,"
+                " created_at REAL, last_accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(last_accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_cache_stats (namespace TEXT PRIMARY KEY, hits INTEGER, misses INTEGER)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(namespace: str, version: int, model: str, temperature: float, payload) -> str:
+        raw = json.dumps(
+            {"ns": namespace, "v": version, "model": model, "t": temperature, "payload": payload},
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, namespace: str = "default") -> Optional[str]:
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                now = time.time()
+                hit = row is not None and (now - row[1]) <= self.ttl_seconds
+                if row is not None and not hit:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                if hit:
+                    conn.execute("UPDATE llm_cache SET last_accessed = ? WHERE key = ?", (now, key))
+                self._record(conn, namespace, hit)
+                conn.commit()
+                return row[0] if hit else None
+        except Exception as e:
+            logger.warning(f"[LLMCache] 조회 실패: {e}")
+            return None
+
+    def set(self, key: str, response: str, namespace: str = "default", model: str = None):
+        if not response:
+            return
+        try:
+            with self._lock:
+                conn = self._get_conn()
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, namespace, model, response, created_at, last_accessed)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, namespace, model, response, now, now)
+                )
+                self._evict(conn, now)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"[LLMCache] 저장 실패: {e}")
+
+    def _record(self, conn, namespace: str, hit: bool):
+        conn.execute(
+            "INSERT INTO llm_cache_stats (namespace, hits, misses) VALUES (?, ?, ?)"
+            " ON CONFLICT(namespace) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+            (namespace, 1 if hit else 0, 0 if hit else 1)
+        )
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_accessed LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self) -> dict:
+        """namespace 별 hit/miss 와 저장된 항목 수"""
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute("SELECT namespace, hits, misses FROM llm_cache_stats").fetchall()
+            entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "namespaces": {ns: {"hits": hits, "misses": misses} for ns, hits, misses in rows},
+        }
+
+_default_cache = None
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """설정 기반의 공유 캐시 인스턴스 (비활성화 시 None)"""
+    global _default_cache
+    from src.config import CACHE_DIR, LLM_CACHE_ENABLED, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _default_cache is None:
+        _default_cache = LLMCache(
+            os.path.join(CACHE_DIR, "llm_cache.sqlite3"),
+            ttl_seconds=LLM_CACHE_TTL_SECONDS,
+            max_entries=LLM_CACHE_MAX_ENTRIES
+        )
+    return _default_cache
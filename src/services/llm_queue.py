@@ -2,9 +2,12 @@ import asyncio
 import os
 import re
 import datetime
+import socket
 from dataclasses import dataclass
-from typing import Any, Callable, Optional
+from typing import Any, Callable, Dict, List, Optional
 import discord
+from src.services.job_store import JobStore
+from src.services.streaming_reply import StreamingReply, split_message
 from src.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,38 +18,264 @@ class LLMJob:
     payload: Any
     context: Optional[discord.Message] = None
     on_complete: Optional[Callable] = None
+    id: Optional[int] = None  # llm_jobs 테이블 ID (enqueue 후 설정됨)
+    priority: Optional[int] = None  # None = JOB_PRIORITIES 기본값
+    dedup_key: Optional[str] = None  # 같은 키의 진행 중 작업이 있으면 중복 요청을 병합
 
 class LLMQueue:
+    """
+    Postgres(llm_jobs 테이블) 기반의 영속 작업 큐.
+    봇이 재시작되어도 대기 중인 작업이 유지되며, 여러 워커 프로세스가 같은 테이블에서
+    FOR UPDATE SKIP LOCKED 로 작업을 나눠 가져갑니다.
+
+    작업은 lane 별 워커 풀에서 처리됩니다.
+    - interactive: !ask 처럼 사용자가 기다리는 짧은 작업 전용 워커
+    - batch: summary / deep_dive / weekly. batch 워커는 대기 중인 interactive 작업도 우선 처리합니다.
+    같은 lane 안에서는 우선순위가 높은 작업부터, 오래 기다린 작업은 aging 으로 우선순위가 올라갑니다.
+    """
+    JOB_LANES = {
+        'ask': 'interactive',
+        'summary': 'batch',
+        'deep_dive': 'batch',
+        'weekly': 'batch',
+    }
+    JOB_PRIORITIES = {
+        'ask': 10,
+        'summary': 5,
+        'deep_dive': 2,
+        'weekly': 0,
+    }
+    # lane 별 워커가 claim 할 수 있는 lane 목록
+    LANE_CLAIMS = {
+        'interactive': ['interactive'],
+        'batch': ['batch', 'interactive'],
+    }
+
     def __init__(self, bot):
-        from src.config import LLM_CONCURRENCY, OUTPUT_CHANNEL_ID
+        from src.config import (
+            OUTPUT_CHANNEL_ID, LLM_INTERACTIVE_CONCURRENCY, LLM_BATCH_CONCURRENCY,
+            LLM_JOB_LEASE_SECONDS, LLM_JOB_POLL_INTERVAL, LLM_JOB_MAX_ATTEMPTS, LLM_JOB_AGING_SECONDS,
+            LLM_HEDGE_JOB_TYPES, DISCORD_STREAM_EDIT_INTERVAL
+        )
         self.bot = bot
-        self.queue = asyncio.Queue()
         self.is_running = True
-        self.concurrency = LLM_CONCURRENCY
+        self.lane_concurrency = {
+            'interactive': LLM_INTERACTIVE_CONCURRENCY,
+            'batch': LLM_BATCH_CONCURRENCY,
+        }
+        self.concurrency = sum(self.lane_concurrency.values())
+        self.aging_seconds = LLM_JOB_AGING_SECONDS
         self.output_channel_id = OUTPUT_CHANNEL_ID
+        self.lease_seconds = LLM_JOB_LEASE_SECONDS
+        self.poll_interval = LLM_JOB_POLL_INTERVAL
+        self.max_attempts = LLM_JOB_MAX_ATTEMPTS
+        # Gemini 지연 시 Local LLM 에도 동시 요청(hedge)할 작업 유형. batch 작업은 이중 호출 비용을 피하기 위해 기본 제외
+        self.hedge_job_types = set(LLM_HEDGE_JOB_TYPES)
+        self.stream_edit_interval = DISCORD_STREAM_EDIT_INTERVAL
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._pending_count = 0
+        self._callbacks = {}  # job_id -> on_complete (프로세스 로컬, 영속화되지 않음)
+        # enqueue 전(콘텐츠 추출 중) 단계의 요청: dedup_key -> 합류한 메시지 목록
+        self._reserved: Dict[str, List[discord.Message]] = {}
 
     def qsize(self):
-        return self.queue.qsize()
+        """마지막으로 확인한 대기 작업 수 (동기 호출용 캐시 값)"""
+        return self._pending_count
+
+    async def _refresh_qsize(self):
+        try:
+            self._pending_count = await JobStore.count_pending()
+        except Exception as e:
+            logger.warning(f"[Queue] 대기열 크기 조회 실패: {e}")
+        return self._pending_count
+
+    @staticmethod
+    def dedup_key(job_type: str, url: str) -> str:
+        from src.services.content_extractor import ContentExtractor
+        return f"{job_type}:{ContentExtractor.normalize_url(url)}"
+
+    async def release(self, key: str, error: str = None):
+        """
+        enqueue 없이 선점을 해제합니다 (추출 실패 등).
+        합류해 있던 요청들에는 실패를 알립니다.
+        """
+        waiters = self._reserved.pop(key, [])
+        for message in waiters:
+            try:
+                await message.remove_reaction("⏳", self.bot.user)
+                await message.add_reaction("❌")
+                if error:
+                    await message.channel.send(f"⚠️ {error}")
+            except: pass
+
+    async def attach(self, key: str, message: discord.Message) -> bool:
+        """
+        같은 키의 요청이 이미 진행 중이면 해당 작업에 합류시킵니다.
+        진행 중인 요청이 없으면 (await 전에) 키를 선점하여, 추출 중 들어온 같은 요청이 합류할 수 있게 합니다.
+        Returns: 합류했으면 True (호출자는 추출/enqueue 를 생략)
+                 False 이거나 예외가 발생하면 선점한 상태이므로 호출자가 add_job() 또는 release() 를 호출해야 함
+        """
+        if key in self._reserved:
+            waiters = self._reserved[key]
+            if all(m.id != message.id for m in waiters):
+                waiters.append(message)
+            job_id = None
+        else:
+            # 확인과 선점을 await 없이 처리 → 동시에 들어온 같은 요청은 위 분기에서 합류
+            self._reserved[key] = []
+            job_id = await JobStore.attach_subscriber(key, message.channel.id, message.id)
+            if job_id is None:
+                return False
+            # DB 에 이미 작업이 있음 → 선점 해제, 그 사이 합류한 요청도 같은 작업의 subscriber 로 등록
+            for waiter in self._reserved.pop(key, []):
+                try:
+                    await JobStore.attach_subscriber(key, waiter.channel.id, waiter.id)
+                except Exception as e:
+                    logger.warning(f"[Queue] 중복 요청 병합 실패 ({key}, message={waiter.id}): {e}")
+
+        logger.info(f"[Queue] 중복 요청 병합: {key} (Job #{job_id or 'extracting'})")
+        try:
+            await message.add_reaction("⏳")
+        except: pass
+        return True
 
     def start(self):
-        """설정된 동시성만큼 워커 스레드를 시작합니다."""
-        logger.info(f"[Queue] 워커 시작 (Concurrency: {self.concurrency})")
-        for i in range(self.concurrency):
-            self.bot.loop.create_task(self.worker(i + 1))
+        """lane 별로 설정된 동시성만큼 워커 태스크를 시작합니다."""
+        logger.info(f"[Queue] 워커 시작 (Lanes: {self.lane_concurrency}, Lease: {self.lease_seconds}s)")
+        for lane, count in self.lane_concurrency.items():
+            for i in range(count):
+                self.bot.loop.create_task(self.worker(f"{lane}-{i + 1}", lane))
 
     async def add_job(self, job: LLMJob):
-        await self.queue.put(job)
+        # 추출 중 합류한 요청들은 subscriber 로 함께 저장 (완료 시 워커가 알림)
+        waiters = self._reserved.pop(job.dedup_key, []) if job.dedup_key else []
+        subscribers = [
+            {"channel_id": m.channel.id, "message_id": m.id}
+            for m in waiters if not job.context or m.id != job.context.id
+        ]
+        lane = self.JOB_LANES.get(job.type, 'batch')
+        priority = job.priority if job.priority is not None else self.JOB_PRIORITIES.get(job.type, 0)
+        try:
+            record = await JobStore.enqueue(
+                job_type=job.type,
+                payload=job.payload,
+                context_channel_id=job.context.channel.id if job.context else None,
+                context_message_id=job.context.id if job.context else None,
+                lane=lane,
+                priority=priority,
+                dedup_key=job.dedup_key,
+                subscribers=subscribers
+            )
+        except Exception:
+            if job.dedup_key:
+                self._reserved[job.dedup_key] = waiters  # 호출자의 release() 가 실패를 알릴 수 있도록 복원
+            raise
+        job.id = record.id
+        if job.on_complete:
+            self._callbacks[job.id] = job.on_complete
+        self._wakeup.set()
+
         if job.context:
             try:
                 await job.context.add_reaction("⏳")
             except: pass
-        logger.info(f"[Queue] 작업 추가됨: {job.type}. 대기열 크기: {self.queue.qsize()}")
+        await self._refresh_qsize()
+        logger.info(f"[Queue] 작업 추가됨: {job.type} (Job #{job.id}, lane={lane}, priority={priority}). 대기열 크기: {self.qsize()}")
+        return job
 
-    async def worker(self, worker_id):
-        logger.info(f"[Queue] Worker-{worker_id} 시작.")
+    async def _wait_for_jobs(self):
+        """새 작업 알림 또는 polling 주기까지 대기 (다른 프로세스가 넣은 작업도 polling 으로 감지)"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _load_job(self, record) -> LLMJob:
+        """DB 레코드를 LLMJob 으로 복원 (디스코드 메시지 컨텍스트는 ID로 다시 fetch)"""
+        context = None
+        if record.context_channel_id and record.context_message_id:
+            try:
+                channel = self.bot.get_channel(record.context_channel_id) or await self.bot.fetch_channel(record.context_channel_id)
+                context = await channel.fetch_message(record.context_message_id)
+            except Exception as e:
+                logger.warning(f"[Queue] Job #{record.id} 컨텍스트 메시지 복원 실패: {e}")
+        return LLMJob(
+            type=record.job_type,
+            payload=record.payload,
+            context=context,
+            on_complete=self._callbacks.pop(record.id, None),
+            id=record.id,
+            priority=record.priority,
+            dedup_key=record.dedup_key
+        )
+
+    async def _keep_lease(self, job_id, worker_name, processing: asyncio.Task):
+        """
+        작업이 끝날 때까지 주기적으로 lease 를 연장합니다.
+        lease 를 잃으면 (다른 워커가 재claim) 같은 작업이 두 번 실행되지 않도록 처리 태스크를 취소하고 반환합니다.
+        """
+        interval = max(self.lease_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await JobStore.renew_lease(job_id, worker_name, self.lease_seconds):
+                    logger.warning(f"[Queue] Job #{job_id} lease 를 잃었습니다 (다른 워커가 재claim). 처리를 중단합니다.")
+                    processing.cancel()
+                    return
+            except Exception as e:
+                logger.warning(f"[Queue] Job #{job_id} lease 연장 실패: {e}")
+
+    async def _dispatch(self, job: LLMJob):
+        if job.type == 'summary':
+            await self._process_summary(job)
+        elif job.type == 'deep_dive':
+            await self._process_deep_dive(job)
+        elif job.type == 'ask':
+            await self._process_ask(job)
+        elif job.type == 'weekly':
+            await self._process_weekly(job)
+
+    async def _notify_subscribers(self, job: LLMJob, subscribers: List[dict], success: bool):
+        """중복 요청으로 합류한 메시지들에 작업 결과를 알립니다."""
+        for sub in subscribers:
+            try:
+                channel = self.bot.get_channel(sub['channel_id']) or await self.bot.fetch_channel(sub['channel_id'])
+                message = await channel.fetch_message(sub['message_id'])
+                await message.remove_reaction("⏳", self.bot.user)
+                if success:
+                    await message.add_reaction("✅")
+                    await message.reply("✅ 같은 링크에 대한 작업이 완료되었습니다. (서머리 채널 확인)")
+                else:
+                    await message.add_reaction("❌")
+            except Exception as e:
+                logger.warning(f"[Queue] Job #{job.id} subscriber 알림 실패: {e}")
+
+    async def worker(self, worker_id, lane=None):
+        worker_name = f"{self.worker_prefix}:{worker_id}"
+        lanes = self.LANE_CLAIMS.get(lane) if lane else None
+        logger.info(f"[Queue] Worker-{worker_id} 시작 ({worker_name}, lanes={lanes or 'all'}).")
         while self.is_running:
-            job = await self.queue.get()
-            logger.info(f"[Queue][Worker-{worker_id}] 작업 처리 시작: {job.type}")
+            try:
+                record = await JobStore.claim(
+                    worker_name, self.lease_seconds, self.max_attempts,
+                    lanes=lanes, aging_seconds=self.aging_seconds
+                )
+            except Exception as e:
+                logger.error(f"[Queue][Worker-{worker_id}] 작업 claim 실패: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if not record:
+                await self._wait_for_jobs()
+                continue
+
+            await self._refresh_qsize()
+            job = await self._load_job(record)
+            logger.info(f"[Queue][Worker-{worker_id}] 작업 처리 시작: {job.type} (Job #{job.id}, 시도 {record.attempts})")
+            processing = asyncio.create_task(self._dispatch(job))
+            lease_task = asyncio.create_task(self._keep_lease(job.id, worker_name, processing))
             
             try:
                 if job.context:
@@ -55,16 +284,29 @@ class LLMQueue:
                         await job.context.add_reaction("🔄")
                     except: pass
 
-                if job.type == 'summary':
-                    await self._process_summary(job)
-                elif job.type == 'deep_dive':
-                    await self._process_deep_dive(job)
-                elif job.type == 'ask':
-                    await self._process_ask(job)
-                elif job.type == 'weekly':
-                    await self._process_weekly(job)
+                try:
+                    await processing
+                except asyncio.CancelledError:
+                    if not lease_task.done() or lease_task.cancelled():
+                        raise  # 워커 자체가 취소됨 (종료)
+                    # lease 를 잃어 취소됨 → 작업은 재claim 한 워커가 마무리
+                    logger.warning(f"[Queue][Worker-{worker_id}] 작업 중단: {job.type} (Job #{job.id}, lease 만료)")
+                    continue
                 
-                logger.info(f"[Queue][Worker-{worker_id}] 작업 완료: {job.type}")
+                subscribers = await JobStore.complete(job.id, worker_name)
+                if subscribers is None:
+                    # 처리 중 lease 를 잃음 → 재claim 한 워커가 다시 실행하고 결과/알림을 처리
+                    logger.warning(f"[Queue][Worker-{worker_id}] 완료 기록 생략: {job.type} (Job #{job.id}, lease 만료)")
+                    continue
+                await self._notify_subscribers(job, subscribers, success=True)
+                logger.info(f"[Queue][Worker-{worker_id}] 작업 완료: {job.type} (Job #{job.id})")
+                if job.on_complete:
+                    try:
+                        result = job.on_complete(job)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception as e:
+                        logger.warning(f"[Queue] on_complete 콜백 실패: {e}")
                 if job.context:
                     try:
                         await job.context.remove_reaction("🔄", self.bot.user)
@@ -73,6 +315,14 @@ class LLMQueue:
 
             except Exception as e:
                 logger.error(f"[Queue][Worker-{worker_id}] 작업 처리 중 오류 발생 ({job.type})", exc_info=True)
+                try:
+                    subscribers = await JobStore.fail(job.id, worker_name, str(e))
+                    if subscribers is None:
+                        # lease 를 잃음 → 재claim 한 워커가 다시 시도하므로 실패로 알리지 않음
+                        continue
+                    await self._notify_subscribers(job, subscribers, success=False)
+                except Exception as db_e:
+                    logger.error(f"[Queue] Job #{job.id} 실패 상태 기록 실패: {db_e}")
                 if job.context:
                     try:
                         await job.context.remove_reaction("🔄", self.bot.user)
@@ -80,13 +330,17 @@ class LLMQueue:
                         await job.context.channel.send(f"❌ 작업 중 오류 발생: {e}")
                     except: pass
             finally:
-                self.queue.task_done()
+                lease_task.cancel()
+                processing.cancel()
+
+    def _hedge(self, job) -> bool:
+        return job.type in self.hedge_job_types
 
     async def _process_summary(self, job):
         # payload: {'content': str, 'url': str, 'source_type': str}
         payload = job.payload
         logger.info(f"[_process_summary] LLM 분석 요청 시작 (길이: {len(payload['content'])})")
-        analysis = await asyncio.to_thread(self.bot.ai.analyze, payload['content'])
+        analysis = await self.bot.ai.analyze(payload['content'], hedge=self._hedge(job))
         logger.info("[_process_summary] LLM 분석 완료")
         
         if analysis:
@@ -94,6 +348,20 @@ class LLMQueue:
         else:
             raise Exception("AI 분석 결과가 비어있습니다.")
 
+    def _reply_channel(self, job):
+        """
+        결과를 알릴 채널: 요청 메시지의 채널, 재시작 후 메시지를 복원하지 못했으면 결과(서머리) 채널.
+        """
+        if job.context:
+            return job.context.channel
+        return self.bot.get_channel(self.output_channel_id)
+
+    def _streaming_reply(self, job, header: str) -> Optional[StreamingReply]:
+        """요청 메시지의 채널에 스트리밍 응답을 표시할 StreamingReply (요청 메시지가 없으면 None)"""
+        if not job.context:
+            return None
+        return StreamingReply(job.context.channel, header=header, interval=self.stream_edit_interval)
+
     async def _process_deep_dive(self, job):
         # payload: {'content': str, 'url': str}
         import re, datetime, os
@@ -101,37 +369,42 @@ class LLMQueue:
         
         payload = job.payload
         logger.info(f"[_process_deep_dive] LLM 심층 분석 요청 시작 (길이: {len(payload['content'])})")
-        deep_analysis = await asyncio.to_thread(self.bot.ai.deep_dive, payload['content'])
+        # 생성 중인 리포트를 요청 채널의 메시지 하나에 점진적으로 보여주고, 끝나면 완료 알림으로 바꿈
+        reply = self._streaming_reply(job, "📝 **Deep Dive 작성 중...**\n")
+        try:
+            # 리포트 + 제목 + 태그를 한 번의 구조화된 호출로 생성
+            structured = await self.bot.ai.deep_dive_structured(
+                payload['content'], hedge=self._hedge(job), on_update=reply.update if reply else None
+            )
+            if not structured or not structured.get('report'):
+                raise Exception("AI 심층 분석 결과가 비어있습니다.")
+        except Exception:
+            if reply:
+                await reply.discard()
+            raise
         logger.info("[_process_deep_dive] LLM 심층 분석 완료")
+        deep_analysis = structured['report']
+        tags = structured.get('tags') or []
 
-        if not deep_analysis:
-            raise Exception("AI 심층 분석 결과가 비어있습니다.")
-
-        # --- NEW: Generate Tags ---
-        logger.info("[_process_deep_dive] ==================== TAG GENERATION START ====================")
-        logger.info(f"[_process_deep_dive] Content length for tagging: {len(deep_analysis)} characters")
-        
-        tags = []
-        try:
-            logger.info("[_process_deep_dive] 태그 생성 시작...")
-            tags = await asyncio.to_thread(self.bot.ai.generate_tags, deep_analysis)
-            logger.info(f"[_process_deep_dive] ✅ 태그 생성 완료: {tags}")
-            logger.info(f"[_process_deep_dive] 태그 개수: {len(tags)}")
-        except Exception as e:
-            logger.error(f"[_process_deep_dive] ❌ 태그 생성 실패 (계속 진행): {e}", exc_info=True)
-            # Continue with empty tags - do not fail the entire Deep Dive
-        
+        if not tags:
+            # 구조화 응답에 태그가 없을 때만 별도 태그 생성 호출
+            try:
+                logger.info("[_process_deep_dive] 구조화 응답에 태그 없음 → 태그 생성 시작...")
+                tags = await self.bot.ai.generate_tags(deep_analysis)
+            except Exception as e:
+                logger.error(f"[_process_deep_dive] ❌ 태그 생성 실패 (계속 진행): {e}", exc_info=True)
+                # Continue with empty tags - do not fail the entire Deep Dive
         logger.info(f"[_process_deep_dive] DB 등록 시 전달할 태그: {tags}")
-        logger.info("[_process_deep_dive] ==================== TAG GENERATION END ====================")
-        # -------------------------
 
         date_str = datetime.datetime.now().strftime("%Y-%m-%d")
         
         # Title Extraction with DB Fallback
-        title_match = re.search(r'^#\s+(.+)', deep_analysis)
-        title = None
-        
-        if title_match:
+        title = structured.get('title')
+        title_match = None if title else re.search(r'^#\s+(.+)', deep_analysis)
+
+        if title:
+            logger.info(f"[_process_deep_dive] Title from structured response: {title}")
+        elif title_match:
             title = title_match.group(1).strip()
             logger.info(f"[_process_deep_dive] Title extracted from LLM: {title}")
         else:
@@ -225,24 +498,57 @@ class LLMQueue:
                 await out_channel.send(f"✅ **[Deep Dive] 분석 완료** ({drive_msg})\n원본: {payload['url']}\n\n{deep_analysis}")
 
         # 요청 채널(링크 공유 채널)에는 완료 알림 및 큐 상태 전송
-        await job.context.channel.send(f"✅ **Deep Dive 완료** (서머리 채널 확인)\n📉 남은 작업: {self.queue.qsize()}개")
+        done_msg = f"✅ **Deep Dive 완료** (서머리 채널 확인)\n📉 남은 작업: {self.qsize()}개"
+        # (요청 메시지를 복원하지 못한 작업은 reply 가 없음 → 위의 결과 채널 메시지로 대신함)
+        if reply:
+            await reply.finish(done_msg, header="")
+
+    @staticmethod
+    def _format_sources(sources: List[dict]) -> str:
+        """!ask 답변 아래에 붙일 출처 목록 ([n] 제목 <url>)"""
+        if not sources:
+            return ""
+        lines = [
+            f"[{src['n']}] {src['title']}" + (f" <{src['url']}>" if src.get('url') else "")
+            for src in sources
+        ]
+        return "\n\n📚 **출처:**\n" + "\n".join(lines)
 
     async def _process_ask(self, job):
-        # payload: {'query': str, 'docs': list}
+        # payload: {'query': str, 'docs': list, 'sources': list}
+        # docs 는 토큰 예산 안에서 조립된 "[n] 제목\n청크" 블록, sources 는 [n] 에 대응하는 문서 목록
         payload = job.payload
         logger.info(f"[_process_ask] 질문 처리 시작: {payload['query']}")
+        # 답변을 생성되는 대로 메시지 하나에 반영 (첫 토큰까지의 시간이 체감 지연시간이 됨)
+        reply = self._streaming_reply(job, "💡 **답변:**\n")
         try:
-            system_prompt = "Answer the question based strictly on the provided Context. Answer in Korean."
-            resp_content = await asyncio.to_thread(self.bot.ai.chat, messages=[
-                {"role": "user", "content": f"{system_prompt}\n\n---Context:\n{''.join(payload['docs'][:5])}\n\nQ: {payload['query']}"}
-            ], temperature=0.1)
+            system_prompt = (
+                "Answer the question based strictly on the provided Context. "
+                "Cite the supporting sources inline with their numbers, e.g. [1] or [2][3]. "
+                "If the Context does not contain the answer, say so. Answer in Korean."
+            )
+            context = "\n\n".join(payload['docs'])
+            resp_content = await self.bot.ai.chat(messages=[
+                {"role": "user", "content": f"{system_prompt}\n\n---Context:\n{context}\n\nQ: {payload['query']}"}
+            ], temperature=0.1, hedge=self._hedge(job), on_update=reply.update if reply else None)
             
             if not resp_content:
                 raise Exception("AI 답변 생성 실패 (Empty response)")
                 
             logger.info("[_process_ask] 답변 생성 완료")
-            await job.context.channel.send(f"💡 **답변:**\n{resp_content}")
+            answer = resp_content + self._format_sources(payload.get('sources'))
+            if reply:
+                await reply.finish(answer)
+            else:
+                # 요청 메시지를 복원하지 못한 작업 (재시작 후) → 결과 채널로 전송
+                channel = self._reply_channel(job)
+                if not channel:
+                    raise Exception("답변을 보낼 채널이 없습니다.")
+                for chunk in split_message(f"💡 **답변:**\n{answer}"):
+                    await channel.send(chunk)
         except Exception as e:
+            if reply:
+                await reply.discard()
             raise Exception(f"AI 답변 생성 실패: {e}")
 
     async def _process_weekly(self, job):
@@ -254,9 +560,9 @@ class LLMQueue:
         logger.info("[_process_weekly] 주간 리포트 생성 시작")
         try:
             system_prompt = "Summarize user's weekly tech learning trends in Korean. Group by topics."
-            report = await asyncio.to_thread(self.bot.ai.chat, messages=[
+            report = await self.bot.ai.chat(messages=[
                 {"role": "user", "content": f"{system_prompt}\n\n---Articles:\n{payload['context_text']}"}
-            ], temperature=0.3)
+            ], temperature=0.3, hedge=self._hedge(job))
 
             if not report:
                 raise Exception("AI 리포트 생성 실패 (Empty response)")
@@ -269,9 +575,12 @@ class LLMQueue:
             
             await asyncio.to_thread(self.bot.uploader.upload, filepath, "Weekly Report")
             
-            if len(report) > 1900:
-                await job.context.channel.send(f"✅ **주간 리포트 완료!** (파일 및 드라이브 저장됨)")
+            channel = self._reply_channel(job)
+            if not channel:
+                logger.warning("[_process_weekly] 알릴 채널이 없어 완료 메시지를 생략합니다.")
+            elif len(report) > 1900:
+                await channel.send(f"✅ **주간 리포트 완료!** (파일 및 드라이브 저장됨)")
             else:
-                await job.context.channel.send(f"📊 **주간 트렌드**\n{report}")
+                await channel.send(f"📊 **주간 트렌드**\n{report}")
         except Exception as e:
             raise Exception(f"주간 리포트 생성 실패: {e}")
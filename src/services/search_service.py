@@ -1,68 +1,491 @@
-from typing import List, Dict, Any
+import asyncio
+import numpy as np
+from typing import List, Dict, Any, Hashable, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text, func, literal, literal_column, or_
 from sqlalchemy.orm import selectinload
 from src.database.models import DocumentChunk, Document
-from src.services.ai_handler import AIAgent
+from src.services.ai_handler import AsyncAIAgent
+from src.services.embedding_cache import get_query_embedding_cache
 from src.logger import get_logger
 
 logger = get_logger(__name__)
 
+# 마이그레이션(f2c8a4e6b1d3)의 인덱스 식과 같아야 GIN 인덱스가 사용됨 (바인드 파라미터로 넘기면 안 됨)
+TS_CONFIG = literal_column("'simple'::regconfig")
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = 60) -> Dict[Hashable, float]:
+    """
+    Reciprocal Rank Fusion: 여러 순위 목록을 score(d) = Σ 1 / (k + rank(d)) 로 합칩니다 (rank 는 1부터).
+    점수 척도가 다른 검색(코사인 거리 vs ts_rank)을 정규화 없이 합칠 수 있습니다.
+    """
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return scores
+
+def group_by_document_rows(rows: Sequence[tuple], counts: Dict[int, int] = None) -> List[tuple]:
+    """
+    관련도 순으로 정렬된 (chunk, distance, score) 목록을 문서별 최고 청크 하나로 줄입니다 (순서 유지).
+    counts 를 넘기면 document_id -> 매칭 청크 수를 채웁니다.
+    """
+    counts = {} if counts is None else counts
+    best: List[tuple] = []
+    for row in rows:
+        document_id = row[0].document_id
+        if document_id not in counts:
+            best.append(row)
+        counts[document_id] = counts.get(document_id, 0) + 1
+    return best
+
+def mmr_select(query_embedding, candidate_embeddings, k: int, lambda_: float = 0.7, relevance=None) -> List[int]:
+    """
+    Maximal Marginal Relevance: λ·관련도 − (1−λ)·(이미 고른 후보와의 최대 유사도) 가 큰 순서로 k 개를 고릅니다.
+    유사도는 코사인 (정규화 후 행렬곱 한 번), relevance 를 넘기지 않으면 쿼리와의 코사인 유사도를 사용합니다.
+    임베딩이 없는 후보(None)는 영벡터로 취급합니다. Returns: 선택된 후보 인덱스 (선택 순)
+    """
+    n = len(candidate_embeddings)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    dim = len(query_embedding)
+    vectors = np.zeros((n, dim), dtype=np.float32)
+    for i, embedding in enumerate(candidate_embeddings):
+        if embedding is not None:
+            vectors[i] = embedding
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    if relevance is None:
+        relevance = vectors @ (query / query_norm) if query_norm > 0 else np.zeros(n, dtype=np.float32)
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    similarity = vectors @ vectors.T
+    max_similarity = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected: List[int] = []
+    for _ in range(k):
+        scores = np.where(available, lambda_ * relevance - (1 - lambda_) * max_similarity, -np.inf)
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    return selected
+
+def build_cited_context(results: Sequence[Dict[str, Any]], max_tokens: int) -> tuple:
+    """
+    검색 결과(관련도 순)로 토큰 예산 안의 LLM 컨텍스트를 만듭니다.
+    같은 문서의 청크는 같은 번호 [n] 을 공유하며, 답변에서 [n] 으로 인용할 수 있습니다.
+    예산을 넘는 청크는 경계 단위로 잘라 넣고, 남은 예산이 너무 작으면 중단합니다.
+    Returns: (블록 목록, 출처 목록 [{"n", "document_id", "title", "url"}])
+    """
+    from src.services.token_budget import count_tokens, trim_to_tokens
+    MIN_BLOCK_TOKENS = 100
+
+    blocks: List[str] = []
+    sources: List[Dict[str, Any]] = []
+    numbers: Dict[int, int] = {}
+    remaining = max_tokens
+    for item in results:
+        document_id = item["document_id"]
+        if document_id not in numbers:
+            numbers[document_id] = len(numbers) + 1
+        header = f"[{numbers[document_id]}] {item['document_title']}\n"
+        content = item["content"]
+        cost = count_tokens(header) + count_tokens(content)
+        if cost > remaining:
+            room = remaining - count_tokens(header)
+            if room < MIN_BLOCK_TOKENS:
+                break
+            content = trim_to_tokens(content, room)
+            cost = count_tokens(header) + count_tokens(content)
+        blocks.append(header + content)
+        remaining -= cost
+        if len(sources) < numbers[document_id]:
+            sources.append({
+                "n": numbers[document_id],
+                "document_id": document_id,
+                "title": item["document_title"],
+                "url": item.get("source_url"),
+            })
+    return blocks, sources
+
 class SearchService:
-    def __init__(self, db: AsyncSession):
+    MAX_EF_SEARCH = 1000  # pgvector hnsw.ef_search 상한
+    MODES = ("vector", "hybrid")
+
+    def __init__(self, db: AsyncSession, ef_search: int = None, session_factory=None, embedding_cache=None):
+        from src.config import (
+            SEARCH_HNSW_EF_SEARCH, SEARCH_RRF_K, SEARCH_HYBRID_CANDIDATES, SEARCH_TRGM_THRESHOLD, SEARCH_RERANK_CANDIDATES,
+            SEARCH_HNSW_ITERATIVE_SCAN
+        )
         self.db = db
-        self.ai_agent = AIAgent()
+        self.ai_agent = AsyncAIAgent()
+        self.ef_search = ef_search or SEARCH_HNSW_EF_SEARCH
+        self.rrf_k = SEARCH_RRF_K
+        self.hybrid_candidates = SEARCH_HYBRID_CANDIDATES
+        self.trgm_threshold = SEARCH_TRGM_THRESHOLD
+        self.rerank_candidates = SEARCH_RERANK_CANDIDATES
+        self.iterative_scan = SEARCH_HNSW_ITERATIVE_SCAN
+        # hybrid 검색에서 lexical 쿼리를 vector 쿼리와 동시에 실행할 별도 세션 (AsyncSession 은 동시 실행 불가)
+        if session_factory is None:
+            from src.database.engine import AsyncSessionLocal
+            session_factory = AsyncSessionLocal
+        self.session_factory = session_factory
+        # 요청 간에 공유되는 쿼리 임베딩 캐시 (페이지 이동/반복 검색 시 Gemini 호출 생략)
+        self.embedding_cache = embedding_cache or get_query_embedding_cache()
+
+    async def _embed_query(self, query: str):
+        return await self.embedding_cache.get_or_compute(query, self.ai_agent.generate_embedding)
+
+    async def _set_ef_search(self, ef_search: int, needed: int, db: AsyncSession = None):
+        """
+        현재 트랜잭션에만 hnsw.ef_search 를 적용합니다 (SET LOCAL).
+        HNSW 스캔은 최대 ef_search 개만 돌려주므로 offset + limit 보다 작으면 늘립니다.
+        """
+        ef = min(self.MAX_EF_SEARCH, max(ef_search or self.ef_search, needed))
+        # SET 은 바인드 파라미터를 받지 않으므로 정수로 검증된 값만 사용
+        await (db or self.db).execute(text(f"SET LOCAL hnsw.ef_search = {int(ef)}"))
+
+    @staticmethod
+    def _document_filter(filters: Dict[str, Any] = None):
+        """
+        문서 필터(doc_type, category, tag, created_after, created_before)를 청크 조건으로 변환합니다.
+        문서 목록 API 와 같은 DBService 조건을 문서 id 서브쿼리로 ANN/lexical 쿼리에 결합 (None = 필터 없음)
+        """
+        from src.services.db_service import DBService
+        conditions = DBService.document_filter_conditions(**{k: v for k, v in (filters or {}).items() if v})
+        if not conditions:
+            return None
+        return DocumentChunk.document_id.in_(select(Document.id).where(*conditions))
+
+    @staticmethod
+    def _format(chunk: DocumentChunk, distance: float = None, score: float = None) -> Dict[str, Any]:
+        return {
+            "chunk_id": chunk.id,
+            "document_id": chunk.document.id,
+            "document_title": chunk.document.title,
+            "source_url": chunk.document.source_url,
+            "content": chunk.content,
+            "distance": float(distance) if distance is not None else None,
+            "score": float(score) if score is not None else 1.0 - float(distance),
+        }
+
+    async def _vector_candidates(
+        self, db: AsyncSession, query_embedding, limit: int, offset: int = 0, threshold: float = None, ef_search: int = None,
+        document_filter=None
+    ) -> List[tuple]:
+        """HNSW 인덱스로 가까운 청크 조회. Returns: [(chunk, cosine_distance)]"""
+        await self._set_ef_search(ef_search, offset + limit, db)
+        if document_filter is not None and self.iterative_scan:
+            # 필터로 ef_search 후보가 대부분 걸러져도 인덱스를 계속 탐색해 페이지를 채움 (pgvector >= 0.8)
+            # strict_order: 거리 순서를 정확히 유지 (offset 페이지네이션과 호환)
+            await db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+        distance = DocumentChunk.embedding.cosine_distance(query_embedding)
+        stmt = (
+            select(DocumentChunk, distance.label("distance"))
+            .options(selectinload(DocumentChunk.document))
+            .order_by(distance)
+        )
+        if threshold is not None:
+            # 임계값을 SQL 에서 적용해야 offset/limit 페이지가 관련 결과만으로 채워짐
+            stmt = stmt.where(distance <= threshold)
+        if document_filter is not None:
+            stmt = stmt.where(document_filter)
+        stmt = stmt.offset(offset).limit(limit)
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def _lexical_candidates(self, db: AsyncSession, query: str, limit: int, document_filter=None) -> List[tuple]:
+        """
+        청크 본문 full-text (websearch 문법) 또는 trigram word similarity 매칭. Returns: [(chunk, rank)]
+        두 조건 모두 GIN 인덱스를 사용하며 (BitmapOr), 정확한 식별자/고유명사를 잡아냅니다.
+        """
+        tsv = func.to_tsvector(TS_CONFIG, DocumentChunk.content)
+        tsq = func.websearch_to_tsquery(TS_CONFIG, query)
+        rank = func.greatest(func.ts_rank_cd(tsv, tsq), func.word_similarity(query, DocumentChunk.content))
+        stmt = (
+            select(DocumentChunk, rank.label("rank"))
+            .options(selectinload(DocumentChunk.document))
+            .where(or_(tsv.op("@@")(tsq), literal(query).op("<%")(DocumentChunk.content)))
+            .order_by(rank.desc())
+            .limit(limit)
+        )
+        if document_filter is not None:
+            stmt = stmt.where(document_filter)
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def _title_candidates(self, db: AsyncSession, query: str, limit: int, document_filter=None) -> List[tuple]:
+        """제목이 매칭되는 문서의 첫 청크. Returns: [(chunk, rank)]"""
+        tsv = func.to_tsvector(TS_CONFIG, Document.title)
+        tsq = func.websearch_to_tsquery(TS_CONFIG, query)
+        rank = func.greatest(func.ts_rank_cd(tsv, tsq), func.word_similarity(query, Document.title))
+        stmt = (
+            select(DocumentChunk, rank.label("rank"))
+            .join(Document, DocumentChunk.document_id == Document.id)
+            .options(selectinload(DocumentChunk.document))
+            .where(or_(tsv.op("@@")(tsq), literal(query).op("<%")(Document.title)))
+            .where(DocumentChunk.chunk_index == 0)
+            .order_by(rank.desc())
+            .limit(limit)
+        )
+        if document_filter is not None:
+            stmt = stmt.where(document_filter)
+        result = await db.execute(stmt)
+        return result.all()
+
+    async def _lexical_search(self, query: str, limit: int, document_filter=None) -> List[List[tuple]]:
+        """별도 세션에서 본문/제목 lexical 검색을 실행합니다. Returns: [본문 순위, 제목 순위]"""
+        async with self.session_factory() as db:
+            # word similarity 기본 임계값(0.6)은 조사가 붙은 한국어에 너무 엄격함
+            await db.execute(text(f"SET LOCAL pg_trgm.word_similarity_threshold = {float(self.trgm_threshold)}"))
+            content_rows = await self._lexical_candidates(db, query, limit, document_filter)
+            title_rows = await self._title_candidates(db, query, limit, document_filter)
+            return [content_rows, title_rows]
+
+    async def _similar_rows(self, query: str, limit: int, offset: int, threshold: float, ef_search: int, document_filter=None):
+        """Vector 검색 결과. Returns: ([(chunk, distance, score)], query_embedding)"""
+        query_embedding = await self._embed_query(query)
+        if not query_embedding:
+            logger.error("[SearchService] Failed to generate query embedding.")
+            return [], None
+        rows = await self._vector_candidates(
+            self.db, query_embedding, limit, offset, threshold, ef_search, document_filter=document_filter
+        )
+        return [(chunk, distance, 1.0 - float(distance)) for chunk, distance in rows], query_embedding
+
+    async def _hybrid_rows(self, query: str, candidates: int, threshold: float, ef_search: int, document_filter=None):
+        """Vector + lexical 후보를 RRF 로 합친 전체 순위. Returns: ([(chunk, distance|None, rrf_score)], query_embedding)"""
+        vector_rows, lexical, query_embedding = await self._hybrid_lists(
+            query, candidates, threshold, ef_search, document_filter
+        )
+        return self._fuse(vector_rows, lexical, candidates), query_embedding
+
+    async def _hybrid_lists(self, query: str, candidates: int, threshold: float, ef_search: int, document_filter=None):
+        """Vector / lexical 후보 목록을 각각 최대 candidates 개씩. Returns: (vector_rows, [lexical_rows...], query_embedding)"""
+        query_embedding = None
+
+        async def vector_side():
+            nonlocal query_embedding
+            # 임베딩 생성(원격 호출) 동안 lexical 쿼리가 먼저 진행됨
+            query_embedding = await self._embed_query(query)
+            if not query_embedding:
+                logger.error("[SearchService] Failed to generate query embedding. Using lexical results only.")
+                return []
+            return await self._vector_candidates(
+                self.db, query_embedding, candidates, 0, threshold, ef_search, document_filter=document_filter
+            )
+
+        vector_rows, lexical = await asyncio.gather(
+            vector_side(), self._lexical_search(query, candidates, document_filter), return_exceptions=True
+        )
+        if isinstance(vector_rows, BaseException):
+            logger.error(f"[SearchService] Vector retrieval failed: {vector_rows}")
+            vector_rows = []
+        if isinstance(lexical, BaseException):
+            logger.error(f"[SearchService] Lexical retrieval failed: {lexical}")
+            lexical = []
+        return vector_rows, lexical, query_embedding
+
+    def _fuse(self, vector_rows, lexical, depth: int) -> List[tuple]:
+        """
+        각 목록의 상위 depth 개를 RRF 로 합칩니다.
+        같은 목록으로 depth 만 줄이면 depth 개씩 따로 검색한 것과 같은 순위가 됩니다.
+        """
+        vector_rows = vector_rows[:depth]
+        lexical = [rows[:depth] for rows in lexical]
+        chunks: Dict[int, DocumentChunk] = {}
+        distances: Dict[int, float] = {}
+        for chunk, distance in vector_rows:
+            chunks[chunk.id] = chunk
+            distances[chunk.id] = distance
+        rankings = [[chunk.id for chunk, _ in vector_rows]]
+        for rows in lexical:
+            for chunk, _ in rows:
+                chunks.setdefault(chunk.id, chunk)
+            rankings.append([chunk.id for chunk, _ in rows])
+
+        scores = reciprocal_rank_fusion(rankings, k=self.rrf_k)
+        ranked = sorted(scores, key=lambda chunk_id: scores[chunk_id], reverse=True)
+        logger.info(
+            f"[SearchService] Hybrid candidates: vector={len(vector_rows)}, "
+            f"lexical={[len(rows) for rows in lexical]}, fused={len(ranked)}"
+        )
+        return [(chunks[chunk_id], distances.get(chunk_id), scores[chunk_id]) for chunk_id in ranked]
 
     async def search_similar(
-        self, 
-        query: str, 
-        limit: int = 5, 
+        self,
+        query: str,
+        limit: int = 5,
         offset: int = 0,
-        threshold: float = None
+        threshold: float = None,
+        ef_search: int = None,
+        filters: Dict[str, Any] = None
     ) -> List[Dict[str, Any]]:
         """
         Performs semantic search using pgvector.
-        Returns a list of dictionaries containing chunk info and parent document title.
-        
+        Returns a list of dictionaries containing chunk info, parent document title,
+        cosine distance and similarity score (1 - distance), ordered by distance.
+
         Args:
             query: Search query string
             limit: Maximum number of results to return
             offset: Number of results to skip (for pagination)
             threshold: Maximum cosine distance to filter results (None = no filtering)
+            ef_search: HNSW candidate list size for this request (None = SEARCH_HNSW_EF_SEARCH).
+                       Higher values improve recall at the cost of latency.
+            filters: Document filters (doc_type, category, tag, created_after, created_before),
+                     applied inside the ANN query so pages are not emptied by post-filtering.
         """
-        # 1. Generate Query Embedding
-        query_embedding = self.ai_agent.generate_embedding(query)
-        if not query_embedding:
-            logger.error("[SearchService] Failed to generate query embedding.")
-            return []
+        rows, _ = await self._similar_rows(query, limit, offset, threshold, ef_search, self._document_filter(filters))
+        results = [self._format(chunk, distance, score) for chunk, distance, score in rows]
+        logger.info(f"[SearchService] Returned {len(results)} results (offset={offset}, limit={limit}, threshold={threshold})")
+        return results
 
-        # 2. Execute Vector Search (Cosine Distance: <=> operator)
-        # We order by distance ascending (closer is better)
-        stmt = (
-            select(DocumentChunk)
-            .options(selectinload(DocumentChunk.document))
-            .order_by(DocumentChunk.embedding.cosine_distance(query_embedding))
-            .offset(offset)
-            .limit(limit)
-        )
-        
-        result = await self.db.execute(stmt)
-        chunks = result.scalars().all()
+    async def search_hybrid(
+        self,
+        query: str,
+        limit: int = 5,
+        offset: int = 0,
+        threshold: float = None,
+        ef_search: int = None,
+        filters: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Vector 검색과 lexical(full-text + trigram) 검색을 동시에 실행하고 RRF 로 합칩니다.
+        score 는 RRF 점수, distance 는 vector 후보에 포함된 청크만 채워집니다.
+        threshold 는 vector 후보에만 적용됩니다 (lexical 매칭은 거리와 무관하게 유지).
+        """
+        candidates = max(self.hybrid_candidates, offset + limit)
+        rows, _ = await self._hybrid_rows(query, candidates, threshold, ef_search, self._document_filter(filters))
+        results = [self._format(chunk, distance, score) for chunk, distance, score in rows[offset:offset + limit]]
+        logger.info(f"[SearchService] Hybrid returned {len(results)} results (offset={offset}, limit={limit})")
+        return results
+
+    async def search_reranked(
+        self,
+        query: str,
+        mode: str = "vector",
+        limit: int = 5,
+        offset: int = 0,
+        threshold: float = None,
+        ef_search: int = None,
+        group_by_document: bool = False,
+        mmr_lambda: float = None,
+        filters: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        관련도 순 후보 풀을 문서 단위로 묶거나(group_by_document) MMR 로 다양화한 뒤 페이지를 잘라냅니다.
+        - group_by_document: 문서마다 가장 관련도 높은 청크 하나 + match_count (같은 문서의 매칭 청크 수)
+        - mmr_lambda: 0~1, 1 이면 관련도만 / 낮을수록 이미 고른 결과와 비슷한 후보에 불이익
+
+        페이지가 달라도 앞 순위가 바뀌지 않도록 풀을 고정된 단계(rerank_candidates × 2^n)로 키웁니다.
+        단계 n 은 자기 풀만으로 재정렬한 순위에서 아직 나오지 않은 결과를 골라 앞 단계 결과 뒤에 붙이고,
+        전체 결과가 풀 크기의 1/4 이 될 때까지만 채웁니다. 각 단계의 결과는 오프셋과 무관하므로
+        앞 페이지는 항상 뒤 페이지 요청 결과의 prefix 입니다.
+        """
+        needed = offset + limit
+        document_filter = self._document_filter(filters)
+        # 그룹으로 많이 줄어드는 쿼리도 무한히 커지지 않도록 제한 (제한에 걸려도 이미 나온 순위는 유지됨)
+        max_pool = max(self.rerank_candidates, needed * 16)
+
+        fetched = None
+        fetched_size = 0
+        query_embedding = None
+        selected: List[tuple] = []
+        seen = set()
+        counts: Dict[int, int] = {}
+        pool = self.rerank_candidates
+        while True:
+            if pool > fetched_size:
+                # 필요한 단계까지 한 번에 가져오고, 작은 단계는 그 prefix 로 계산
+                fetched_size = pool
+                while fetched_size // 4 < needed and fetched_size < max_pool:
+                    fetched_size *= 2
+                if mode == "hybrid":
+                    vector_rows, lexical, query_embedding = await self._hybrid_lists(
+                        query, fetched_size, threshold, ef_search, document_filter
+                    )
+                    fetched = (vector_rows, lexical)
+                else:
+                    rows, query_embedding = await self._similar_rows(
+                        query, fetched_size, 0, threshold, ef_search, document_filter
+                    )
+                    fetched = rows
+
+            if mode == "hybrid":
+                vector_rows, lexical = fetched
+                rows = self._fuse(vector_rows, lexical, pool)
+                exhausted = all(len(r) < pool for r in [vector_rows, *lexical])
+            else:
+                rows = fetched[:pool]
+                exhausted = len(fetched) < pool
+
+            # 마지막 단계(후보 소진)는 남은 결과를 모두 사용
+            quota = None if exhausted else pool // 4
+            ranked = self._rerank(rows, query_embedding, group_by_document, mmr_lambda, counts, k=quota)
+            quota = len(ranked) if quota is None else quota
+            for row in ranked:
+                if len(selected) >= quota:
+                    break
+                key = row[0].document_id if group_by_document else row[0].id
+                if key not in seen:
+                    seen.add(key)
+                    selected.append(row)
+
+            if len(selected) >= needed or exhausted or pool >= max_pool:
+                break
+            pool *= 2
 
-        # 3. Format Results with optional threshold filtering
         results = []
-        for chunk in chunks:
-            # Calculate cosine distance for filtering
-            # Note: We can't easily get the distance from the ORM query without raw SQL
-            # For now, we'll return all results and let the caller handle threshold
-            # Or we could use a raw SQL query to get distance values
-            results.append({
-                "chunk_id": chunk.id,
-                "document_id": chunk.document.id,
-                "document_title": chunk.document.title,
-                "content": chunk.content,
-                "score": "N/A" # pgvector query directly via sqlalchemy doesn't easily return score in ORM mode without extra columns
-            })
-            
-        logger.info(f"[SearchService] Returned {len(results)} results (offset={offset}, limit={limit})")
+        for chunk, distance, score in selected[offset:needed]:
+            item = self._format(chunk, distance, score)
+            if group_by_document:
+                item["match_count"] = counts[chunk.document_id]
+            results.append(item)
+        logger.info(
+            f"[SearchService] Reranked {len(results)} results (mode={mode}, pool={pool}, "
+            f"group={group_by_document}, mmr_lambda={mmr_lambda}, offset={offset}, limit={limit})"
+        )
         return results
+
+    @staticmethod
+    def _rerank(
+        rows, query_embedding, group_by_document: bool, mmr_lambda: float, counts: Dict[int, int], k: int = None
+    ) -> List[tuple]:
+        """
+        한 단계의 후보 풀을 그룹/MMR 로 재정렬합니다 (MMR 은 상위 k 개까지만 선택, None 이면 전체).
+        counts 에는 이 풀 기준 문서별 매칭 청크 수를 기록합니다 (처음 나온 단계의 값을 유지).
+        """
+        if group_by_document:
+            stage_counts: Dict[int, int] = {}
+            rows = group_by_document_rows(rows, stage_counts)
+            for document_id, count in stage_counts.items():
+                counts.setdefault(document_id, count)
+        if mmr_lambda is not None and query_embedding and len(rows) > 1:
+            relevance = np.array([score for _, _, score in rows], dtype=np.float32)
+            order = mmr_select(
+                query_embedding,
+                [chunk.embedding for chunk, _, _ in rows],
+                k=len(rows) if k is None else k,
+                lambda_=mmr_lambda,
+                relevance=relevance / relevance.max() if relevance.max() > 0 else None,
+            )
+            rows = [rows[i] for i in order]
+        return rows
+
+    async def search(
+        self, query: str, mode: str = "vector", group_by_document: bool = False, mmr_lambda: float = None, **kwargs
+    ) -> List[Dict[str, Any]]:
+        """mode 에 따라 search_similar / search_hybrid 로 위임 (그룹/MMR 요청 시 search_reranked)"""
+        if group_by_document or mmr_lambda is not None:
+            return await self.search_reranked(
+                query, mode, group_by_document=group_by_document, mmr_lambda=mmr_lambda, **kwargs
+            )
+        if mode == "hybrid":
+            return await self.search_hybrid(query, **kwargs)
+        return await self.search_similar(query, **kwargs)
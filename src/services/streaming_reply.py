@@ -0,0 +1,102 @@
+import time
+import asyncio
+from typing import List, Optional
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+DISCORD_MESSAGE_LIMIT = 1900  # Discord 2000자 제한에 여유를 둔 값
+
+def split_message(text: str, limit: int = DISCORD_MESSAGE_LIMIT) -> List[str]:
+    """limit 이하의 조각으로 나눕니다 (가능하면 줄바꿈 경계에서)."""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut < limit // 2:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class StreamingReply:
+    """
+    스트리밍 중인 LLM 응답을 하나의 Discord 메시지에 점진적으로 반영합니다.
+    - 첫 update 에서 메시지를 보내고, 이후에는 최소 interval 간격으로만 edit (편집 rate limit 보호)
+    - edit 는 백그라운드에서 실행되며 동시에 하나만 진행, 그 사이 들어온 텍스트는 최신 것만 반영
+    - finish 에서 최종 텍스트로 마무리 (길면 나머지를 추가 메시지로 전송)
+    """
+
+    def __init__(self, channel, header: str = "", interval: float = 1.5, limit: int = DISCORD_MESSAGE_LIMIT):
+        self.channel = channel
+        self.header = header
+        self.interval = interval
+        self.limit = limit
+        self.message = None
+        self._latest: Optional[str] = None
+        self._shown: Optional[str] = None
+        self._last_edit = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def _render(self, text: str) -> str:
+        room = self.limit - len(self.header)
+        if len(text) > room:
+            text = text[:room - 20].rstrip() + "\n\n...(생성 중)"
+        return self.header + text
+
+    async def update(self, text: str):
+        """누적 응답을 받아, 편집 간격이 지났고 진행 중인 edit 가 없으면 반영을 예약합니다."""
+        if not text:
+            return
+        self._latest = text
+        if self._task and not self._task.done():
+            return
+        if time.monotonic() - self._last_edit < self.interval:
+            return
+        self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        content = self._render(self._latest)
+        if content == self._shown:
+            return
+        self._last_edit = time.monotonic()
+        try:
+            if self.message is None:
+                self.message = await self.channel.send(content)
+            else:
+                await self.message.edit(content=content)
+            self._shown = content
+        except Exception as e:
+            # 중간 편집 실패는 최종 응답에 영향을 주지 않음
+            logger.warning(f"[StreamingReply] 메시지 갱신 실패: {e}")
+
+    async def _wait_pending(self):
+        if self._task and not self._task.done():
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def finish(self, text: str, header: Optional[str] = None):
+        """최종 텍스트로 메시지를 마무리합니다. Returns: 마지막으로 보낸 메시지"""
+        await self._wait_pending()
+        header = self.header if header is None else header
+        first, *rest = split_message(header + text, self.limit) or [header]
+        if self.message is None:
+            self.message = await self.channel.send(first)
+        elif first != self._shown:
+            await self.message.edit(content=first)
+        self._shown = first
+        last = self.message
+        for chunk in rest:
+            last = await self.channel.send(chunk)
+        return last
+
+    async def discard(self):
+        """작업 실패 시 미완성 메시지를 삭제합니다."""
+        await self._wait_pending()
+        if self.message is not None:
+            try:
+                await self.message.delete()
+            except Exception as e:
+                logger.warning(f"[StreamingReply] 메시지 삭제 실패: {e}")
+            self.message = None
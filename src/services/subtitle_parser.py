@@ -0,0 +1,93 @@
+import re
+import html
+import codecs
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+class VTTTextMerger:
+    """
+    WebVTT 를 한 줄씩 받아 자막 본문만 순서대로 내보내는 스트리밍 파서.
+
+    YouTube 자동 자막은 "rolling" 형식이라 같은 문장이 여러 cue 에 반복되고
+    (이전 줄 + 새 줄, 이어서 10ms 짜리 반복 cue), 한 줄이 점점 길어지며 다시 나오기도 합니다.
+    - 최근에 내보낸 줄과 같은 줄은 건너뜀
+    - 이전 줄을 접두어로 포함하는(길어진) 줄은 이전 줄을 대체
+    - 타임스탬프/cue 설정, NOTE/STYLE/REGION 블록, <c>·<00:00:01.000> 태그 제거
+    """
+    RECENT_LINES = 4
+
+    def __init__(self):
+        self._in_cue = False
+        self._skip_block = False
+        self._pending: Optional[str] = None
+        self._recent = deque(maxlen=self.RECENT_LINES)
+
+    @staticmethod
+    def clean(line: str) -> str:
+        text = html.unescape(_TAG_RE.sub("", line))
+        return _SPACE_RE.sub(" ", text).strip()
+
+    def feed(self, line: str) -> Iterator[str]:
+        """한 줄을 처리하고, 확정된 자막 줄이 있으면 yield 합니다."""
+        line = line.strip("\ufeff\r\n")
+        stripped = line.strip()
+
+        if not stripped:
+            self._in_cue = False
+            self._skip_block = False
+            return
+        if self._skip_block:
+            return
+        if "-->" in stripped:
+            self._in_cue = True
+            return
+        if not self._in_cue:
+            # 헤더(WEBVTT, Kind:, Language:), cue 식별자, 메타데이터 블록
+            if stripped.split(" ", 1)[0] in ("NOTE", "STYLE", "REGION"):
+                self._skip_block = True
+            return
+
+        text = self.clean(stripped)
+        if not text or text in self._recent:
+            return
+        if self._pending and text.startswith(self._pending):
+            # 같은 문장이 길어진 경우: 아직 내보내지 않은 이전 줄을 대체
+            self._pending = text
+            self._recent.append(text)
+            return
+        if self._pending:
+            yield self._pending
+        self._pending = text
+        self._recent.append(text)
+
+    def flush(self) -> Iterator[str]:
+        if self._pending:
+            yield self._pending
+            self._pending = None
+
+
+def iter_vtt_text(lines: Iterable[str]) -> Iterator[str]:
+    """VTT 줄 스트림 -> 중복이 제거된 자막 텍스트 줄 스트림"""
+    merger = VTTTextMerger()
+    for line in lines:
+        yield from merger.feed(line)
+    yield from merger.flush()
+
+def iter_lines(stream, chunk_size: int = 64 * 1024, encoding: str = "utf-8") -> Iterator[str]:
+    """read() 가능한 바이트 스트림을 줄 단위로 나눠 읽습니다 (전체를 메모리에 올리지 않음)."""
+    # 청크 경계에서 잘린 멀티바이트 문자(한글 등)를 위해 incremental decoder 사용
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
@@ -5,7 +5,7 @@ import yaml
 from sqlalchemy.future import select
 from src.database.engine import AsyncSessionLocal
 from src.database.models import Document
-from src.services.ai_handler import AIAgent
+from src.services.ai_handler import AsyncAIAgent
 from src.logger import get_logger
 
 logger = get_logger("TagOptimizationService")
@@ -40,7 +40,7 @@ class TagOptimizationService:
         logger.info(f"🧐 Found {len(unmapped_tags)} unmapped tags: {unmapped_tags}")
 
         # 2. Ask LLM
-        agent = AIAgent()
+        agent = AsyncAIAgent()
         current_mappings = self._load_mappings()
         
         # Prepare context for LLM
@@ -76,7 +76,7 @@ Task:
         messages = [{"role": "user", "content": prompt}]
         
         logger.info("🧠 Consulting with LLM...")
-        response = agent.chat(messages, temperature=0.1)
+        response = await agent.chat(messages, temperature=0.1, use_cache=True)
         
         if not response:
             logger.error("❌ LLM failed to respond.")
@@ -0,0 +1,111 @@
+import re
+from typing import Dict, List
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    # 선택 의존성: 설치되어 있으면 BPE 토크나이저로 계산 (Gemini 토크나이저와 정확히 같지는 않음)
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # ImportError 또는 인코딩 파일 다운로드 실패
+    _ENCODING = None
+
+# 한글 음절/자모, CJK 한자, 가나: 대략 글자당 1 토큰
+_WIDE_CHAR_RE = re.compile(r"[가-힣ᄀ-ᇿ㄰-㆏぀-ヿ一-鿿]")
+# 자를 위치 우선순위: 마크다운 섹션 > 문단 > 줄 > 문장 > 공백
+_BOUNDARY_PATTERNS = [
+    re.compile(r"\n(?=#{1,6}\s)"),
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?。])\s|(?<=다\.)\s|(?<=요\.)\s"),
+    re.compile(r"\s"),
+]
+
+def count_tokens(text: str) -> int:
+    """토큰 수 (tiktoken 이 없으면 근사치: 한글/CJK 글자당 1, 그 외 4글자당 1)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    wide = len(_WIDE_CHAR_RE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+def count_message_tokens(messages: List[dict]) -> int:
+    """chat messages 전체 토큰 수 (메시지당 역할/구분자 오버헤드 4 토큰 포함)"""
+    return sum(count_tokens(m.get("content") or "") + 4 for m in messages)
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    text 를 max_tokens 이하로 자릅니다. 가능한 한 섹션/문단/문장 경계에서 자르며,
+    경계는 잘린 구간의 뒤쪽 20% 안에서만 찾습니다 (너무 많이 버리지 않도록).
+    """
+    if max_tokens <= 0:
+        return ""
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    # 비율로 대략적인 절단 위치를 잡고, 한도 안에 들어올 때까지 줄임
+    cut = int(len(text) * max_tokens / total)
+    while cut > 0 and count_tokens(text[:cut]) > max_tokens:
+        cut = int(cut * 0.95)
+
+    window_start = int(cut * 0.8)
+    for pattern in _BOUNDARY_PATTERNS:
+        matches = [m.start() for m in pattern.finditer(text, window_start, cut)]
+        if matches:
+            return text[:matches[-1]].rstrip()
+    return text[:cut]
+
+class TokenBudget:
+    """
+    모델 컨텍스트 창 안에 프롬프트 + 입력 + 예상 출력이 들어가도록 입력 토큰 한도를 계산합니다.
+    Gemini 무료 티어는 키별 TPM 보다 큰 요청을 처리할 수 없으므로 TPM 도 창 크기의 상한으로 봅니다.
+    """
+
+    def __init__(self, context_windows: Dict[str, int], default_window: int, tpm_limit: int = None):
+        self.context_windows = context_windows
+        self.default_window = default_window
+        self.tpm_limit = tpm_limit
+
+    def window(self, model: str, apply_tpm: bool = True) -> int:
+        window = self.context_windows.get(model, self.default_window)
+        if apply_tpm and self.tpm_limit:
+            window = min(window, self.tpm_limit)
+        return window
+
+    def input_budget(self, model: str, overhead_tokens: int, output_tokens: int, cap: int = None, apply_tpm: bool = True) -> int:
+        """입력 텍스트에 쓸 수 있는 토큰 수 (cap: 프롬프트별 상한)"""
+        budget = self.window(model, apply_tpm) - overhead_tokens - output_tokens
+        if cap:
+            budget = min(budget, cap)
+        return max(0, budget)
+
+    def fit_messages(self, messages: List[dict], max_tokens: int) -> List[dict]:
+        """
+        메시지 전체가 max_tokens 를 넘으면 가장 긴 user 메시지 내용을 경계 단위로 줄입니다.
+        (Local LLM 처럼 창이 작은 모델로 failover 할 때 사용)
+        """
+        total = count_message_tokens(messages)
+        if total <= max_tokens:
+            return messages
+        user_idx = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+        if not user_idx:
+            return messages
+        target = max(user_idx, key=lambda i: count_tokens(messages[i].get("content") or ""))
+        content = messages[target].get("content") or ""
+        allowed = count_tokens(content) - (total - max_tokens)
+        logger.info(f"[TokenBudget] 메시지 {total} 토큰 → {max_tokens} 토큰으로 축소")
+        fitted = list(messages)
+        fitted[target] = dict(messages[target], content=trim_to_tokens(content, allowed))
+        return fitted
+
+_default_budget = None
+
+def get_token_budget() -> TokenBudget:
+    global _default_budget
+    if _default_budget is None:
+        from src.config import LLM_CONTEXT_WINDOWS, LLM_DEFAULT_CONTEXT_WINDOW, GEMINI_KEY_TPM
+        _default_budget = TokenBudget(LLM_CONTEXT_WINDOWS, LLM_DEFAULT_CONTEXT_WINDOW, tpm_limit=GEMINI_KEY_TPM)
+    return _default_budget
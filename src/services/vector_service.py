@@ -1,27 +1,61 @@
-from typing import List
+import hashlib
+from typing import List, Dict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from src.database.models import DocumentChunk
-from src.services.ai_handler import AIAgent
+from src.services.ai_handler import AsyncAIAgent
 from src.logger import get_logger
 
 logger = get_logger(__name__)
 
 class VectorService:
+    CHUNK_SIZE = 1000
+    CHUNK_OVERLAP = 200
+    SEPARATORS = ["\n\n", "\n", " ", ""]
+
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.ai_agent = AIAgent()
+        self.ai_agent = AsyncAIAgent()
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", " ", ""]
+            chunk_size=self.CHUNK_SIZE,
+            chunk_overlap=self.CHUNK_OVERLAP,
+            separators=self.SEPARATORS
         )
 
     def chunk_text(self, text: str) -> List[str]:
         """Splits text into chunks using LangChain's RecursiveCharacterTextSplitter"""
         return self.text_splitter.split_text(text)
 
+    @staticmethod
+    def split_text(text: str, chunk_size: int, chunk_overlap: int, length_function=len) -> List[str]:
+        """
+        DB 세션 없이 같은 분할 규칙(문단 > 줄 > 단어)으로 원하는 크기의 청크를 만듭니다 (map-reduce 요약 등).
+        length_function 으로 토큰 수 등 다른 길이 기준을 쓸 수 있습니다.
+        """
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=VectorService.SEPARATORS,
+            length_function=length_function
+        )
+        return splitter.split_text(text)
+
+    @staticmethod
+    def hash_chunk(text: str) -> str:
+        """청크 내용의 sha256 (document_chunks.content_hash 와 동일한 형식)"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    async def _load_cached_embeddings(self, hashes: List[str]) -> Dict[str, list]:
+        """이미 임베딩된 동일 내용의 청크를 content_hash 로 찾아 재사용합니다."""
+        if not hashes:
+            return {}
+        result = await self.db.execute(
+            select(DocumentChunk.content_hash, DocumentChunk.embedding)
+            .where(DocumentChunk.content_hash.in_(set(hashes)), DocumentChunk.embedding.isnot(None))
+        )
+        return {content_hash: embedding for content_hash, embedding in result.all()}
+
     async def process_document(self, doc_id: int, content: str):
         """Chunks document content, generates embeddings, and saves to DB"""
         if not content:
@@ -30,20 +64,34 @@ class VectorService:
 
         # 1. Chunk Text
         chunks = self.chunk_text(content)
+        hashes = [self.hash_chunk(c) for c in chunks]
         logger.info(f"[VectorService] Doc {doc_id}: Generated {len(chunks)} chunks.")
 
-        # 2. Clear existing chunks (if re-processing)
+        # 2. Reuse embeddings of unchanged chunks (must run before clear_chunks)
+        cached = await self._load_cached_embeddings(hashes)
+
+        # 3. Batch-embed only the new chunks
+        missing = [i for i, h in enumerate(hashes) if h not in cached]
+        if missing:
+            embeddings = await self.ai_agent.generate_embeddings([chunks[i] for i in missing])
+            for i, embedding in zip(missing, embeddings):
+                if embedding:
+                    cached[hashes[i]] = embedding
+        logger.info(f"[VectorService] Doc {doc_id}: {len(chunks) - len(missing)} cached, {len(missing)} embedded.")
+
+        # 4. Clear existing chunks (if re-processing)
         await self.clear_chunks(doc_id)
 
-        # 3. Generate Embeddings & Save
+        # 5. Save
         new_chunks = []
-        for idx, chunk_text in enumerate(chunks):
-            embedding = self.ai_agent.generate_embedding(chunk_text)
-            if embedding:
+        for idx, (chunk_text, content_hash) in enumerate(zip(chunks, hashes)):
+            embedding = cached.get(content_hash)
+            if embedding is not None:
                 chunk_record = DocumentChunk(
                     document_id=doc_id,
                     chunk_index=idx,
                     content=chunk_text,
+                    content_hash=content_hash,
                     embedding=embedding
                 )
                 new_chunks.append(chunk_record)
@@ -123,6 +123,29 @@ async def auto_categorize_tags():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/admin/llm-cache")
+async def get_llm_cache_stats():
+    """LLM 응답 캐시의 namespace 별 hit/miss 및 항목 수"""
+    from src.services.llm_cache import get_llm_cache
+
+    cache = get_llm_cache()
+    if not cache:
+        return {"enabled": False}
+    stats = await asyncio.to_thread(cache.stats)
+    return {"enabled": True, **stats}
+
+@app.get("/api/admin/llm-keys")
+async def get_llm_key_metrics():
+    """이 프로세스의 Gemini 키별 예산/cooldown/오류율 및 Local LLM 서킷 브레이커 상태"""
+    from src.services.key_scheduler import get_llm_metrics
+    return get_llm_metrics()
+
+@app.get("/api/admin/search-embedding-cache")
+async def get_search_embedding_cache_stats():
+    """이 프로세스의 검색 쿼리 임베딩 캐시 상태 (항목 수, 메모리, hit/miss)"""
+    from src.services.embedding_cache import get_query_embedding_cache
+    return get_query_embedding_cache().stats()
+
 
 @app.get("/api/documents", response_model=List[DocumentResponse])
 async def get_documents(
@@ -265,6 +288,15 @@ async def search_documents(
     limit: int = 10,
     offset: int = 0,
     threshold: Optional[float] = None,
+    ef_search: Optional[int] = None,
+    mode: str = "vector",
+    group_by_document: bool = False,
+    mmr_lambda: Optional[float] = None,
+    doc_type: Optional[str] = None,
+    category: Optional[str] = None,
+    tag: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -275,6 +307,12 @@ async def search_documents(
         limit: Maximum number of results to return (default: 10)
         offset: Number of results to skip for pagination (default: 0)
         threshold: Optional cosine distance threshold for filtering (default: None)
+        ef_search: Optional HNSW candidate list size (recall vs latency, default: SEARCH_HNSW_EF_SEARCH)
+        mode: 'vector' (embedding only) or 'hybrid' (vector + full-text/trigram fused with RRF)
+        group_by_document: Collapse hits to the best chunk per document, with match_count (default: False)
+        mmr_lambda: Optional MMR diversification (0-1, lower = more diverse, default: None = off)
+        doc_type / category / tag: Same document filters as /api/documents, applied inside the ANN query
+        created_after / created_before: Optional document creation date range (ISO 8601)
     """
     if not q:
         raise HTTPException(status_code=400, detail="Query string 'q' is required")
@@ -282,8 +320,27 @@ async def search_documents(
     from src.services.search_service import SearchService
     from src.web_api.schemas import SearchResultItem
     
+    if ef_search is not None and not 1 <= ef_search <= SearchService.MAX_EF_SEARCH:
+        raise HTTPException(status_code=400, detail=f"'ef_search' must be between 1 and {SearchService.MAX_EF_SEARCH}")
+
+    if mode not in SearchService.MODES:
+        raise HTTPException(status_code=400, detail=f"'mode' must be one of {', '.join(SearchService.MODES)}")
+
+    if mmr_lambda is not None and not 0 <= mmr_lambda <= 1:
+        raise HTTPException(status_code=400, detail="'mmr_lambda' must be between 0 and 1")
+
     service = SearchService(db)
-    results = await service.search_similar(q, limit, offset, threshold)
+    filters = {
+        "doc_type": doc_type,
+        "category": category,
+        "tag": tag,
+        "created_after": created_after,
+        "created_before": created_before,
+    }
+    results = await service.search(
+        q, mode, group_by_document=group_by_document, mmr_lambda=mmr_lambda,
+        limit=limit, offset=offset, threshold=threshold, ef_search=ef_search, filters=filters
+    )
     
     return [SearchResultItem(**item) for item in results]
 
@@ -343,11 +400,11 @@ async def generate_tags_for_document(doc_id: int, db: AsyncSession = Depends(get
         raise HTTPException(status_code=500, detail=f"Failed to read file: {str(e)}")
     
     # 3. Generate tags using AI
-    from src.services.ai_handler import AIAgent
+    from src.services.ai_handler import AsyncAIAgent
     
     try:
-        ai_agent = AIAgent()
-        tags = await asyncio.to_thread(ai_agent.generate_tags, content)
+        ai_agent = AsyncAIAgent()
+        tags = await ai_agent.generate_tags(content)
         logger.info(f"[API] Generated {len(tags)} tags for doc {doc_id}: {tags}")
         
         if not tags:
@@ -47,8 +47,11 @@ class SearchResultItem(BaseModel):
     chunk_id: int
     document_id: int
     document_title: str
+    source_url: Optional[str] = None
     content: str
-    score: Optional[str] = "N/A"
+    score: float  # vector: cosine similarity (1 - distance) / hybrid: RRF score. Higher is better
+    distance: Optional[float] = None  # cosine distance (None for lexical-only hybrid hits)
+    match_count: Optional[int] = None  # group_by_document: number of matching chunks in this document
 
 class SearchResponse(BaseModel):
     results: list[SearchResultItem]
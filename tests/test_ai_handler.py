@@ -0,0 +1,391 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.services.ai_handler import AsyncAIAgent
+from src.services.key_scheduler import KeyScheduler, CircuitBreaker, LatencyTracker
+
+def make_response(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+@pytest.fixture
+def agent():
+    with patch("src.services.ai_handler.get_llm_cache", return_value=None):
+        agent = AsyncAIAgent()
+    agent.gemini_keys = ["key-1", "key-2"]
+    agent.scheduler = KeyScheduler("chat", agent.gemini_keys)
+    agent.local_breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    agent.latency = LatencyTracker()
+    agent.first_token_latency = LatencyTracker()
+    AsyncAIAgent._clients.clear()
+    yield agent
+    AsyncAIAgent._clients.clear()
+
+def test_async_clients_are_reused_per_endpoint_and_key(agent):
+    with patch("src.services.ai_handler.AsyncOpenAI") as MockClient:
+        MockClient.side_effect = lambda **kwargs: MagicMock()
+        first = agent._get_client(api_key="key-1")
+        assert agent._get_client(api_key="key-1") is first
+        assert agent._get_client(api_key="key-2") is not first
+        assert agent._get_client(is_local=True) is not first
+        assert MockClient.call_count == 3
+
+@pytest.mark.asyncio
+async def test_chat_fails_over_to_next_key(agent):
+    failing = MagicMock()
+    failing.chat.completions.create = AsyncMock(side_effect=Exception("429"))
+    working = MagicMock()
+    working.chat.completions.create = AsyncMock(return_value=make_response("ok"))
+
+    clients = {"key-1": failing, "key-2": working}
+    with patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: clients[api_key]):
+        result = await agent.chat([{"role": "user", "content": "hi"}], use_cache=False)
+
+    assert result == "ok"
+    failing.chat.completions.create.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_rate_limited_key_is_skipped_on_next_call(agent):
+    rate_limited = MagicMock()
+    error = Exception("429 Too Many Requests")
+    error.status_code = 429
+    rate_limited.chat.completions.create = AsyncMock(side_effect=error)
+    working = MagicMock()
+    working.chat.completions.create = AsyncMock(return_value=make_response("ok"))
+
+    clients = {"key-1": rate_limited, "key-2": working}
+    with patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: clients[api_key]):
+        for _ in range(3):
+            assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=False) == "ok"
+
+    # key-1 은 첫 429 이후 cooldown 으로 제외됨
+    assert rate_limited.chat.completions.create.await_count == 1
+
+@pytest.mark.asyncio
+async def test_local_llm_circuit_breaker_skips_calls_when_open(agent):
+    agent.scheduler = KeyScheduler("chat", [])
+    local = MagicMock()
+    local.chat.completions.create = AsyncMock(side_effect=Exception("connection refused"))
+
+    with patch.object(agent, "_get_client", return_value=local):
+        assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=False) is None
+        assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=False) is None
+
+    assert local.chat.completions.create.await_count == 1
+    assert agent.local_breaker.snapshot()["state"] == CircuitBreaker.OPEN
+
+@pytest.mark.asyncio
+async def test_local_fallback_answers_are_not_cached(agent, tmp_path):
+    from src.services.llm_cache import LLMCache
+    agent.cache = LLMCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=3600, max_entries=100)
+    agent.scheduler = KeyScheduler("chat", [])
+    local = MagicMock()
+    local.chat.completions.create = AsyncMock(return_value=make_response("local answer"))
+
+    with patch.object(agent, "_get_client", return_value=local):
+        assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=True) == "local answer"
+        assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=True) == "local answer"
+
+    # Gemini 키로 만든 캐시 키에 fallback 응답이 저장되지 않음 → 두 번 모두 실제 호출
+    assert local.chat.completions.create.await_count == 2
+
+def make_slow_client(content, delay):
+    async def create(**kwargs):
+        await asyncio.sleep(delay)
+        return make_response(content)
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    return client
+
+@pytest.mark.asyncio
+async def test_hedged_chat_uses_local_llm_when_gemini_is_slow(agent):
+    agent.scheduler = KeyScheduler("chat", ["key-1"])
+    gemini = make_slow_client("gemini", delay=5)
+    local = make_slow_client("local", delay=0)
+    cancelled = asyncio.Event()
+
+    async def slow_create(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    gemini.chat.completions.create = AsyncMock(side_effect=slow_create)
+
+    with patch("src.services.ai_handler.LLM_HEDGE_MAX_DELAY", 0.05), \
+         patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: local if is_local else gemini):
+        result = await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True)
+        await asyncio.sleep(0)
+
+    assert result == "local"
+    assert cancelled.is_set()  # 늦은 Gemini 요청은 취소됨
+    assert agent.local_breaker.snapshot()["state"] == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_hedged_chat_records_latency_of_cancelled_gemini_call(agent):
+    agent.scheduler = KeyScheduler("chat", ["key-1"])
+    gemini = make_slow_client("gemini", delay=5)
+    local = make_slow_client("local", delay=0)
+
+    with patch("src.services.ai_handler.LLM_HEDGE_MAX_DELAY", 0.05), \
+         patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: local if is_local else gemini):
+        assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True) == "local"
+
+    assert len(agent.latency.samples) == 1
+    assert agent.latency.samples[0] >= 0.05  # 최소 hedge 지연만큼은 걸린 것으로 기록
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_probe_reopens_local_breaker(agent):
+    agent.local_breaker.state = CircuitBreaker.HALF_OPEN
+    local = make_slow_client("local", delay=5)
+
+    with patch.object(agent, "_get_client", return_value=local):
+        task = asyncio.create_task(agent._request_local([{"role": "user", "content": "hi"}], 0.1, check_breaker=False))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # 결과를 모르는 probe 는 OPEN 으로 되돌아가 cooldown 후 다시 시도됨
+    assert agent.local_breaker.snapshot()["state"] == CircuitBreaker.OPEN
+    assert agent.local_breaker.failures == 0
+
+@pytest.mark.asyncio
+async def test_hedged_chat_does_not_call_local_when_gemini_is_fast(agent):
+    gemini = make_slow_client("gemini", delay=0)
+    local = make_slow_client("local", delay=0)
+
+    with patch("src.services.ai_handler.LLM_HEDGE_MAX_DELAY", 1), \
+         patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: local if is_local else gemini):
+        assert await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True) == "gemini"
+
+    local.chat.completions.create.assert_not_awaited()
+    assert agent.latency.samples  # 지연시간이 기록되어 다음 hedge 기준으로 사용됨
+
+@pytest.mark.asyncio
+async def test_long_input_is_summarized_with_map_reduce(agent):
+    calls = []
+
+    async def fake_call(messages, temperature=0.1, cache_namespace=None, validate=None, **kwargs):
+        calls.append((cache_namespace, messages))
+        return "- note" if cache_namespace == "map" else "# Report"
+
+    long_text = ("문단입니다. " * 400 + "\n\n") * 20  # 약 56,000자
+    with patch.object(agent, "_call_llm_with_failover", side_effect=fake_call):
+        result = await agent.deep_dive(long_text)
+
+    assert result == "# Report"
+    map_calls = [c for c in calls if c[0] == "map"]
+    assert len(map_calls) >= 4
+    reduce_input = calls[-1][1][-1]["content"]
+    assert "[Part 1/" in reduce_input and "- note" in reduce_input
+    assert len(reduce_input) < len(long_text)
+
+@pytest.mark.asyncio
+async def test_map_notes_over_budget_are_reduced_again(agent):
+    calls = []
+
+    async def fake_call(messages, temperature=0.1, cache_namespace=None, validate=None, **kwargs):
+        calls.append((cache_namespace, messages))
+        if cache_namespace != "map":
+            return "# Report"
+        chunk = messages[-1]["content"]
+        # 1단계: 원문 청크마다 긴 노트 (합치면 다시 한도 초과), 2단계(노트 요약): 짧은 노트
+        return "- short" if "[Part" in chunk else "- 긴 노트입니다. " * 250
+
+    long_text = ("문단입니다. " * 400 + "\n\n") * 20
+    with patch("src.services.ai_handler.LLM_MAP_MAX_CALLS", 100), \
+         patch.object(agent, "_call_llm_with_failover", side_effect=fake_call):
+        await agent.deep_dive(long_text)
+
+    reduce_input = calls[-1][1][-1]["content"]
+    assert "- short" in reduce_input and "긴 노트" not in reduce_input
+
+@pytest.mark.asyncio
+async def test_failed_map_parts_become_placeholders_and_calls_are_capped(agent):
+    calls = []
+
+    async def fake_call(messages, temperature=0.1, cache_namespace=None, validate=None, **kwargs):
+        calls.append(cache_namespace)
+        if cache_namespace != "map":
+            return "# Report"
+        return None if calls.count("map") == 1 else "- note"
+
+    long_text = ("문단입니다. " * 400 + "\n\n") * 20
+    with patch("src.services.ai_handler.LLM_MAP_MAX_CALLS", 3), \
+         patch.object(agent, "_call_llm_with_failover", side_effect=fake_call) as call:
+        await agent.deep_dive(long_text)
+
+    assert calls.count("map") == 3
+    reduce_input = call.await_args_list[-1].args[0][-1]["content"]
+    assert "(이 부분은 요약하지 못했습니다)" in reduce_input
+    assert "문단입니다" not in reduce_input
+
+@pytest.mark.asyncio
+async def test_short_input_skips_map_step(agent):
+    with patch.object(agent, "_call_llm_with_failover", AsyncMock(return_value="# Report")) as call:
+        await agent.deep_dive("짧은 본문입니다. " * 20)
+    call.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_deep_dive_structured_returns_report_title_and_tags_in_one_call(agent):
+    content = '```json\n{"title": "제목", "report": "# 제목\\n본문", "tags": ["Python", "asyncio"]}\n```'
+    with patch.object(agent, "_call_llm_with_failover", AsyncMock(return_value=content)) as call, \
+         patch.object(agent, "_normalize_tags", side_effect=lambda tags: [t.lower() for t in tags]):
+        result = await agent.deep_dive_structured("분석할 본문입니다. " * 20)
+
+    call.assert_awaited_once()
+    assert result == {"title": "제목", "report": "# 제목\n본문", "tags": ["python", "asyncio"]}
+
+@pytest.mark.asyncio
+async def test_deep_dive_structured_falls_back_to_plain_report(agent):
+    with patch.object(agent, "_call_llm_with_failover", AsyncMock(return_value="# 그냥 마크다운 리포트")):
+        result = await agent.deep_dive_structured("분석할 본문입니다. " * 20)
+    assert result == {"title": None, "report": "# 그냥 마크다운 리포트", "tags": []}
+
+@pytest.mark.asyncio
+async def test_response_format_is_sent_to_gemini_only_when_supported(agent):
+    gemini = make_slow_client('{"title": "t", "report": "r", "tags": []}', delay=0)
+    with patch.object(agent, "_get_client", return_value=gemini), \
+         patch.object(agent, "_structured_output_supported", return_value=True):
+        await agent.deep_dive_structured("분석할 본문입니다. " * 20)
+    assert gemini.chat.completions.create.await_args.kwargs["response_format"]["type"] == "json_schema"
+
+def make_stream(*deltas):
+    async def stream():
+        for delta in deltas:
+            chunk = MagicMock()
+            chunk.choices[0].delta.content = delta
+            yield chunk
+    return stream()
+
+@pytest.mark.asyncio
+async def test_chat_streams_partial_text_to_on_update(agent):
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=make_stream("안녕", None, "하세요"))
+    updates = []
+
+    async def on_update(text):
+        updates.append(text)
+
+    with patch.object(agent, "_get_client", return_value=client):
+        result = await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True, on_update=on_update)
+
+    assert result == "안녕하세요"
+    assert updates == ["안녕", "안녕하세요"]
+    assert client.chat.completions.create.await_args.kwargs["stream"] is True
+
+def make_slow_stream_client(*deltas, first_token_delay):
+    async def create(**kwargs):
+        await asyncio.sleep(first_token_delay)
+        return make_stream(*deltas)
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=create)
+    return client
+
+@pytest.mark.asyncio
+async def test_streamed_hedge_uses_first_stream_to_produce_a_token(agent):
+    agent.scheduler = KeyScheduler("chat", ["key-1"])
+    gemini = make_slow_stream_client("gemini", first_token_delay=5)
+    local = make_slow_stream_client("lo", "cal", first_token_delay=0)
+    updates = []
+
+    async def on_update(text):
+        updates.append(text)
+
+    with patch("src.services.ai_handler.LLM_HEDGE_MAX_DELAY", 0.05), \
+         patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: local if is_local else gemini):
+        result = await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True, on_update=on_update)
+
+    assert result == "local"
+    assert updates == ["lo", "local"]
+    # 첫 토큰을 보내지 못한 Gemini 요청은 최소 hedge 지연만큼의 첫 토큰 지연으로 기록
+    assert agent.first_token_latency.samples[0] >= 0.05
+
+@pytest.mark.asyncio
+async def test_streamed_hedge_retries_gemini_when_local_fails_after_first_token(agent):
+    agent.scheduler = KeyScheduler("chat", ["key-1"])
+    gemini_calls = 0
+
+    async def gemini_create(**kwargs):
+        nonlocal gemini_calls
+        gemini_calls += 1
+        if gemini_calls == 1:
+            await asyncio.sleep(5)  # 첫 요청은 느려서 Local 에게 첫 토큰을 빼앗기고 취소됨
+        return make_stream("gem", "ini")
+
+    async def broken_stream():
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = "lo"
+        yield chunk
+        raise Exception("connection reset")
+
+    gemini = MagicMock()
+    gemini.chat.completions.create = AsyncMock(side_effect=gemini_create)
+    local = MagicMock()
+    local.chat.completions.create = AsyncMock(side_effect=lambda **kwargs: broken_stream())
+    updates = []
+
+    async def on_update(text):
+        updates.append(text)
+
+    with patch("src.services.ai_handler.LLM_HEDGE_MAX_DELAY", 0.05), \
+         patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: local if is_local else gemini):
+        result = await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True, on_update=on_update)
+
+    assert result == "gemini"
+    assert gemini_calls == 2
+    assert updates == ["lo", "gem", "gemini"]
+
+@pytest.mark.asyncio
+async def test_streamed_hedge_cancels_local_once_gemini_starts_streaming(agent):
+    agent.scheduler = KeyScheduler("chat", ["key-1"])
+    local_cancelled = asyncio.Event()
+
+    async def gemini_create(**kwargs):
+        await asyncio.sleep(0.1)
+        return make_stream("gem", "ini")
+
+    async def local_create(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            local_cancelled.set()
+            raise
+
+    gemini = MagicMock()
+    gemini.chat.completions.create = AsyncMock(side_effect=gemini_create)
+    local = MagicMock()
+    local.chat.completions.create = AsyncMock(side_effect=local_create)
+    updates = []
+
+    async def on_update(text):
+        updates.append(text)
+
+    with patch("src.services.ai_handler.LLM_HEDGE_MAX_DELAY", 0.05), \
+         patch.object(agent, "_get_client", side_effect=lambda is_local=False, api_key=None: local if is_local else gemini):
+        result = await agent.chat([{"role": "user", "content": "hi"}], use_cache=False, hedge=True, on_update=on_update)
+        await asyncio.sleep(0)
+
+    assert result == "gemini"
+    assert updates == ["gem", "gemini"]
+    assert local_cancelled.is_set()
+    assert len(agent.first_token_latency.samples) == 1  # Gemini 의 실제 첫 토큰 지연
+
+@pytest.mark.asyncio
+async def test_deep_dive_structured_streams_report_field_only(agent):
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=make_stream(
+        '{"title": "T", "report": "# 제', '목\\n본문', '", "tags": ["AI"]}'
+    ))
+    updates = []
+
+    async def on_update(text):
+        updates.append(text)
+
+    with patch.object(agent, "_get_client", return_value=client):
+        result = await agent.deep_dive_structured("x" * 100, on_update=on_update)
+
+    assert result["report"] == "# 제목\n본문"
+    assert updates == ["# 제", "# 제목\n본문", "# 제목\n본문"]
@@ -0,0 +1,119 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.services.browser_pool import BrowserPool, ResourceBlocker
+
+def make_browser():
+    browser = MagicMock()
+    browser.is_connected.return_value = True
+    browser.close = AsyncMock()
+
+    async def new_context(**kwargs):
+        context = MagicMock()
+        context.add_init_script = AsyncMock()
+        context.close = AsyncMock()
+        context.new_page = AsyncMock(side_effect=lambda: MagicMock(close=AsyncMock()))
+        return context
+    browser.new_context = AsyncMock(side_effect=new_context)
+    return browser
+
+@pytest.fixture
+def playwright():
+    pw = MagicMock()
+    pw.chromium.launch = AsyncMock(side_effect=lambda **kwargs: make_browser())
+    pw.stop = AsyncMock()
+    starter = MagicMock()
+    starter.start = AsyncMock(return_value=pw)
+    with patch("src.services.browser_pool.async_playwright", return_value=starter):
+        yield pw
+
+@pytest.mark.asyncio
+async def test_browser_and_context_are_reused_across_pages(playwright):
+    pool = BrowserPool(max_contexts=2, recycle_after=10, restart_after=100)
+    for _ in range(3):
+        async with pool.page() as page:
+            assert page is not None
+
+    assert playwright.chromium.launch.await_count == 1
+    browser = pool._browser
+    assert browser.new_context.await_count == 1
+    assert pool.stats()["idle_contexts"] == 1
+
+@pytest.mark.asyncio
+async def test_context_is_recycled_after_n_pages(playwright):
+    pool = BrowserPool(max_contexts=1, recycle_after=2, restart_after=100)
+    for _ in range(4):
+        async with pool.page():
+            pass
+
+    assert pool._browser.new_context.await_count == 2
+
+@pytest.mark.asyncio
+async def test_disconnected_browser_is_relaunched(playwright):
+    pool = BrowserPool(max_contexts=1, recycle_after=10, restart_after=100)
+    async with pool.page():
+        pass
+    pool._browser.is_connected.return_value = False
+
+    async with pool.page():
+        pass
+
+    assert playwright.chromium.launch.await_count == 2
+    assert pool.stats()["generation"] == 2
+
+@pytest.mark.asyncio
+async def test_pending_restart_drains_pages_before_relaunch(playwright):
+    pool = BrowserPool(max_contexts=2, recycle_after=10, restart_after=1)
+    release_first = asyncio.Event()
+    first_open = asyncio.Event()
+
+    async def hold_page():
+        async with pool.page():
+            first_open.set()
+            await release_first.wait()
+
+    async def next_page():
+        async with pool.page():
+            return pool.stats()["generation"]
+
+    holder = asyncio.create_task(hold_page())
+    await first_open.wait()
+    old_browser = pool._browser
+
+    # 재시작 주기에 도달 → 사용 중인 페이지가 반환될 때까지 새 페이지를 내주지 않음
+    waiter = asyncio.create_task(next_page())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    old_browser.close.assert_not_awaited()
+
+    release_first.set()
+    await holder
+    assert await waiter == 2
+    old_browser.close.assert_awaited_once()
+    assert playwright.chromium.launch.await_count == 2
+
+def test_resource_blocker_blocks_heavy_types_and_trackers():
+    blocker = ResourceBlocker(["image", "font", "stylesheet", "media"])
+    page = "https://blog.example.com/post"
+    assert blocker.should_block(page, "https://cdn.example.com/a.png", "image")
+    assert blocker.should_block(page, "https://www.google-analytics.com/analytics.js", "script")
+    assert not blocker.should_block(page, "https://blog.example.com/app.js", "script")
+    assert not blocker.should_block(page, "https://blog.example.com/api/post", "fetch")
+
+def test_resource_blocker_allowlist_per_domain():
+    allowlist = ResourceBlocker.parse_allowlist("example.com=stylesheet|font;broken.io=*")
+    blocker = ResourceBlocker(["image", "font", "stylesheet"], allowlist=allowlist)
+
+    assert not blocker.should_block("https://blog.example.com/", "https://cdn.net/a.css", "stylesheet")
+    assert blocker.should_block("https://blog.example.com/", "https://cdn.net/a.png", "image")
+    assert not blocker.should_block("https://broken.io/", "https://doubleclick.net/ad.js", "script")
+    assert blocker.should_block("https://other.com/", "https://cdn.net/a.css", "stylesheet")
+
+@pytest.mark.asyncio
+async def test_pool_installs_route_handler_for_target_url(playwright):
+    blocker = ResourceBlocker(["image"])
+    pool = BrowserPool(max_contexts=1, blocker=blocker)
+    with patch.object(blocker, "install", AsyncMock()) as install:
+        async with pool.page("https://example.com/post") as page:
+            pass
+    install.assert_awaited_once_with(page, "https://example.com/post")
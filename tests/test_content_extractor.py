@@ -0,0 +1,145 @@
+import io
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.services.content_extractor import ContentExtractor
+from src.services.extraction_router import ExtractionRouter
+from src.services.extraction_cache import ExtractionCache
+
+LONG_TEXT = "본문 " * 200
+
+def html_response(status=200, etag=None, last_modified=None):
+    return {"status": status, "html": "<html></html>" if status == 200 else None, "etag": etag, "last_modified": last_modified}
+
+@pytest.fixture
+def router():
+    router = ExtractionRouter(None, ["x.com", "threads.net"])
+    with patch("src.services.content_extractor.get_extraction_router", return_value=router), \
+         patch("src.services.content_extractor.get_extraction_cache", return_value=None):
+        yield router
+
+def test_router_sends_dynamic_domains_to_browser():
+    router = ExtractionRouter(None, ["x.com"])
+    assert not router.should_try_static("https://x.com/user/status/1")
+    assert not router.should_try_static("https://mobile.x.com/user/status/1")
+    assert router.should_try_static("https://www.example.com/post")
+
+def test_router_learns_static_failures_and_explores_periodically():
+    router = ExtractionRouter(None, [], explore_every=5)
+    for _ in range(3):
+        router.record("https://spa.example.com/a", "static", False)
+
+    decisions = [router.should_try_static("https://spa.example.com/b") for _ in range(10)]
+    assert decisions.count(True) == 2  # 5번째, 10번째 요청만 재시도
+
+@pytest.mark.asyncio
+async def test_router_saves_are_debounced_and_flushed(tmp_path):
+    path = tmp_path / "routes.json"
+    router = ExtractionRouter(str(path), [])
+    router.SAVE_INTERVAL_SECONDS = 60
+    for _ in range(5):
+        router.record("https://blog.example.com/a", "static", True)
+
+    # 여러 기록이 하나의 예약된 저장으로 모이고, 그동안 파일은 쓰지 않음
+    assert not path.exists()
+    save_task = router._save_task
+    await router.flush()
+
+    assert save_task.cancelled()
+    assert ExtractionRouter(str(path), []).snapshot()["blog.example.com"]["static_ok"] == 5
+
+@pytest.mark.asyncio
+async def test_extract_uses_static_path_when_text_is_long_enough(router):
+    with patch.object(ContentExtractor, "_fetch_static", AsyncMock(return_value=html_response())), \
+         patch.object(ContentExtractor, "_parse_html", AsyncMock(return_value=LONG_TEXT)), \
+         patch.object(ContentExtractor, "extract_dynamic_content", AsyncMock()) as dynamic:
+        result = await ContentExtractor.extract("https://blog.example.com/post")
+
+    assert result["type"] == "Web"
+    dynamic.assert_not_awaited()
+    assert router.snapshot()["blog.example.com"]["static_ok"] == 1
+
+@pytest.mark.asyncio
+async def test_extract_escalates_to_browser_when_static_text_is_short(router):
+    with patch.object(ContentExtractor, "_fetch_static", AsyncMock(return_value=html_response())), \
+         patch.object(ContentExtractor, "_parse_html", AsyncMock(return_value="Loading...")), \
+         patch.object(ContentExtractor, "extract_dynamic_content", AsyncMock(return_value=LONG_TEXT)) as dynamic:
+        result = await ContentExtractor.extract("https://app.example.com/post")
+
+    assert result["content"] == LONG_TEXT
+    dynamic.assert_awaited_once()
+    stats = router.snapshot()["app.example.com"]
+    assert stats["static_fail"] == 1 and stats["browser_ok"] == 1
+
+@pytest.fixture
+def cache(tmp_path, router):
+    cache = ExtractionCache(str(tmp_path), max_age_seconds=3600, retention_seconds=86400)
+    with patch("src.services.content_extractor.get_extraction_cache", return_value=cache):
+        yield cache
+
+@pytest.mark.asyncio
+async def test_fresh_cache_entry_skips_network(cache):
+    cache.put("https://blog.example.com/post", "Web", LONG_TEXT)
+    with patch.object(ContentExtractor, "_fetch_static", AsyncMock()) as fetch, \
+         patch.object(ContentExtractor, "extract_dynamic_content", AsyncMock()) as dynamic:
+        result = await ContentExtractor.extract("https://blog.example.com/post")
+
+    assert result == {"type": "Web", "content": LONG_TEXT}
+    fetch.assert_not_awaited()
+    dynamic.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_revalidated_with_etag(cache):
+    url = "https://blog.example.com/post"
+    cache.put(url, "Web", LONG_TEXT, etag='"v1"')
+    entry = cache.get(url)
+    cache._write(dict(entry, fetched_at=0))  # max_age 초과
+
+    with patch.object(ContentExtractor, "_fetch_static", AsyncMock(return_value=html_response(304))) as fetch:
+        result = await ContentExtractor.extract(url)
+
+    assert result["content"] == LONG_TEXT
+    assert fetch.await_args.kwargs["etag"] == '"v1"'
+    assert cache.is_fresh(cache.get(url))
+
+@pytest.mark.asyncio
+async def test_successful_extraction_is_cached_with_validators(cache):
+    url = "https://blog.example.com/new"
+    with patch.object(ContentExtractor, "_fetch_static", AsyncMock(return_value=html_response(etag='"v2"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT"))), \
+         patch.object(ContentExtractor, "_parse_html", AsyncMock(return_value=LONG_TEXT)):
+        await ContentExtractor.extract(url)
+
+    entry = cache.get(url)
+    assert entry["content"] == LONG_TEXT
+    assert entry["etag"] == '"v2"'
+    assert entry["last_modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+def test_concurrent_cache_writes_do_not_share_temp_files(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    cache = ExtractionCache(str(tmp_path), max_age_seconds=3600, retention_seconds=86400)
+    url = "https://blog.example.com/post"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: cache.put(url, "Web", f"{LONG_TEXT}{i}"), range(32)))
+
+    assert cache.get(url)["content"].startswith(LONG_TEXT)
+    assert not list(tmp_path.rglob("*.tmp"))  # 임시 파일은 모두 교체되거나 정리됨
+
+def test_youtube_subtitles_are_parsed_in_memory():
+    vtt = b"WEBVTT\n\n00:00:00.000 --> 00:00:01.000\n\xec\x95\x88\xeb\x85\x95\n"
+    ydl = MagicMock()
+    ydl.__enter__.return_value = ydl
+    ydl.extract_info.return_value = {
+        "subtitles": {},
+        "automatic_captions": {
+            "en": [{"ext": "vtt", "url": "https://yt/en.vtt"}],
+            "ko": [{"ext": "json3", "url": "https://yt/ko.json3"}, {"ext": "vtt", "url": "https://yt/ko.vtt"}],
+        },
+    }
+    ydl.urlopen.return_value = io.BytesIO(vtt)
+
+    with patch("src.services.content_extractor.yt_dlp.YoutubeDL", return_value=ydl):
+        result = ContentExtractor._extract_youtube_sync("https://www.youtube.com/watch?v=abc")
+
+    assert result == {"type": "YouTube", "content": "안녕"}
+    ydl.urlopen.assert_called_once_with("https://yt/ko.vtt")
+    ydl.extract_info.assert_called_once_with("https://www.youtube.com/watch?v=abc", download=False)
@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.services.embedding_cache import QueryEmbeddingCache
+
+EMBEDDING = [0.5] * 8
+
+@pytest.mark.asyncio
+async def test_repeated_query_skips_computation():
+    cache = QueryEmbeddingCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    compute = AsyncMock(return_value=EMBEDDING)
+
+    assert await cache.get_or_compute("rust  async", compute) == EMBEDDING
+    # 공백 차이는 같은 쿼리로 취급
+    assert await cache.get_or_compute(" rust async ", compute) == EMBEDDING
+    compute.assert_awaited_once()
+    assert cache.stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_share_one_computation():
+    cache = QueryEmbeddingCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    calls = 0
+
+    async def compute(query):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return EMBEDDING
+
+    results = await asyncio.gather(*(cache.get_or_compute("q", compute) for _ in range(5)))
+    assert results == [EMBEDDING] * 5
+    assert calls == 1
+
+@pytest.mark.asyncio
+async def test_failed_embedding_is_not_cached():
+    cache = QueryEmbeddingCache(max_bytes=1024 * 1024, ttl_seconds=60)
+    compute = AsyncMock(side_effect=[None, EMBEDDING])
+
+    assert await cache.get_or_compute("q", compute) is None
+    assert await cache.get_or_compute("q", compute) == EMBEDDING
+
+def test_lru_eviction_respects_byte_budget():
+    cache = QueryEmbeddingCache(max_bytes=2 * (8 * 4 + 4 + 200), ttl_seconds=60)
+    cache.put("a", EMBEDDING)
+    cache.put("b", EMBEDDING)
+    cache.get("a")  # a 를 최근 사용으로
+    cache.put("c", EMBEDDING)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == EMBEDDING
+    assert cache.get("c") == EMBEDDING
+
+def test_entries_expire_after_ttl():
+    cache = QueryEmbeddingCache(max_bytes=1024 * 1024, ttl_seconds=10)
+    with patch("src.services.embedding_cache.time.monotonic", return_value=100.0):
+        cache.put("q", EMBEDDING)
+    with patch("src.services.embedding_cache.time.monotonic", return_value=111.0):
+        assert cache.get("q") is None
+    assert cache.stats()["entries"] == 0
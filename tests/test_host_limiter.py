@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from src.services.host_limiter import HostLimiter, HostThrottled
+from src.services.content_extractor import ContentExtractor
+
+async def run_tracked(limiter, urls, hold=0.05):
+    active, peak = {}, {}
+
+    async def fetch(url):
+        host = limiter.host_key(url)
+        async with limiter.slot(url):
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            await asyncio.sleep(hold)
+            active[host] -= 1
+
+    await asyncio.gather(*(fetch(u) for u in urls))
+    return peak
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_host_but_hosts_run_in_parallel():
+    limiter = HostLimiter(per_host=2)
+    urls = [f"https://a.com/{i}" for i in range(6)] + [f"https://www.b.com/{i}" for i in range(3)]
+    peak = await run_tracked(limiter, urls)
+    assert peak == {"a.com": 2, "b.com": 2}
+
+def test_aliases_share_a_host_key():
+    assert HostLimiter.host_key("https://youtu.be/abc") == HostLimiter.host_key("https://www.youtube.com/watch?v=abc")
+
+def test_retry_after_parsing():
+    assert HostLimiter.parse_retry_after("12") == 12.0
+    assert HostLimiter.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # 과거 시각
+    assert HostLimiter.parse_retry_after("garbage") is None
+    assert HostLimiter.parse_retry_after(None) is None
+
+@pytest.mark.asyncio
+async def test_backoff_delays_next_request_to_same_host():
+    limiter = HostLimiter(per_host=1, base_backoff=0.1, max_backoff=1)
+    assert limiter.backoff("https://a.com/1") == 0.1
+    assert limiter.backoff("https://a.com/2") == 0.2  # 연속 throttle → 지수 증가
+    assert limiter.backoff("https://a.com/3", retry_after=5) == 1  # max_backoff 로 제한
+
+    limiter = HostLimiter(per_host=1)
+    limiter.backoff("https://a.com/1", retry_after=0.1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    async with limiter.slot("https://a.com/2"):
+        pass
+    assert loop.time() - started >= 0.09
+    async with limiter.slot("https://b.com/1"):
+        pass
+    assert limiter.snapshot()["a.com"]["consecutive_throttles"] == 0  # 성공 후 초기화
+
+@pytest.mark.asyncio
+async def test_extract_backs_off_and_retries_throttled_host():
+    limiter = HostLimiter(per_host=1)
+    extract = AsyncMock(side_effect=[HostThrottled("a.com", 429, retry_after=0.01), {"type": "Web", "content": "ok"}])
+    with patch("src.services.content_extractor.get_host_limiter", return_value=limiter), \
+         patch("src.services.content_extractor.get_extraction_cache", return_value=None), \
+         patch.object(ContentExtractor, "_extract_uncached", extract):
+        result = await ContentExtractor.extract("https://a.com/post")
+
+    assert result == {"type": "Web", "content": "ok"}
+    assert extract.await_count == 2
+    assert limiter.snapshot()["a.com"]["throttled_total"] == 1
@@ -0,0 +1,18 @@
+from src.services.json_utils import extract_json, parse_partial_json
+
+def test_extract_json_ignores_fences_prose_and_braces_in_strings():
+    content = 'Sure!\n```json\n{"title": "a {b} c", "tags": ["x", "y",],}\n```\nHope this helps {not json}'
+    assert extract_json(content) == {"title": "a {b} c", "tags": ["x", "y"]}
+
+def test_extract_json_returns_first_complete_array():
+    assert extract_json('Tags: ["python", "asyncio"] (total 2]', "[") == ["python", "asyncio"]
+    assert extract_json("no json here") is None
+
+def test_parse_partial_json_closes_open_string_and_containers():
+    assert parse_partial_json('{"report": "# 제목\\n본문 일') == {"report": "# 제목\n본문 일"}
+    assert parse_partial_json('{"title": "t", "tags": ["a", "b') == {"title": "t", "tags": ["a", "b"]}
+
+def test_parse_partial_json_drops_incomplete_key():
+    assert parse_partial_json('{"report": "done", "ti') == {"report": "done"}
+    assert parse_partial_json('{"report":') == {}
+    assert parse_partial_json("") is None
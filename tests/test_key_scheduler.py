@@ -0,0 +1,69 @@
+import time
+from src.services.key_scheduler import KeyScheduler, CircuitBreaker
+
+def make_error(status, retry_after=None):
+    error = Exception(f"HTTP {status}")
+    error.status_code = status
+    if retry_after is not None:
+        class Response:
+            headers = {"retry-after": str(retry_after)}
+        error.response = Response()
+    return error
+
+def test_round_robin_among_healthy_keys():
+    scheduler = KeyScheduler("test", ["a", "b", "c"])
+    firsts = [scheduler.candidates()[0].key for _ in range(3)]
+    assert firsts == ["a", "b", "c"]
+
+def test_rate_limited_key_uses_retry_after_cooldown():
+    scheduler = KeyScheduler("test", ["a", "b"], cooldown_seconds=60)
+    state_a = scheduler.states[0]
+    scheduler.record_failure(state_a, make_error(429, retry_after=5))
+
+    assert 0 < state_a.cooldown_until - time.monotonic() <= 5
+    assert [s.key for s in scheduler.candidates()] == ["b"]
+
+def test_bad_request_does_not_cool_down_key():
+    scheduler = KeyScheduler("test", ["a"])
+    scheduler.record_failure(scheduler.states[0], make_error(400))
+    assert [s.key for s in scheduler.candidates()] == ["a"]
+
+def test_rpm_budget_excludes_exhausted_key():
+    scheduler = KeyScheduler("test", ["a", "b"], rpm=1)
+    state_a = scheduler.states[0]
+    scheduler.reserve(state_a)
+    keys = {s.key for s in scheduler.candidates()}
+    assert keys == {"b"}
+
+def test_snapshot_masks_keys():
+    scheduler = KeyScheduler("test", ["secret-key-1234"], rpm=10, tpm=100)
+    snapshot = scheduler.snapshot()[0]
+    assert snapshot["masked"] == "...1234"
+    assert "secret" not in str(snapshot)
+
+def test_circuit_breaker_half_open_after_reset():
+    breaker = CircuitBreaker(threshold=2, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()  # reset_seconds=0 -> 바로 HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_circuit_breaker_allows_new_probe_when_probe_never_reports(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.key_scheduler.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 60
+    assert breaker.allow()  # HALF_OPEN probe (예: hedge 로 시작된 뒤 취소되어 결과 미보고)
+    assert not breaker.allow()
+    now[0] += 59
+    assert not breaker.allow()
+    now[0] += 1
+    assert breaker.allow()  # probe 기한 경과 → 다음 probe
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
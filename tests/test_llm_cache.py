@@ -0,0 +1,47 @@
+import os
+import time
+from src.services.llm_cache import LLMCache
+
+def make_cache(tmp_path, ttl=3600, max_entries=100):
+    return LLMCache(os.path.join(tmp_path, "llm_cache.sqlite3"), ttl_seconds=ttl, max_entries=max_entries)
+
+def test_key_depends_on_model_version_temperature_and_input():
+    messages = [{"role": "user", "content": "hello"}]
+    base = LLMCache.make_key("analyze", 1, "gemma", 0.1, messages)
+    assert base == LLMCache.make_key("analyze", 1, "gemma", 0.1, messages)
+    assert base != LLMCache.make_key("analyze", 2, "gemma", 0.1, messages)
+    assert base != LLMCache.make_key("analyze", 1, "gemini", 0.1, messages)
+    assert base != LLMCache.make_key("analyze", 1, "gemma", 0.3, messages)
+    assert base != LLMCache.make_key("analyze", 1, "gemma", 0.1, [{"role": "user", "content": "hi"}])
+
+def test_get_set_and_stats(tmp_path):
+    cache = make_cache(str(tmp_path))
+    assert cache.get("k1", "tags") is None
+    cache.set("k1", '["python"]', "tags", "gemma")
+    assert cache.get("k1", "tags") == '["python"]'
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["namespaces"]["tags"] == {"hits": 1, "misses": 1}
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = make_cache(str(tmp_path), ttl=1)
+    cache.set("k1", "value")
+    conn = cache._get_conn()
+    conn.execute("UPDATE llm_cache SET created_at = ?", (time.time() - 10,))
+    conn.commit()
+    assert cache.get("k1") is None
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = make_cache(str(tmp_path), max_entries=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    cache.get("a")  # a 를 최근 사용으로 갱신
+    time.sleep(0.01)
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
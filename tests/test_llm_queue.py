@@ -0,0 +1,322 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.services.llm_queue import LLMQueue, LLMJob
+from src.database.models import LLMJobRecord, JobStatus
+
+def make_bot():
+    bot = MagicMock()
+    bot.user = MagicMock()
+    return bot
+
+def make_record(job_id=1, job_type='ask', payload=None):
+    return LLMJobRecord(
+        id=job_id,
+        job_type=job_type,
+        payload=payload or {'query': 'q', 'docs': []},
+        status=JobStatus.RUNNING,
+        context_channel_id=None,
+        context_message_id=None,
+        attempts=1
+    )
+
+@pytest.mark.asyncio
+async def test_add_job_persists_context_ids():
+    queue = LLMQueue(make_bot())
+    message = MagicMock()
+    message.id = 222
+    message.channel.id = 111
+    message.add_reaction = AsyncMock()
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.enqueue = AsyncMock(return_value=make_record(job_id=7))
+        MockStore.count_pending = AsyncMock(return_value=1)
+
+        job = await queue.add_job(LLMJob(type='ask', payload={'query': 'q', 'docs': []}, context=message))
+
+        assert job.id == 7
+        kwargs = MockStore.enqueue.call_args.kwargs
+        assert kwargs['context_channel_id'] == 111
+        assert kwargs['context_message_id'] == 222
+        assert queue.qsize() == 1
+
+@pytest.mark.asyncio
+async def test_worker_completes_claimed_job():
+    queue = LLMQueue(make_bot())
+    queue.poll_interval = 0.01
+
+    async def process(job):
+        queue.is_running = False
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.claim = AsyncMock(side_effect=[make_record(job_id=3), None])
+        MockStore.count_pending = AsyncMock(return_value=0)
+        MockStore.complete = AsyncMock()
+        MockStore.fail = AsyncMock()
+        queue._process_ask = AsyncMock(side_effect=process)
+
+        await queue.worker(1)
+
+        queue._process_ask.assert_awaited_once()
+        MockStore.complete.assert_awaited_once_with(3, f"{queue.worker_prefix}:1")
+        MockStore.fail.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_worker_marks_failed_job():
+    queue = LLMQueue(make_bot())
+
+    async def process(job):
+        queue.is_running = False
+        raise Exception("boom")
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.claim = AsyncMock(return_value=make_record(job_id=4))
+        MockStore.count_pending = AsyncMock(return_value=0)
+        MockStore.complete = AsyncMock()
+        MockStore.fail = AsyncMock()
+        queue._process_ask = AsyncMock(side_effect=process)
+
+        await queue.worker(1)
+
+        MockStore.fail.assert_awaited_once_with(4, f"{queue.worker_prefix}:1", "boom")
+        MockStore.complete.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_worker_skips_completion_when_lease_lost_before_complete():
+    queue = LLMQueue(make_bot())
+    on_complete = MagicMock()
+    context = MagicMock()
+    context.add_reaction = AsyncMock()
+    context.remove_reaction = AsyncMock()
+
+    async def process(job):
+        queue.is_running = False
+
+    async def load_job(record):
+        return LLMJob(type=record.job_type, payload=record.payload, context=context,
+                      on_complete=on_complete, id=record.id)
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.claim = AsyncMock(return_value=make_record(job_id=6))
+        MockStore.count_pending = AsyncMock(return_value=0)
+        MockStore.complete = AsyncMock(return_value=None)  # 다른 워커가 재claim
+        MockStore.fail = AsyncMock()
+        queue._load_job = load_job
+        queue._process_ask = AsyncMock(side_effect=process)
+
+        await queue.worker(1)
+
+        MockStore.complete.assert_awaited_once_with(6, f"{queue.worker_prefix}:1")
+        on_complete.assert_not_called()
+        reactions = [c.args[0] for c in context.add_reaction.call_args_list]
+        assert "✅" not in reactions
+        MockStore.fail.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_worker_stops_processing_when_lease_is_lost():
+    queue = LLMQueue(make_bot())
+    queue.lease_seconds = 0  # 연장 주기 1초
+    cancelled = asyncio.Event()
+
+    async def process(job):
+        queue.is_running = False
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.claim = AsyncMock(return_value=make_record(job_id=5))
+        MockStore.count_pending = AsyncMock(return_value=0)
+        MockStore.renew_lease = AsyncMock(return_value=False)  # 다른 워커가 재claim
+        MockStore.complete = AsyncMock()
+        MockStore.fail = AsyncMock()
+        queue._process_ask = AsyncMock(side_effect=process)
+
+        await asyncio.wait_for(queue.worker(1), timeout=5)
+
+        assert cancelled.is_set()
+        MockStore.complete.assert_not_called()
+        MockStore.fail.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_weekly_report_without_context_goes_to_output_channel():
+    bot = make_bot()
+    bot.ai.chat = AsyncMock(return_value="report")
+    out_channel = MagicMock(send=AsyncMock())
+    bot.get_channel.return_value = out_channel
+    queue = LLMQueue(bot)
+
+    with patch("builtins.open"), patch("src.services.llm_queue.asyncio.to_thread", AsyncMock()):
+        await queue._process_weekly(LLMJob(type='weekly', payload={'context_text': 'x'}))
+
+    bot.get_channel.assert_called_with(queue.output_channel_id)
+    out_channel.send.assert_awaited_once_with("📊 **주간 트렌드**\nreport")
+
+@pytest.mark.asyncio
+async def test_add_job_assigns_lane_and_priority():
+    queue = LLMQueue(make_bot())
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.enqueue = AsyncMock(return_value=make_record(job_id=8))
+        MockStore.count_pending = AsyncMock(return_value=1)
+
+        await queue.add_job(LLMJob(type='ask', payload={}))
+        kwargs = MockStore.enqueue.call_args.kwargs
+        assert kwargs['lane'] == 'interactive'
+        assert kwargs['priority'] == LLMQueue.JOB_PRIORITIES['ask']
+
+        await queue.add_job(LLMJob(type='deep_dive', payload={}, priority=99))
+        kwargs = MockStore.enqueue.call_args.kwargs
+        assert kwargs['lane'] == 'batch'
+        assert kwargs['priority'] == 99
+
+@pytest.mark.asyncio
+async def test_interactive_worker_claims_only_interactive_lane():
+    queue = LLMQueue(make_bot())
+    queue.poll_interval = 0.01
+
+    async def stop_after_claim(*args, **kwargs):
+        queue.is_running = False
+        return None
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.claim = AsyncMock(side_effect=stop_after_claim)
+        await queue.worker("interactive-1", "interactive")
+        assert MockStore.claim.call_args.kwargs['lanes'] == ['interactive']
+
+@pytest.mark.asyncio
+async def test_duplicate_request_during_extraction_becomes_subscriber():
+    queue = LLMQueue(make_bot())
+    key = LLMQueue.dedup_key('summary', "https://fxtwitter.com/user/status/1")
+    assert key == "summary:https://x.com/user/status/1"
+
+    first = MagicMock(id=1, add_reaction=AsyncMock())
+    first.channel.id = 10
+    second = MagicMock(id=2, add_reaction=AsyncMock())
+    second.channel.id = 10
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.attach_subscriber = AsyncMock(return_value=None)
+        MockStore.enqueue = AsyncMock(return_value=make_record(job_id=5))
+        MockStore.count_pending = AsyncMock(return_value=1)
+
+        assert await queue.attach(key, first) is False  # 진행 중인 작업이 없으면 선점
+        assert await queue.attach(key, second) is True
+
+        await queue.add_job(LLMJob(type='summary', payload={}, context=first, dedup_key=key))
+
+        kwargs = MockStore.enqueue.call_args.kwargs
+        assert kwargs['dedup_key'] == key
+        assert kwargs['subscribers'] == [{"channel_id": 10, "message_id": 2}]
+        assert key not in queue._reserved
+
+@pytest.mark.asyncio
+async def test_attach_joins_persisted_job():
+    queue = LLMQueue(make_bot())
+    message = MagicMock(id=3, add_reaction=AsyncMock())
+    message.channel.id = 10
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.attach_subscriber = AsyncMock(return_value=42)
+        assert await queue.attach("deep_dive:https://example.com", message) is True
+        MockStore.attach_subscriber.assert_awaited_once_with("deep_dive:https://example.com", 10, 3)
+    assert "deep_dive:https://example.com" not in queue._reserved
+
+@pytest.mark.asyncio
+async def test_concurrent_attach_reserves_only_once():
+    queue = LLMQueue(make_bot())
+    key = "summary:https://example.com"
+    first = MagicMock(id=1, add_reaction=AsyncMock())
+    first.channel.id = 10
+    second = MagicMock(id=2, add_reaction=AsyncMock())
+    second.channel.id = 10
+    lookup_started = asyncio.Event()
+    release_lookup = asyncio.Event()
+
+    async def slow_lookup(*args):
+        lookup_started.set()
+        await release_lookup.wait()
+        return None
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.attach_subscriber = AsyncMock(side_effect=slow_lookup)
+        first_task = asyncio.create_task(queue.attach(key, first))
+        await lookup_started.wait()
+        # 첫 요청이 DB 를 조회하는 동안 들어온 같은 요청은 선점된 키에 합류
+        assert await queue.attach(key, second) is True
+        release_lookup.set()
+        assert await first_task is False
+
+    MockStore.attach_subscriber.assert_awaited_once()
+    assert queue._reserved[key] == [second]
+
+@pytest.mark.asyncio
+async def test_waiters_follow_persisted_job_found_after_reserve():
+    queue = LLMQueue(make_bot())
+    key = "summary:https://example.com"
+    first = MagicMock(id=1, add_reaction=AsyncMock())
+    first.channel.id = 10
+    second = MagicMock(id=2, add_reaction=AsyncMock())
+    second.channel.id = 10
+    lookup_started = asyncio.Event()
+    release_lookup = asyncio.Event()
+
+    async def slow_lookup(key, channel_id, message_id):
+        if message_id == 1:
+            lookup_started.set()
+            await release_lookup.wait()
+        return 42
+
+    with patch("src.services.llm_queue.JobStore") as MockStore:
+        MockStore.attach_subscriber = AsyncMock(side_effect=slow_lookup)
+        first_task = asyncio.create_task(queue.attach(key, first))
+        await lookup_started.wait()
+        assert await queue.attach(key, second) is True
+        release_lookup.set()
+        assert await first_task is True
+
+        MockStore.attach_subscriber.assert_any_await(key, 10, 2)
+    assert key not in queue._reserved
+
+@pytest.mark.asyncio
+async def test_ask_answer_streams_and_cites_sources():
+    bot = make_bot()
+    message = MagicMock()
+    sent = MagicMock()
+    sent.edit = AsyncMock()
+    message.channel.send = AsyncMock(return_value=sent)
+
+    async def chat(messages, temperature=0.1, hedge=False, on_update=None):
+        assert "[1] Doc A" in messages[0]["content"]
+        await on_update("부분 답변")
+        return "답변 [1]"
+
+    bot.ai.chat = AsyncMock(side_effect=chat)
+    queue = LLMQueue(bot)
+    payload = {
+        'query': 'q',
+        'docs': ["[1] Doc A\nchunk"],
+        'sources': [{'n': 1, 'document_id': 5, 'title': 'Doc A', 'url': 'https://example.com/a'}],
+    }
+
+    await queue._process_ask(LLMJob(type='ask', payload=payload, context=message))
+
+    final = sent.edit.await_args.kwargs["content"]
+    assert final.startswith("💡 **답변:**\n답변 [1]")
+    assert "[1] Doc A <https://example.com/a>" in final
+
+@pytest.mark.asyncio
+async def test_ask_answer_without_context_goes_to_output_channel():
+    bot = make_bot()
+    bot.ai.chat = AsyncMock(return_value="답변")
+    out_channel = MagicMock(send=AsyncMock())
+    bot.get_channel.return_value = out_channel
+    queue = LLMQueue(bot)
+
+    await queue._process_ask(LLMJob(type='ask', payload={'query': 'q', 'docs': [], 'sources': []}))
+
+    bot.ai.chat.assert_awaited_once()
+    assert bot.ai.chat.await_args.kwargs["on_update"] is None
+    out_channel.send.assert_awaited_once_with("💡 **답변:**\n답변")
@@ -1,6 +1,6 @@
-
 import pytest
 import asyncio
+import numpy as np
 from unittest.mock import AsyncMock, MagicMock, patch
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.services.vector_service import VectorService
@@ -15,13 +15,16 @@ MOCK_EMBEDDING = [0.1] * 768
 
 @pytest.mark.asyncio
 async def test_vector_service_process_document():
-    # Mock DB Session
+    # Mock DB Session (no cached embeddings)
     mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.all.return_value = []
+    mock_db.execute.return_value = mock_result
     
     # Mock AIAgent
-    with patch("src.services.vector_service.AIAgent") as MockAgent:
+    with patch("src.services.vector_service.AsyncAIAgent") as MockAgent:
         agent_instance = MockAgent.return_value
-        agent_instance.generate_embedding.return_value = MOCK_EMBEDDING
+        agent_instance.generate_embeddings = AsyncMock(return_value=[MOCK_EMBEDDING] * len(MOCK_CHUNKS))
         
         service = VectorService(mock_db)
         
@@ -31,15 +34,38 @@ async def test_vector_service_process_document():
         
         await service.process_document(MOCK_DOC_ID, MOCK_CONTENT)
         
-        # Verify Interactions
+        # Verify Interactions: all chunks embedded in a single batch call
         service.text_splitter.split_text.assert_called_once_with(MOCK_CONTENT)
-        assert agent_instance.generate_embedding.call_count == len(MOCK_CHUNKS)
+        agent_instance.generate_embeddings.assert_awaited_once_with(MOCK_CHUNKS)
         
-        # Verify DB calls (Clear + Add + Commit)
-        assert mock_db.execute.called # clear_chunks
+        # Verify DB calls (Lookup + Clear + Add + Commit)
+        assert mock_db.execute.called # cache lookup, clear_chunks
         assert mock_db.add_all.called
         assert mock_db.commit.called
 
+@pytest.mark.asyncio
+async def test_vector_service_reuses_cached_chunk_embeddings():
+    mock_db = AsyncMock(spec=AsyncSession)
+    cached_hash = VectorService.hash_chunk(MOCK_CHUNKS[0])
+    mock_result = MagicMock()
+    mock_result.all.return_value = [(cached_hash, MOCK_EMBEDDING)]
+    mock_db.execute.return_value = mock_result
+
+    with patch("src.services.vector_service.AsyncAIAgent") as MockAgent:
+        agent_instance = MockAgent.return_value
+        agent_instance.generate_embeddings = AsyncMock(return_value=[MOCK_EMBEDDING])
+
+        service = VectorService(mock_db)
+        service.text_splitter = MagicMock()
+        service.text_splitter.split_text.return_value = MOCK_CHUNKS
+
+        await service.process_document(MOCK_DOC_ID, MOCK_CONTENT)
+
+        # Only the unchanged chunk is skipped
+        agent_instance.generate_embeddings.assert_awaited_once_with([MOCK_CHUNKS[1]])
+        saved = mock_db.add_all.call_args.args[0]
+        assert [c.content_hash for c in saved] == [VectorService.hash_chunk(c) for c in MOCK_CHUNKS]
+
 @pytest.mark.asyncio
 async def test_search_service_search_similar():
     mock_db = AsyncMock(spec=AsyncSession)
@@ -54,12 +80,12 @@ async def test_search_service_search_similar():
     mock_chunk.document = Document(id=MOCK_DOC_ID, title="Test Doc")
     
     mock_result = MagicMock()
-    mock_result.scalars().all.return_value = [mock_chunk]
+    mock_result.all.return_value = [(mock_chunk, 0.25)]
     mock_db.execute.return_value = mock_result
     
-    with patch("src.services.search_service.AIAgent") as MockAgent:
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
         agent_instance = MockAgent.return_value
-        agent_instance.generate_embedding.return_value = MOCK_EMBEDDING
+        agent_instance.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
         
         service = SearchService(mock_db)
         results = await service.search_similar("query", limit=1)
@@ -67,3 +93,192 @@ async def test_search_service_search_similar():
         assert len(results) == 1
         assert results[0]['document_id'] == MOCK_DOC_ID
         assert results[0]['content'] == "Apple is X"
+        assert results[0]['distance'] == 0.25
+        assert results[0]['score'] == 0.75
+
+@pytest.mark.asyncio
+async def test_search_sets_ef_search_for_the_transaction():
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.all.return_value = []
+    mock_db.execute.return_value = mock_result
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
+        service = SearchService(mock_db, ef_search=40)
+
+        await service.search_similar("query", limit=10, ef_search=200)
+        assert str(mock_db.execute.await_args_list[0].args[0]) == "SET LOCAL hnsw.ef_search = 200"
+
+        # ef_search 는 offset + limit 보다 작을 수 없음
+        await service.search_similar("query", limit=50, offset=30)
+        assert str(mock_db.execute.await_args_list[2].args[0]) == "SET LOCAL hnsw.ef_search = 80"
+
+@pytest.mark.asyncio
+async def test_search_applies_threshold_in_sql():
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.all.return_value = []
+    mock_db.execute.return_value = mock_result
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
+        service = SearchService(mock_db)
+        await service.search_similar("query", limit=5, threshold=0.4)
+
+    stmt = mock_db.execute.await_args_list[-1].args[0]
+    assert stmt.whereclause is not None
+    assert "<=" in str(stmt.whereclause)
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    from src.services.search_service import reciprocal_rank_fusion
+    scores = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    assert scores["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert scores["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert sorted(scores, key=scores.get, reverse=True) == ["a", "c", "b"]
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_vector_and_lexical_hits():
+    doc = Document(id=MOCK_DOC_ID, title="Test Doc")
+    chunks = {}
+    for chunk_id in (1, 2, 3):
+        chunks[chunk_id] = DocumentChunk(id=chunk_id, document_id=MOCK_DOC_ID, content=f"chunk {chunk_id}")
+        chunks[chunk_id].document = doc
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
+        service = SearchService(AsyncMock(spec=AsyncSession), session_factory=MagicMock())
+        service._vector_candidates = AsyncMock(return_value=[(chunks[1], 0.2), (chunks[2], 0.3)])
+        # chunk 3 은 본문 키워드로만, chunk 2 는 본문 + 제목 모두에서 매칭
+        service._lexical_search = AsyncMock(return_value=[[(chunks[3], 0.9), (chunks[2], 0.5)], [(chunks[2], 0.4)]])
+
+        results = await service.search("exact_identifier", mode="hybrid", limit=3)
+
+    # 두 방식 모두에서 찾은 chunk 2 가 1위, 한쪽에서만 1위인 chunk 1 / 3 은 동점
+    assert [r["chunk_id"] for r in results] == [2, 1, 3]
+    assert results[0]["distance"] == 0.3
+    assert results[2]["distance"] is None
+
+@pytest.mark.asyncio
+async def test_hybrid_search_falls_back_to_lexical_when_embedding_fails():
+    doc = Document(id=MOCK_DOC_ID, title="Test Doc")
+    chunk = DocumentChunk(id=7, document_id=MOCK_DOC_ID, content="ERR_CONNECTION_RESET")
+    chunk.document = doc
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=None)
+        service = SearchService(AsyncMock(spec=AsyncSession), session_factory=MagicMock())
+        service._lexical_search = AsyncMock(return_value=[[(chunk, 0.8)], []])
+
+        results = await service.search_hybrid("ERR_CONNECTION_RESET", limit=5)
+
+    assert [r["chunk_id"] for r in results] == [7]
+
+def test_mmr_select_prefers_diverse_candidates():
+    from src.services.search_service import mmr_select
+    query = [1.0, 0.0]
+    candidates = [[1.0, 0.0], [0.99, 0.01], [0.7, 0.7]]
+    # 관련도만 보면 0, 1 이지만 1 은 0 과 거의 같으므로 다양성 가중치가 있으면 2 를 먼저 고름
+    assert mmr_select(query, candidates, k=2, lambda_=1.0) == [0, 1]
+    assert mmr_select(query, candidates, k=2, lambda_=0.3) == [0, 2]
+    assert mmr_select(query, [None, [1.0, 0.0]], k=5) == [1, 0]
+
+@pytest.mark.asyncio
+async def test_grouped_search_returns_best_chunk_per_document():
+    docs = {doc_id: Document(id=doc_id, title=f"Doc {doc_id}") for doc_id in (1, 2)}
+    rows = []
+    for chunk_id, doc_id, distance in [(10, 1, 0.1), (11, 1, 0.12), (12, 1, 0.15), (20, 2, 0.2)]:
+        chunk = DocumentChunk(id=chunk_id, document_id=doc_id, content=f"chunk {chunk_id}", embedding=MOCK_EMBEDDING)
+        chunk.document = docs[doc_id]
+        rows.append((chunk, distance))
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
+        service = SearchService(AsyncMock(spec=AsyncSession), session_factory=MagicMock())
+        service._vector_candidates = AsyncMock(return_value=rows)
+
+        results = await service.search("grouped query", group_by_document=True, limit=10)
+
+    assert [(r["document_id"], r["chunk_id"], r["match_count"]) for r in results] == [(1, 10, 3), (2, 20, 1)]
+    # 후보 풀은 페이지 크기와 무관하게 고정 (페이지 간 순서 유지)
+    assert service._vector_candidates.await_args.args[2] == service.rerank_candidates
+
+@pytest.mark.asyncio
+async def test_reranked_pages_are_prefixes_of_larger_requests():
+    rng = np.random.default_rng(0)
+    docs = {doc_id: Document(id=doc_id, title=f"Doc {doc_id}") for doc_id in range(200)}
+    rows = []
+    for chunk_id in range(1000):
+        # 앞쪽 문서일수록 청크가 많아 그룹으로 묶으면 후보 풀이 크게 줄어듦
+        doc_id = int(np.sqrt(chunk_id) * 4)
+        chunk = DocumentChunk(id=chunk_id, document_id=doc_id, content=f"chunk {chunk_id}", embedding=rng.normal(size=8).tolist())
+        chunk.document = docs[doc_id]
+        rows.append((chunk, chunk_id / 1000))
+
+    async def vector_candidates(db, embedding, limit, offset, *args, **kwargs):
+        return rows[offset:offset + limit]
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=[1.0] * 8)
+        service = SearchService(AsyncMock(spec=AsyncSession), session_factory=MagicMock())
+        service._vector_candidates = AsyncMock(side_effect=vector_candidates)
+        options = {"group_by_document": True, "mmr_lambda": 0.5}
+
+        pages = []
+        for offset in range(0, 60, 10):
+            pages += await service.search("paged query", limit=10, offset=offset, **options)
+        whole = await service.search("paged query", limit=60, offset=0, **options)
+
+    assert len(whole) == 60
+    assert [(r["chunk_id"], r["match_count"]) for r in pages] == [(r["chunk_id"], r["match_count"]) for r in whole]
+    assert len({r["document_id"] for r in whole}) == 60
+
+@pytest.mark.asyncio
+async def test_filtered_search_prefilters_inside_ann_query():
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.all.return_value = []
+    mock_db.execute.return_value = mock_result
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
+        service = SearchService(mock_db)
+        service.iterative_scan = True
+        await service.search_similar("query", limit=5, filters={"doc_type": "DEEP_DIVE", "tag": None})
+
+    statements = [call.args[0] for call in mock_db.execute.await_args_list]
+    assert str(statements[1]) == "SET LOCAL hnsw.iterative_scan = strict_order"
+    sql = str(statements[-1])
+    assert "document_chunks.document_id IN (SELECT documents.id" in sql
+    assert "documents.doc_type" in sql
+
+@pytest.mark.asyncio
+async def test_unfiltered_search_skips_iterative_scan():
+    mock_db = AsyncMock(spec=AsyncSession)
+    mock_result = MagicMock()
+    mock_result.all.return_value = []
+    mock_db.execute.return_value = mock_result
+
+    with patch("src.services.search_service.AsyncAIAgent") as MockAgent:
+        MockAgent.return_value.generate_embedding = AsyncMock(return_value=MOCK_EMBEDDING)
+        service = SearchService(mock_db)
+        await service.search_similar("query", limit=5, filters={"category": "", "tag": None})
+
+    statements = [str(call.args[0]) for call in mock_db.execute.await_args_list]
+    assert not any("iterative_scan" in sql for sql in statements)
+    assert "IN (SELECT" not in statements[-1]
+
+def test_build_cited_context_numbers_documents_and_respects_budget():
+    from src.services.search_service import build_cited_context
+    results = [
+        {"document_id": 1, "document_title": "A", "content": "alpha " * 20, "source_url": "https://a"},
+        {"document_id": 2, "document_title": "B", "content": "beta " * 20, "source_url": None},
+        {"document_id": 1, "document_title": "A", "content": "gamma " * 20, "source_url": "https://a"},
+        {"document_id": 3, "document_title": "C", "content": "delta " * 2000, "source_url": None},
+    ]
+    blocks, sources = build_cited_context(results, max_tokens=400)
+
+    assert [b.split("\n")[0] for b in blocks] == ["[1] A", "[2] B", "[1] A", "[3] C"]
+    assert [(s["n"], s["title"], s["url"]) for s in sources] == [(1, "A", "https://a"), (2, "B", None), (3, "C", None)]
+    from src.services.token_budget import count_tokens
+    assert sum(count_tokens(b) for b in blocks) <= 400
@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from src.services.streaming_reply import StreamingReply, split_message
+
+def make_channel():
+    channel = MagicMock()
+    message = MagicMock()
+    message.edit = AsyncMock()
+    message.delete = AsyncMock()
+    channel.send = AsyncMock(return_value=message)
+    return channel, message
+
+@pytest.mark.asyncio
+async def test_updates_are_throttled_to_one_message():
+    channel, message = make_channel()
+    reply = StreamingReply(channel, header="H:", interval=60)
+
+    await reply.update("a")
+    await asyncio.sleep(0)
+    await reply.update("ab")
+    await reply.update("abc")
+    await reply.finish("abcd")
+
+    channel.send.assert_awaited_once_with("H:a")
+    message.edit.assert_awaited_once_with(content="H:abcd")
+
+@pytest.mark.asyncio
+async def test_finish_sends_overflow_as_extra_messages():
+    channel, message = make_channel()
+    reply = StreamingReply(channel, limit=10)
+
+    await reply.finish("line one\nline two\nline three")
+
+    assert [c.args[0] for c in channel.send.await_args_list] == ["line one", "line two", "line three"]
+
+@pytest.mark.asyncio
+async def test_discard_deletes_partial_message():
+    channel, message = make_channel()
+    reply = StreamingReply(channel, interval=0)
+
+    await reply.update("partial")
+    await reply.discard()
+
+    message.delete.assert_awaited_once()
+    assert reply.message is None
+
+def test_split_message_hard_cuts_without_newlines():
+    assert split_message("x" * 25, limit=10) == ["x" * 10, "x" * 10, "x" * 5]
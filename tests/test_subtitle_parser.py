@@ -0,0 +1,61 @@
+import io
+from src.services.subtitle_parser import iter_vtt_text, iter_lines
+
+ROLLING_AUTO_CAPTIONS = """WEBVTT
+Kind: captions
+Language: ko
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+안녕하세요<00:00:00.500><c> 여러분</c>
+
+00:00:02.000 --> 00:00:02.010 align:start position:0%
+안녕하세요 여러분
+
+00:00:02.010 --> 00:00:04.000 align:start position:0%
+안녕하세요 여러분
+오늘은<00:00:02.500><c> 파이썬</c><00:00:03.000><c> 이야기</c>
+
+00:00:04.000 --> 00:00:04.010 align:start position:0%
+오늘은 파이썬 이야기
+
+00:00:04.010 --> 00:00:06.000 align:start position:0%
+오늘은 파이썬 이야기
+입니다 &amp; 시작합니다
+"""
+
+def test_rolling_auto_captions_are_merged_without_duplicates():
+    lines = list(iter_vtt_text(ROLLING_AUTO_CAPTIONS.splitlines()))
+    assert lines == ["안녕하세요 여러분", "오늘은 파이썬 이야기", "입니다 & 시작합니다"]
+
+def test_growing_caption_line_replaces_its_prefix():
+    vtt = """WEBVTT
+
+00:00:00.000 --> 00:00:01.000
+this is
+
+00:00:01.000 --> 00:00:02.000
+this is a growing line
+
+00:00:02.000 --> 00:00:03.000
+next sentence
+"""
+    assert list(iter_vtt_text(vtt.splitlines())) == ["this is a growing line", "next sentence"]
+
+def test_metadata_blocks_and_cue_identifiers_are_skipped():
+    vtt = """WEBVTT
+
+STYLE
+::cue { color: red }
+
+NOTE this is a comment
+spanning lines
+
+intro-1
+00:00:00.000 --> 00:00:01.000
+<v Speaker>Hello</v>
+"""
+    assert list(iter_vtt_text(vtt.splitlines())) == ["Hello"]
+
+def test_iter_lines_handles_multibyte_characters_across_chunks():
+    data = "첫 줄\n둘째 줄\n셋째".encode("utf-8")
+    assert list(iter_lines(io.BytesIO(data), chunk_size=4)) == ["첫 줄", "둘째 줄", "셋째"]
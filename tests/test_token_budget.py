@@ -0,0 +1,37 @@
+from unittest.mock import patch
+from src.services import token_budget
+from src.services.token_budget import TokenBudget, count_tokens, trim_to_tokens
+
+def test_approximate_estimator_counts_hangul_per_character():
+    with patch.object(token_budget, "_ENCODING", None):
+        assert count_tokens("안녕하세요") == 5
+        assert count_tokens("hello world!") == 3
+        assert count_tokens("") == 0
+
+def test_trim_prefers_section_and_sentence_boundaries():
+    with patch.object(token_budget, "_ENCODING", None):
+        text = "# 소개\n첫 문단입니다.\n\n## 본문\n" + "긴 문장입니다. " * 50
+        trimmed = trim_to_tokens(text, 200)
+        assert count_tokens(trimmed) <= 200
+        assert trimmed.endswith("입니다.")
+
+        sections = "## A\n" + "가" * 90 + "\n## B\n" + "나" * 90
+        assert trim_to_tokens(sections, 110) == "## A\n" + "가" * 90
+
+def test_input_budget_respects_window_tpm_and_cap():
+    budget = TokenBudget({"big": 1_000_000, "small": 8192}, default_window=32768, tpm_limit=15000)
+    assert budget.input_budget("big", overhead_tokens=500, output_tokens=4000) == 10500  # TPM 이 상한
+    assert budget.input_budget("big", 500, 4000, cap=6000) == 6000
+    assert budget.input_budget("small", 500, 1000, apply_tpm=False) == 6692
+
+def test_fit_messages_shrinks_the_longest_user_message():
+    with patch.object(token_budget, "_ENCODING", None):
+        budget = TokenBudget({}, default_window=1000)
+        messages = [
+            {"role": "system", "content": "시스템"},
+            {"role": "user", "content": "문장입니다. " * 100},
+        ]
+        fitted = budget.fit_messages(messages, 200)
+        assert fitted[0] == messages[0]
+        assert token_budget.count_message_tokens(fitted) <= 200
+        assert budget.fit_messages(messages, 10_000) is messages